@@ -1,8 +1,15 @@
 from django.contrib import admin
 
-from .models import Vendor, PurchaseOrder, HistoricalPerformance
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricAggregate, MetricRecomputeTask, VendorScorecard, VendorScorecardTotal, PurchaseOrderEvent, VendorDailyMetric, VendorMetricWindow
 
 # Registering models
 admin.site.register(Vendor)
 admin.site.register(PurchaseOrder)
 admin.site.register(HistoricalPerformance)
+admin.site.register(VendorMetricAggregate)
+admin.site.register(MetricRecomputeTask)
+admin.site.register(VendorScorecard)
+admin.site.register(VendorScorecardTotal)
+admin.site.register(PurchaseOrderEvent)
+admin.site.register(VendorDailyMetric)
+admin.site.register(VendorMetricWindow)
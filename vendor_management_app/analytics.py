@@ -0,0 +1,196 @@
+from itertools import islice
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from django.conf import settings
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from vendor_management_app.metrics import METRIC_COUNTERS, VENDOR_METRIC_FIELDS
+from vendor_management_app.models import PurchaseOrder, Vendor
+
+#  Fleet-wide vendor analytics computed with NumPy/pandas instead of one query per vendor.
+#  Purchase orders are streamed in chunks of ANALYTICS_CHUNK_SIZE rows; each chunk is turned
+#  into column arrays and reduced to per-vendor counters, which are combined at the end.
+#  Counters and metrics follow the same definitions as metrics.counter_aggregates().
+
+ANALYTICS_COLUMNS = ('vendor_id', 'status', 'delivery_date', 'acknowledgment_date', 'issue_date', 'quality_rating')
+
+DATETIME_COLUMNS = ('delivery_date', 'acknowledgment_date', 'issue_date')
+
+MICROSECONDS_PER_DAY = 86_400_000_000
+
+# (vendor, day) pairs are packed into one integer key: vendor_id * DAY_KEY_RANGE + days since 1970
+DAY_KEY_RANGE = 1_000_000
+
+# Datetimes are fetched as text and parsed per column by pandas, which is far cheaper
+# than the ORM building an aware datetime object for every value
+def _chunks(queryset, chunk_size):
+    columns = [Cast(column, CharField()) if column in DATETIME_COLUMNS else column for column in ANALYTICS_COLUMNS]
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield pd.DataFrame.from_records(chunk, columns=ANALYTICS_COLUMNS)
+
+# Datetime column as integer microseconds since the epoch, and a mask of the non-null values
+def microseconds(column):
+    values = pd.to_datetime(column, utc=True, format='ISO8601').to_numpy(dtype='datetime64[us]')
+    present = ~np.isnat(values)
+    return values.astype(np.int64), present
+
+# Per purchase order contribution to each counter, from column arrays aligned with the purchase orders.
+# Datetimes are integer microseconds; quality is NaN where there is no rating.
+def contribution_arrays(completed, delivery, acknowledgment, acknowledged, issue, quality):
+    rated = ~np.isnan(quality)
+    acknowledged = acknowledged & completed
+    return {
+        'completed_count': completed.astype(np.int64),
+        'on_time_count': (acknowledged & (delivery <= acknowledgment)).astype(np.int64),
+        'quality_sum': np.where(completed & rated, quality, 0.0),
+        'quality_count': (completed & rated).astype(np.int64),
+        'response_time_sum': np.where(acknowledged, acknowledgment - issue, 0),
+        'response_count': acknowledged.astype(np.int64),
+        'fulfilled_count': (completed & (~rated | (quality >= 3))).astype(np.int64),
+    }
+
+def _contributions(frame):
+    delivery, _ = microseconds(frame['delivery_date'])
+    acknowledgment, acknowledged = microseconds(frame['acknowledgment_date'])
+    issue, _ = microseconds(frame['issue_date'])
+    return contribution_arrays(
+        (frame['status'] == 'completed').to_numpy(),
+        delivery,
+        acknowledgment,
+        acknowledged,
+        issue,
+        frame['quality_rating'].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
+
+# Sum the contributions per distinct integer key. Rows are grouped with one stable sort,
+# so every counter is summed in row order and the integer counters exactly.
+def reduce_by(keys, contributions):
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.diff(sorted_keys, prepend=sorted_keys[:1] - 1))
+    counters = {counter: np.add.reduceat(values[order], starts) for counter, values in contributions.items()}
+    return sorted_keys[starts], counters
+
+# Vectorized version of metrics.derive_vendor_metrics over counter arrays
+def derive_metrics(counters):
+    completed = counters['completed_count']
+    quality_count = counters['quality_count']
+    response_count = counters['response_count']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'on_time_delivery_rate': np.where(completed > 0, counters['on_time_count'] / completed, 0.0),
+            'quality_rating_avg': np.where(quality_count > 0, counters['quality_sum'] / quality_count, 0.0),
+            'average_response_time': np.where(response_count > 0, counters['response_time_sum'] / response_count, 0.0),
+            'fulfilment_rate': np.where(completed > 0, counters['fulfilled_count'] / completed, 0.0),
+        }
+
+def _frame(index, counters):
+    frame = pd.DataFrame(counters, index=index)
+    # Response times are summed in integer microseconds; convert like timedelta.total_seconds()
+    frame['response_time_sum'] = [int(value) / 1_000_000 for value in frame['response_time_sum']]
+    return frame
+
+# Counters and metrics of every vendor (or of vendor_ids) in one pass over their purchase orders.
+# Returns a DataFrame indexed by vendor_id; vendors without purchase orders get zeros.
+def fleet_vendor_metrics(vendor_ids=None, chunk_size=None):
+    chunk_size = chunk_size or settings.ANALYTICS_CHUNK_SIZE
+    vendors = Vendor.objects.order_by('id')
+    purchase_orders = PurchaseOrder.objects.order_by()
+    if vendor_ids is not None:
+        vendors = vendors.filter(id__in=vendor_ids)
+        purchase_orders = purchase_orders.filter(vendor_id__in=vendor_ids)
+
+    partial_labels = []
+    partial_counters = {counter: [] for counter in METRIC_COUNTERS}
+    for frame in _chunks(purchase_orders, chunk_size):
+        labels, counters = reduce_by(frame['vendor_id'].to_numpy(dtype=np.int64), _contributions(frame))
+        partial_labels.append(labels)
+        for counter, totals in counters.items():
+            partial_counters[counter].append(totals)
+
+    index = pd.Index(np.fromiter(vendors.values_list('id', flat=True), dtype=np.int64), name='vendor_id')
+    if partial_labels:
+        labels, counters = reduce_by(
+            np.concatenate(partial_labels),
+            {counter: np.concatenate(parts) for counter, parts in partial_counters.items()},
+        )
+        frame = _frame(pd.Index(labels, name='vendor_id'), counters).reindex(index, fill_value=0)
+    else:
+        frame = pd.DataFrame(0, index=index, columns=list(METRIC_COUNTERS))
+    for field, values in derive_metrics({counter: frame[counter].to_numpy() for counter in METRIC_COUNTERS}).items():
+        frame[field] = values
+    return frame
+
+# Rolling-window metric trends. Completed purchase orders are placed on their delivery day and
+# summed per vendor and day; every freq period end between a vendor's first and last active day
+# then reports the metrics over the trailing window, read off running totals without a per-vendor loop.
+# window must be a whole number of days.
+# Returns a DataFrame with vendor_id and date columns plus the completed count and the metrics.
+def vendor_metric_trends(vendor_ids=None, window='30D', freq='W', date_from=None, date_to=None, chunk_size=None):
+    chunk_size = chunk_size or settings.ANALYTICS_CHUNK_SIZE
+    purchase_orders = PurchaseOrder.objects.filter(status='completed').order_by()
+    if vendor_ids is not None:
+        purchase_orders = purchase_orders.filter(vendor_id__in=vendor_ids)
+    if date_from is not None:
+        # Earlier purchase orders still count towards the first windows
+        purchase_orders = purchase_orders.filter(delivery_date__gte=date_from - pd.Timedelta(window).to_pytimedelta())
+    if date_to is not None:
+        purchase_orders = purchase_orders.filter(delivery_date__lte=date_to)
+
+    partial_keys = []
+    partial_counters = {counter: [] for counter in METRIC_COUNTERS}
+    for frame in _chunks(purchase_orders, chunk_size):
+        delivery, _ = microseconds(frame['delivery_date'])
+        days = delivery // MICROSECONDS_PER_DAY
+        keys = frame['vendor_id'].to_numpy(dtype=np.int64) * DAY_KEY_RANGE + days
+        labels, counters = reduce_by(keys, _contributions(frame))
+        partial_keys.append(labels)
+        for counter, totals in counters.items():
+            partial_counters[counter].append(totals)
+
+    columns = ['vendor_id', 'date', 'completed_count', *VENDOR_METRIC_FIELDS]
+    if not partial_keys:
+        return pd.DataFrame(columns=columns)
+    labels, counters = reduce_by(
+        np.concatenate(partial_keys), {counter: np.concatenate(parts) for counter, parts in partial_counters.items()}
+    )
+    # Response times in seconds, as in fleet_vendor_metrics
+    counters['response_time_sum'] = counters['response_time_sum'] / 1_000_000
+
+    # Sample every vendor at each period end from its first to its last active day
+    vendor_ids = labels // DAY_KEY_RANGE
+    days = labels % DAY_KEY_RANGE
+    period_ends = pd.date_range(
+        pd.to_datetime(days.min(), unit='D'), pd.to_datetime(days.max(), unit='D') + to_offset(freq), freq=freq
+    )
+    period_ends = (period_ends.asi8 // (MICROSECONDS_PER_DAY * 1000)).astype(np.int64)
+    vendors, first = np.unique(vendor_ids, return_index=True)
+    last = np.r_[first[1:], len(labels)] - 1
+    lo = np.searchsorted(period_ends, days[first])
+    hi = np.searchsorted(period_ends, days[last])
+    samples = hi - lo + 1
+    sample_vendors = np.repeat(vendors, samples)
+    sample_days = period_ends[np.repeat(lo, samples) + np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)]
+
+    # Window sums as differences of running totals: days in (end - window, end]
+    window_days = pd.Timedelta(window).days
+    end_keys = sample_vendors * DAY_KEY_RANGE + sample_days
+    end_positions = np.searchsorted(labels, end_keys, side='right')
+    start_positions = np.searchsorted(labels, end_keys - window_days, side='right')
+    trends = pd.DataFrame({
+        'vendor_id': sample_vendors,
+        'date': pd.to_datetime(sample_days, unit='D', utc=True),
+    })
+    for counter, values in counters.items():
+        running = np.concatenate([[0], np.cumsum(values)])
+        trends[counter] = running[end_positions] - running[start_positions]
+    if date_from is not None:
+        trends = trends[trends['date'] >= pd.Timestamp(date_from)]
+    for field, values in derive_metrics({counter: trends[counter].to_numpy() for counter in METRIC_COUNTERS}).items():
+        trends[field] = values
+    return trends[columns].reset_index(drop=True)
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class VendorManagementAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vendor_management_app'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from .database import configure_sqlite_connection
+        from .instrumentation import install_query_recorder
+        from .tasks import check_metrics_queue_mode
+        check_metrics_queue_mode()
+        connection_created.connect(configure_sqlite_connection)
+        connection_created.connect(install_query_recorder)
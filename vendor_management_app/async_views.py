@@ -0,0 +1,155 @@
+import asyncio
+import json
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from .caching import aget_vendor_data, ainvalidate_vendor
+from .encoders import RowEncoder
+from .models import PurchaseOrder, Vendor
+from .serializers import PurchaseOrderSerializer, VendorSerializer
+from .metrics import VENDOR_METRIC_FIELDS
+from .services import aacknowledge_purchase_order, save_vendor_details, update_vendor_metrics
+from .streams import Subscriber, event_stream, streaming_available
+from .tasks import enqueue_vendor_metric, mark_metrics_staleness
+
+#  Async (ASGI-native) variants of the vendor and purchase order APIs.
+#  Reads use the async ORM directly; writes that go through DRF serializers run in a thread.
+
+def async_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+async def _list_response(queryset, serializer_class):
+    encoder = RowEncoder(serializer_class)
+    rows = [encoder.encode(row) async for row in queryset.values(*encoder.columns)]
+    response = JsonResponse(rows, safe=False)
+    response['X-Total-Count'] = await queryset.acount()
+    return response
+
+# Vendor writes leave the metric columns to the metrics module, as services.create_vendor and
+# services.update_vendor do: a new vendor keeps the default metrics, an update saves the detail
+# fields and recomputes (which also invalidates the cached vendor).
+def _save_vendor(validated_data, vendor=None):
+    if vendor is None:
+        return Vendor.objects.create(**{field: value for field, value in validated_data.items() if field not in VENDOR_METRIC_FIELDS})
+    save_vendor_details(vendor, validated_data)
+    update_vendor_metrics(vendor)
+    return vendor
+
+def _save_serializer(serializer_class, data, instance=None):
+    serializer = serializer_class(instance=instance, data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    if serializer_class is VendorSerializer:
+        return JsonResponse(serializer_class(_save_vendor(serializer.validated_data, instance)).data)
+    saved = serializer.save()
+    enqueue_vendor_metric(saved.vendor_id)
+    return mark_metrics_staleness(JsonResponse(serializer_class(saved).data), saved.vendor_id)
+
+async def _save(serializer_class, data, instance=None):
+    if data is None:
+        return JsonResponse({'message': 'Invalid JSON body.'}, status=400)
+    return await sync_to_async(_save_serializer)(serializer_class, data, instance)
+
+@async_login_required
+async def get_vendors(request):
+    if request.method == 'GET':
+        return await _list_response(Vendor.objects.order_by('id'), VendorSerializer)
+
+    if request.method == 'POST':
+        return await _save(VendorSerializer, _json_body(request))
+    return HttpResponseNotAllowed(['GET', 'POST'])
+
+@async_login_required
+async def get_vendor(request, pk):
+    try:
+        if request.method == 'GET':
+            response = JsonResponse(await aget_vendor_data(pk))
+            return await sync_to_async(mark_metrics_staleness)(response, pk)
+
+        if request.method == 'PUT':
+            vendor = await Vendor.objects.aget(id=pk)
+            return await _save(VendorSerializer, _json_body(request), vendor)
+
+        if request.method == 'DELETE':
+            vendor = await Vendor.objects.aget(id=pk)
+            await vendor.adelete()
+            await ainvalidate_vendor(vendor.id)
+            return JsonResponse('Vendor is deleted !', safe=False)
+    except (Vendor.DoesNotExist, ValueError):
+        return JsonResponse({'message': 'Vendor not found.'}, status=404)
+    return HttpResponseNotAllowed(['GET', 'PUT', 'DELETE'])
+
+@async_login_required
+async def get_purchase_orders(request):
+    if request.method == 'GET':
+        purchase_orders = PurchaseOrder.objects.order_by('id')
+        vendor_id = request.GET.get('vendor_id')
+        if vendor_id is not None:
+            purchase_orders = purchase_orders.filter(vendor_id=vendor_id)
+        return await _list_response(purchase_orders, PurchaseOrderSerializer)
+
+    if request.method == 'POST':
+        return await _save(PurchaseOrderSerializer, _json_body(request))
+    return HttpResponseNotAllowed(['GET', 'POST'])
+
+@async_login_required
+async def get_purchase_order(request, pk):
+    try:
+        if request.method == 'GET':
+            purchase_order = await PurchaseOrder.objects.aget(id=pk)
+            return JsonResponse(PurchaseOrderSerializer(purchase_order).data)
+
+        if request.method == 'PUT':
+            purchase_order = await PurchaseOrder.objects.aget(id=pk)
+            return await _save(PurchaseOrderSerializer, _json_body(request), purchase_order)
+
+        if request.method == 'DELETE':
+            purchase_order = await PurchaseOrder.objects.aget(id=pk)
+            await purchase_order.adelete()
+            return JsonResponse('Purchase Order is deleted !', safe=False)
+    except (PurchaseOrder.DoesNotExist, ValueError):
+        return JsonResponse({'message': 'Purchase order not found.'}, status=404)
+    return HttpResponseNotAllowed(['GET', 'PUT', 'DELETE'])
+
+@async_login_required
+async def acknowledge_purchase_order(request, pk):
+    if request.method == 'POST':
+        try:
+            return await aacknowledge_purchase_order(pk)
+        except ValueError:
+            return JsonResponse({'message': 'Purchase order not found.'}, status=404)
+    return HttpResponseNotAllowed(['POST'])
+
+# Server-Sent Events of vendor metric changes and purchase order status changes.
+# ?vendors=1,2,3 limits the stream to those vendor ids. Only served over ASGI.
+@async_login_required
+async def stream_vendors(request):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not streaming_available(request):
+        return JsonResponse({'message': 'The vendor stream requires the ASGI server.'}, status=501)
+    vendor_ids = None
+    if request.GET.get('vendors'):
+        try:
+            vendor_ids = {int(vendor_id) for vendor_id in request.GET['vendors'].split(',') if vendor_id.strip()}
+        except ValueError:
+            return JsonResponse({'message': 'vendors must be a comma separated list of ids.'}, status=400)
+    subscriber = Subscriber(asyncio.get_running_loop(), vendor_ids)
+    response = StreamingHttpResponse(event_stream(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
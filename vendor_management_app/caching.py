@@ -0,0 +1,135 @@
+import asyncio
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpRequest
+from vendor_management_app.models import Vendor
+from vendor_management_app.serializers import VendorSerializer
+
+HITS_KEY = 'vendor-cache:hits'
+MISSES_KEY = 'vendor-cache:misses'
+
+def _cache():
+    return caches[settings.VENDOR_CACHE_ALIAS]
+
+def vendor_cache_key(pk):
+    return f'vendor:{int(pk)}'
+
+def _count(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First hit or miss since the counters were created or evicted
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+def _load_vendor_data(pk):
+    return VendorSerializer(Vendor.objects.get(id=pk)).data
+
+# Read-through cache for the serialized vendor. On a miss only one caller reloads the row
+# while concurrent callers wait for it to appear instead of all hitting the database.
+def get_vendor_data(pk):
+    cache = _cache()
+    key = vendor_cache_key(pk)
+    data = cache.get(key)
+    if data is not None:
+        _count(HITS_KEY)
+        return data
+    _count(MISSES_KEY)
+
+    lock_key = f'{key}:lock'
+    lock_timeout = settings.VENDOR_CACHE_LOCK_TIMEOUT
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            data = _load_vendor_data(pk)
+            cache.set(key, data, timeout=settings.VENDOR_CACHE_TTL)
+            return data
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if cache.get(lock_key) is None:
+            break
+    return _load_vendor_data(pk)
+
+# get_vendor_data memoized on the request, so the conditional GET validators and the view share
+# one cache read and a request counts once towards the hit ratio. DRF requests share the memo
+# of the HttpRequest they wrap.
+def get_request_vendor_data(request, pk):
+    request = getattr(request, '_request', request)
+    if not isinstance(request, HttpRequest):
+        return get_vendor_data(pk)
+    memo = request.__dict__.setdefault('_vendor_data', {})
+    if str(pk) not in memo:
+        memo[str(pk)] = get_vendor_data(pk)
+    return memo[str(pk)]
+
+async def _acount(key):
+    cache = _cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+async def _aload_vendor_data(pk):
+    return VendorSerializer(await Vendor.objects.aget(id=pk)).data
+
+# Async twin of get_vendor_data for the ASGI views
+async def aget_vendor_data(pk):
+    cache = _cache()
+    key = vendor_cache_key(pk)
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount(HITS_KEY)
+        return data
+    await _acount(MISSES_KEY)
+
+    lock_key = f'{key}:lock'
+    lock_timeout = settings.VENDOR_CACHE_LOCK_TIMEOUT
+    if await cache.aadd(lock_key, 1, timeout=lock_timeout):
+        try:
+            data = await _aload_vendor_data(pk)
+            await cache.aset(key, data, timeout=settings.VENDOR_CACHE_TTL)
+            return data
+        finally:
+            await cache.adelete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+        data = await cache.aget(key)
+        if data is not None:
+            return data
+        if await cache.aget(lock_key) is None:
+            break
+    return await _aload_vendor_data(pk)
+
+# Async views run in autocommit mode, so there is no commit to wait for
+async def ainvalidate_vendor(pk):
+    await _cache().adelete_many([vendor_cache_key(pk)])
+
+# Drop cached vendors now and again once the change is committed, so a reader that
+# cached the old row while the transaction was still open cannot leave it behind
+def invalidate_vendors(pks):
+    keys = [vendor_cache_key(pk) for pk in pks]
+    if keys:
+        _cache().delete_many(keys)
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+def invalidate_vendor(pk):
+    invalidate_vendors([pk])
+
+def vendor_cache_stats():
+    counters = _cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
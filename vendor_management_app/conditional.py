@@ -0,0 +1,84 @@
+import hashlib
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+from vendor_management_app.caching import get_request_vendor_data
+from vendor_management_app.exports import EXPORT_FORMATS
+from vendor_management_app.models import PurchaseOrder, Vendor
+
+# ETag / Last-Modified callbacks for django.views.decorators.http.condition.
+# They only answer GET/HEAD so writes do not pay for the extra lookup.
+
+def _is_read(request):
+    return request.method in ('GET', 'HEAD')
+
+# The Accept header and ?fields= are part of the tag because they pick the representation
+def _etag(request, *parts):
+    parts = (*parts, request.META.get('HTTP_ACCEPT', ''), request.GET.get('fields', ''))
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+def _cached_vendor_updated_at(request, pk):
+    try:
+        return get_request_vendor_data(request, pk)['updated_at']
+    except (Vendor.DoesNotExist, ValueError):
+        return None
+
+def vendor_etag(request, pk):
+    if not _is_read(request):
+        return None
+    updated_at = _cached_vendor_updated_at(request, pk)
+    return _etag(request, 'vendor', int(pk), updated_at) if updated_at else None
+
+def vendor_last_modified(request, pk):
+    if not _is_read(request):
+        return None
+    updated_at = _cached_vendor_updated_at(request, pk)
+    return parse_datetime(updated_at) if updated_at else None
+
+def _purchase_order_updated_at(pk):
+    try:
+        return PurchaseOrder.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    except ValueError:
+        return None
+
+def purchase_order_etag(request, pk):
+    if not _is_read(request):
+        return None
+    updated_at = _purchase_order_updated_at(pk)
+    return _etag(request, 'purchase_order', pk, updated_at.isoformat()) if updated_at else None
+
+def purchase_order_last_modified(request, pk):
+    return _purchase_order_updated_at(pk) if _is_read(request) else None
+
+# The list ETag aggregates over every filtered row, so it is only worth it for full lists, which
+# scan them anyway. Pages and streamed exports read a fraction of the rows (or start sending before
+# the scan would finish) and get no ETag.
+def _is_full_list(request):
+    if request.GET.get('format') in EXPORT_FORMATS:
+        return False
+    return not (request.GET.get('cursor') or request.GET.get('page_size') or settings.API_DEFAULT_PAGE_SIZE)
+
+# Lists change when a row is added, updated or deleted: row count plus latest update time
+# of the filtered rows covers all three. The query string is included because it selects
+# the representation.
+def _list_etag(request, name, queryset):
+    state = queryset.aggregate(count=Count('id'), last=Max('updated_at'))
+    last = state['last'].isoformat() if state['last'] else ''
+    return _etag(request, name, state['count'], last, request.GET.urlencode())
+
+def vendor_list_etag(request):
+    if not _is_read(request) or not _is_full_list(request):
+        return None
+    return _list_etag(request, 'vendors', Vendor.objects.all())
+
+def purchase_order_list_etag(request):
+    if not _is_read(request) or not _is_full_list(request):
+        return None
+    purchase_orders = PurchaseOrder.objects.all()
+    vendor_id = request.GET.get('vendor_id')
+    if vendor_id is not None:
+        purchase_orders = purchase_orders.filter(vendor_id=vendor_id)
+    try:
+        return _list_etag(request, 'purchase_orders', purchase_orders)
+    except ValueError:
+        return None
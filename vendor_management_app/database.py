@@ -0,0 +1,10 @@
+from django.conf import settings
+
+# Applies SQLITE_PRAGMAS to every new SQLite connection (connection_created receiver).
+# journal_mode=WAL is stored in the database file; the other pragmas only last for the connection.
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
@@ -0,0 +1,53 @@
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+def _identity(value):
+    return value
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    # Same output as DateTimeField.to_representation for aware datetimes, without the per-call checks
+    def convert(value):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+def _field_converter(field):
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.FloatField):
+        return lambda value: None if value is None else float(value)
+    if isinstance(field, serializers.IntegerField):
+        return lambda value: None if value is None else int(value)
+    if isinstance(field, serializers.JSONField) and field.binary:
+        return lambda value: None if value is None else field.to_representation(value)
+    # Char fields, JSON and primary keys come out of .values() already in their final form
+    return _identity
+
+# Turns .values() rows into the same dicts a ModelSerializer would produce,
+# using converters picked once per field instead of DRF's per-field machinery.
+# fields limits the output to those serializer fields.
+class RowEncoder:
+    def __init__(self, serializer_class, fields=None):
+        selected = serializer_class().fields
+        if fields is not None:
+            selected = {name: field for name, field in selected.items() if name in fields}
+        self.field_names = tuple(selected)
+        self.columns = tuple(field.source for field in selected.values())
+        self.converters = tuple(_field_converter(field) for field in selected.values())
+
+    def encode(self, row):
+        return {
+            name: convert(row[column])
+            for name, column, convert in zip(self.field_names, self.columns, self.converters)
+        }
@@ -0,0 +1,59 @@
+from itertools import islice
+from vendor_management_app.metrics import CONTRIBUTION_FIELDS
+from vendor_management_app.models import PurchaseOrderEvent
+
+#  Purchase order event log. The PurchaseOrder signals append an event for every create, delete and
+#  change of a metric field or of the vendor; bulk inserts append theirs with append_created_events().
+#  Vendor metrics and HistoricalPerformance can be rebuilt from the log, see projections.py.
+
+# Metric fields carried by events, with their bit in PurchaseOrderEvent.changed_fields
+EVENT_FIELDS = ('status', 'issue_date', 'delivery_date', 'acknowledgment_date', 'quality_rating')
+FIELD_FLAGS = {field: 1 << index for index, field in enumerate(EVENT_FIELDS)}
+
+CANCELLED_STATUSES = ('canceled', 'cancelled')
+
+def _event_type(before, after, changed):
+    if before is None:
+        return PurchaseOrderEvent.CREATED
+    if 'status' in changed and after['status'] == 'completed':
+        return PurchaseOrderEvent.DELIVERED
+    if 'status' in changed and after['status'] in CANCELLED_STATUSES:
+        return PurchaseOrderEvent.CANCELLED
+    if 'acknowledgment_date' in changed and after['acknowledgment_date'] is not None:
+        return PurchaseOrderEvent.ACKNOWLEDGED
+    if 'quality_rating' in changed:
+        return PurchaseOrderEvent.RATED
+    return PurchaseOrderEvent.UPDATED
+
+# Event for a purchase order going from state before to after (purchase_order_state() dicts, None when
+# it does not exist). None when neither a metric field nor the vendor changed.
+def purchase_order_event(pk, before, after):
+    if after is None:
+        return PurchaseOrderEvent(purchase_order_id=pk, vendor_id=before['vendor_id'], event_type=PurchaseOrderEvent.DELETED)
+    changed = [field for field in EVENT_FIELDS if before is None or before[field] != after[field]]
+    if not changed and before['vendor_id'] == after['vendor_id']:
+        return None
+    return PurchaseOrderEvent(
+        purchase_order_id=pk,
+        vendor_id=after['vendor_id'],
+        event_type=_event_type(before, after, changed),
+        changed_fields=sum(FIELD_FLAGS[field] for field in changed),
+        **{field: after[field] for field in changed},
+    )
+
+def record_purchase_order_event(pk, before, after):
+    event = purchase_order_event(pk, before, after)
+    if event is not None:
+        event.save()
+
+def _created_event(row):
+    event = purchase_order_event(row.pop('id'), None, row)
+    event.occurred_at = row['issue_date']
+    return event
+
+# Created events, dated at the issue date, for purchase orders inserted with bulk_create
+# (which does not send the signals) or that predate the log
+def append_created_events(purchase_orders, batch_size=2000):
+    rows = purchase_orders.order_by('id').values('id', *CONTRIBUTION_FIELDS).iterator(chunk_size=batch_size)
+    while batch := list(islice(rows, batch_size)):
+        PurchaseOrderEvent.objects.bulk_create([_created_event(row) for row in batch])
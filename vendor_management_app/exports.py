@@ -0,0 +1,48 @@
+import csv
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from vendor_management_app.encoders import RowEncoder
+from vendor_management_app.renderers import csv_values, encode_ndjson_row
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Pseudo file for csv.writer: writerow() returns the encoded line instead of storing it
+class _Echo:
+    def write(self, value):
+        return value
+
+def _batched(lines, size):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+def _ndjson_lines(encoder, rows):
+    for row in rows:
+        yield encode_ndjson_row(encoder.encode(row))
+
+def _csv_lines(encoder, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(encoder.field_names)
+    for row in rows:
+        yield writer.writerow(csv_values(encoder.encode(row).values()))
+
+# Stream a queryset as NDJSON or CSV, reading it chunk by chunk so memory stays flat.
+# fields limits the columns read and written to those serializer fields.
+def stream_export(queryset, serializer_class, export_format, filename, fields=None):
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    encoder = RowEncoder(serializer_class, fields)
+    rows = queryset.values(*encoder.columns).iterator(chunk_size=chunk_size)
+    lines = _csv_lines(encoder, rows) if export_format == 'csv' else _ndjson_lines(encoder, rows)
+    response = StreamingHttpResponse(_batched(lines, chunk_size), content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
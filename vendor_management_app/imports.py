@@ -0,0 +1,103 @@
+import csv
+import io
+import os
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from vendor_management_app.caching import invalidate_vendors
+from vendor_management_app.metrics import VENDOR_METRIC_FIELDS
+from vendor_management_app.models import Vendor
+from vendor_management_app.scorecards import refresh_vendor_scorecards
+from vendor_management_app.serializers import VendorImportSerializer
+
+#  Vendor import from CSV or XLSX files. Rows are parsed one at a time, validated and upserted
+#  on vendor_code in chunks of VENDOR_IMPORT_CHUNK_SIZE, so memory does not grow with the file.
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+
+VENDOR_IMPORT_UPDATE_FIELDS = ('name', 'contact_details', 'address', 'updated_at')
+
+# Import format of a file name, or None for an unsupported extension
+def import_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return extension if extension in IMPORT_FORMATS else None
+
+# CSV with a header row; a UTF-8 byte order mark as written by Excel is skipped
+def _csv_rows(file):
+    yield from csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+
+# First sheet of a workbook with a header row, as in api_doc.xlsx. Read-only mode parses the
+# sheet XML as it is iterated instead of loading the whole workbook.
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('XLSX import requires openpyxl.')
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield {name: value for name, value in zip(header, values) if name}
+    finally:
+        workbook.close()
+
+def _cell(value):
+    # Spreadsheet cells may hold numbers, e.g. numeric vendor codes
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return '' if value is None else str(value).strip()
+
+# Rows of an uploaded or opened binary file as dicts keyed by the header names
+def import_rows(file, import_format):
+    rows = _xlsx_rows(file) if import_format == 'xlsx' else _csv_rows(file)
+    for row in rows:
+        yield {name.strip(): _cell(value) for name, value in row.items() if name is not None}
+
+# Upsert one chunk of validated rows. A vendor code repeated within the chunk keeps its last row.
+# Returns the number of vendors created and updated.
+def _upsert_vendors(rows_by_code):
+    existing = dict(Vendor.objects.filter(vendor_code__in=list(rows_by_code)).values_list('vendor_code', 'id'))
+    Vendor.objects.bulk_create(
+        [Vendor(**row) for row in rows_by_code.values()],
+        update_conflicts=True, unique_fields=['vendor_code'], update_fields=list(VENDOR_IMPORT_UPDATE_FIELDS),
+    )
+    # New vendors have no purchase orders yet: their scorecard holds the default metrics
+    created_codes = [code for code in rows_by_code if code not in existing]
+    if created_codes:
+        defaults = {field: Vendor._meta.get_field(field).default for field in VENDOR_METRIC_FIELDS}
+        created_ids = Vendor.objects.filter(vendor_code__in=created_codes).values_list('id', flat=True)
+        refresh_vendor_scorecards({vendor_id: defaults for vendor_id in created_ids})
+    invalidate_vendors(existing.values())
+    return len(created_codes), len(existing)
+
+# Validate and upsert vendor rows in chunks, in one transaction. Every row is validated by the same
+# serializer instance, so its fields are built once rather than per row.
+# Row numbers in the errors count the header as row 1; at most VENDOR_IMPORT_MAX_ERRORS are kept.
+def import_vendors(rows, chunk_size=None):
+    chunk_size = chunk_size or settings.VENDOR_IMPORT_CHUNK_SIZE
+    validator = VendorImportSerializer()
+    result = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    numbered_rows = enumerate(rows, start=2)
+    with transaction.atomic():
+        while chunk := list(islice(numbered_rows, chunk_size)):
+            rows_by_code = {}
+            for row_number, row in chunk:
+                try:
+                    data = validator.run_validation(row)
+                except ValidationError as exc:
+                    result['failed'] += 1
+                    if len(result['errors']) < settings.VENDOR_IMPORT_MAX_ERRORS:
+                        errors = as_serializer_error(exc)
+                        result['errors'].append({'row': row_number, 'errors': {field: [str(message) for message in messages] for field, messages in errors.items()}})
+                    continue
+                rows_by_code[data['vendor_code']] = data
+            if rows_by_code:
+                created, updated = _upsert_vendors(rows_by_code)
+                result['created'] += created
+                result['updated'] += updated
+    return result
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+
+slow_query_logger = logging.getLogger('vendor_management_app.slow_queries')
+
+#  Per-endpoint request instrumentation kept in memory, per process.
+#  Every value is recorded into a log-linear histogram keyed by (metric, URL name) and exported
+#  in the Prometheus text format by the /metrics view.
+
+# Log-linear histogram in the style of HdrHistogram. Values are scaled to integer units; every
+# power of two range is split into 2**(precision_bits - 1) equal buckets, so a bucket is never
+# wider than 2**(1 - precision_bits) of its values (about 3% with the default 6 bits) and the
+# number of buckets only grows with the logarithm of the largest value.
+class Histogram:
+    def __init__(self, unit=1e-6, precision_bits=6):
+        self.unit = unit
+        self.precision_bits = precision_bits
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, value):
+        units = int(value / self.unit)
+        shift = max(units.bit_length() - self.precision_bits, 0)
+        return units >> shift << shift, 1 << shift
+
+    def record(self, value):
+        bucket = self._bucket(value)
+        with self._lock:
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    # Highest value of the bucket holding the q-th quantile, capped at the largest recorded value
+    def quantile(self, q):
+        with self._lock:
+            buckets = sorted(self._buckets.items())
+            count, largest = self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for (lower, width), bucket_count in buckets:
+            seen += bucket_count
+            if seen >= rank:
+                return min((lower + width - 1) * self.unit, largest)
+        return largest
+
+# Histograms of one process, keyed by metric name and endpoint
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, metric, endpoint, unit=1e-6):
+        key = (metric, endpoint)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(unit=unit))
+        return histogram
+
+    def increment(self, metric, endpoint, amount=1):
+        with self._lock:
+            self._counters[(metric, endpoint)] = self._counters.get((metric, endpoint), 0) + amount
+
+    def histograms(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def counters(self):
+        with self._lock:
+            return sorted(self._counters.items())
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+registry = MetricsRegistry()
+
+# Queries and database time of the request being handled. A ContextVar follows the request into
+# the threads sync_to_async runs the ORM in, so async views are measured too.
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.endpoint = None
+
+_current_request = ContextVar('vendor_management_request_stats', default=None)
+
+def begin_request():
+    stats = RequestStats()
+    return stats, _current_request.set(stats)
+
+def end_request(token):
+    _current_request.reset(token)
+
+# Database execute wrapper installed on every connection
+def record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            endpoint = stats.endpoint if stats is not None else None
+            registry.increment('slow_queries_total', endpoint or '<none>')
+            slow_query_logger.warning("Slow query (%.1f ms) on %s: %s", elapsed * 1000, endpoint or 'no request', sql)
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+def record_request(stats, duration):
+    endpoint = stats.endpoint or '<unmatched>'
+    registry.histogram('request_duration_seconds', endpoint).record(duration)
+    registry.histogram('request_db_duration_seconds', endpoint).record(stats.db_time)
+    registry.histogram('request_serialization_duration_seconds', endpoint).record(stats.serialization_time)
+    registry.histogram('request_db_queries', endpoint, unit=1).record(stats.queries)
+
+METRIC_HELP = {
+    'request_duration_seconds': ('summary', "Total request latency"),
+    'request_db_duration_seconds': ('summary', "Time spent in database queries per request"),
+    'request_serialization_duration_seconds': ('summary', "Time spent rendering the response body per request"),
+    'request_db_queries': ('summary', "SQL queries run per request"),
+    'slow_queries_total': ('counter', "Queries slower than SLOW_QUERY_THRESHOLD_MS"),
+}
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Prometheus text exposition format (version 0.0.4).
+# extra_metrics are unlabelled (name, type, help, value) series appended as they are.
+def render_prometheus(extra_metrics=()):
+    prefix = settings.METRICS_PREFIX
+    lines = []
+    histograms = {}
+    for (metric, endpoint), histogram in registry.histograms():
+        histograms.setdefault(metric, []).append((endpoint, histogram))
+    counters = {}
+    for (metric, endpoint), value in registry.counters():
+        counters.setdefault(metric, []).append((endpoint, value))
+
+    for metric, series in histograms.items():
+        kind, description = METRIC_HELP[metric]
+        lines.append(f'# HELP {prefix}{metric} {description}')
+        lines.append(f'# TYPE {prefix}{metric} {kind}')
+        for endpoint, histogram in series:
+            label = f'endpoint="{_label(endpoint)}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}{metric}{{{label},quantile="{q}"}} {histogram.quantile(q):.9g}')
+            lines.append(f'{prefix}{metric}_sum{{{label}}} {histogram.sum:.9g}')
+            lines.append(f'{prefix}{metric}_count{{{label}}} {histogram.count}')
+    for metric, series in counters.items():
+        kind, description = METRIC_HELP[metric]
+        lines.append(f'# HELP {prefix}{metric} {description}')
+        lines.append(f'# TYPE {prefix}{metric} {kind}')
+        for endpoint, value in series:
+            lines.append(f'{prefix}{metric}{{endpoint="{_label(endpoint)}"}} {value}')
+    for metric, kind, description, value in extra_metrics:
+        lines.append(f'# HELP {prefix}{metric} {description}')
+        lines.append(f'# TYPE {prefix}{metric} {kind}')
+        lines.append(f'{prefix}{metric} {value:.9g}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,50 @@
+import math
+import time
+from django.core.management.base import BaseCommand
+from vendor_management_app.analytics import fleet_vendor_metrics
+from vendor_management_app.metrics import VENDOR_METRIC_FIELDS, compute_vendor_aggregate, derive_vendor_metrics
+from vendor_management_app.models import Vendor
+
+class _Counters:
+    def __init__(self, counters):
+        self.__dict__.update(counters)
+
+class Command(BaseCommand):
+    help = ("Time the vectorized fleet analytics against the per-vendor loop used by update_vendor_metrics(recompute=True) "
+            "and check that both produce the same metrics. Read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, help="Only use the first N vendors")
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        vendor_ids = list(Vendor.objects.order_by('id').values_list('id', flat=True)[:options['vendors']])
+
+        started = time.perf_counter()
+        looped = {vendor_id: derive_vendor_metrics(_Counters(compute_vendor_aggregate(vendor_id))) for vendor_id in vendor_ids}
+        loop_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        vectorized = fleet_vendor_metrics(vendor_ids if options['vendors'] else None, chunk_size=options['chunk_size'])
+        vectorized_elapsed = time.perf_counter() - started
+
+        exact = 0
+        mismatched = []
+        max_difference = 0.0
+        for vendor_id, expected in looped.items():
+            row = vectorized.loc[vendor_id]
+            differences = [abs(float(row[field]) - expected[field]) for field in VENDOR_METRIC_FIELDS]
+            max_difference = max(max_difference, *differences)
+            if not any(differences):
+                exact += 1
+            elif not all(math.isclose(row[field], expected[field], rel_tol=1e-9, abs_tol=1e-9) for field in VENDOR_METRIC_FIELDS):
+                mismatched.append(vendor_id)
+
+        speedup = loop_elapsed / vectorized_elapsed if vectorized_elapsed else float('inf')
+        self.stdout.write(f"Vendors:          {len(vendor_ids)}")
+        self.stdout.write(f"Per-vendor loop:  {loop_elapsed:.3f}s")
+        self.stdout.write(f"Vectorized:       {vectorized_elapsed:.3f}s ({speedup:.1f}x)")
+        self.stdout.write(f"Identical:        {exact}/{len(looped)}, largest difference {max_difference:.3g}")
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f"Mismatched vendors: {', '.join(map(str, mismatched[:20]))}"))
+            raise SystemExit(1)
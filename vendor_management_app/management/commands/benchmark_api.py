@@ -0,0 +1,152 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from vendor_management_app.models import PurchaseOrder, Vendor
+from vendor_management_app.services import update_vendor_metrics
+
+class Command(BaseCommand):
+    help = ("Benchmark the API endpoints and update_vendor_metrics against the data in the configured database "
+            "(see seed_load): p50/p99 latency, queries per request and peak Python memory of each case. "
+            "Results can be saved as JSON with --output and compared to an earlier run with --compare.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per case")
+        parser.add_argument('--analytics-requests', type=int, default=3, help="Timed requests for the fleet analytics case")
+        parser.add_argument('--output', help="JSON file to write the results to")
+        parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+
+    def handle(self, *args, **options):
+        busiest = Vendor.objects.annotate(purchase_orders=Count('purchaseorder')).order_by('-purchase_orders').first()
+        if busiest is None:
+            raise CommandError("No vendors to benchmark against; run seed_load first")
+        vendors = list(Vendor.objects.order_by('id').values_list('id', flat=True)[:200])
+        purchase_orders = list(PurchaseOrder.objects.filter(vendor_id__in=vendors).order_by('id').values_list('id', flat=True)[:200])
+
+        # The test client sends Host: testserver, as under the test runner
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            user = User.objects.create_user(username=f'benchmark-{time.time_ns()}', password=None, is_staff=True)
+            try:
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                cases = self.cases(client, busiest, vendors, purchase_orders, options)
+                results = {name: self.measure(call, requests) for name, call, requests in cases}
+            finally:
+                user.delete()
+
+        report = {
+            'commit': self.commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'data': {'vendors': Vendor.objects.count(), 'purchase_orders': PurchaseOrder.objects.count(),
+                     'busiest_vendor_purchase_orders': busiest.purchase_orders},
+            'results': results,
+        }
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+        self.print_report(report, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    # (name, call, timed requests); call(i) performs the i-th request and returns its status code
+    def cases(self, client, busiest, vendors, purchase_orders, options):
+        def get(url):
+            def call(i):
+                response = client.get(url(i))
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                return response.status_code
+            return call
+
+        def recompute(i):
+            update_vendor_metrics(busiest, recompute=True)
+            return 200
+
+        pick = lambda ids: (lambda i: ids[i % len(ids)])
+        vendor, purchase_order = pick(vendors), pick(purchase_orders)
+        requests = options['requests']
+        return [
+            ('vendor_list_page', get(lambda i: '/api/vendors/?page_size=100'), requests),
+            ('vendor_detail', get(lambda i: f'/api/vendors/{vendor(i)}/'), requests),
+            ('purchase_order_list_page', get(lambda i: '/api/purchase_orders/?page_size=100'), requests),
+            ('purchase_order_list_busiest_vendor', get(lambda i: f'/api/purchase_orders/?vendor_id={busiest.id}&page_size=100'), requests),
+            ('purchase_order_list_vendor', get(lambda i: f'/api/purchase_orders/?vendor_id={vendor(i)}'), requests),
+            ('purchase_order_list_vendor_fields', get(lambda i: f'/api/purchase_orders/?vendor_id={vendor(i)}&fields=id,po_number,status,delivery_date'), requests),
+            ('purchase_order_export_busiest_vendor', get(lambda i: f'/api/purchase_orders/?vendor_id={busiest.id}&format=ndjson'), max(1, requests // 10)),
+            ('purchase_order_detail', get(lambda i: f'/api/purchase_orders/{purchase_order(i)}/'), requests),
+            ('vendor_performance', get(lambda i: f'/api/vendors/{vendor(i)}/performance/?bucket=month'), requests),
+            ('vendor_trends_busiest_vendor', get(lambda i: f'/api/vendors/{busiest.id}/trends/'), max(1, requests // 10)),
+            ('vendor_leaderboard', get(lambda i: '/api/vendors/leaderboard/?limit=50'), requests),
+            ('vendor_rank', get(lambda i: f'/api/vendors/{vendor(i)}/rank/'), requests),
+            ('fleet_analytics', get(lambda i: '/api/analytics/vendors/'), options['analytics_requests']),
+            ('update_vendor_metrics_busiest_vendor', recompute, requests),
+        ]
+
+    def measure(self, call, requests):
+        call(0)
+        timings, queries, errors = [], [], 0
+        for i in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                status = call(i)
+                timings.append(time.perf_counter() - started)
+            queries.append(len(captured))
+            errors += status >= 400
+
+        # Separate traced run, tracemalloc slows everything down
+        tracemalloc.start()
+        try:
+            call(0)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'requests': requests,
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 3),
+            'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+            'queries': round(statistics.fmean(queries), 2),
+            'peak_memory_kib': round(peak / 1024, 1),
+            'errors': errors,
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, report, baseline):
+        data = report['data']
+        self.stdout.write(
+            f"{data['vendors']} vendors, {data['purchase_orders']} purchase orders "
+            f"(busiest vendor {data['busiest_vendor_purchase_orders']}), {report['database']}, commit {report['commit']}"
+        )
+        self.stdout.write(f"{'case':<38} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>10} {'errors':>6}")
+        for name, result in report['results'].items():
+            line = (f"{name:<38} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['queries']:>8.1f} "
+                    f"{result['peak_memory_kib']:>10.1f} {result['errors']:>6}")
+            previous = (baseline or {}).get(name)
+            if previous:
+                line += f"   p50 {self.change(previous['p50_ms'], result['p50_ms'])}, p99 {self.change(previous['p99_ms'], result['p99_ms'])}"
+            self.stdout.write(line)
+
+    def change(self, before, after):
+        return f"{(after - before) / before:+.0%}" if before else 'n/a'
@@ -0,0 +1,93 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+from vendor_management_app.models import PurchaseOrder, Vendor
+
+class Command(BaseCommand):
+    help = ("Load-test the WSGI (DRF) and ASGI (async ORM) variants of the vendor, purchase order and "
+            "acknowledge endpoints in-process with the same concurrency, and compare latency and throughput. "
+            "Writes temporary rows to the configured database and removes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and path")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--purchase-orders', type=int, default=500, help="Purchase orders owned by the test vendor")
+
+    def handle(self, *args, **options):
+        # The test clients send Host: testserver, as under the test runner
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        total = options['requests']
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}', password=None)
+        vendor = Vendor.objects.create(name='Benchmark Vendor', contact_details='', address='', vendor_code=f'BENCH-{time.time_ns()}')
+        try:
+            now = timezone.now()
+            PurchaseOrder.objects.bulk_create(
+                PurchaseOrder(
+                    po_number=f'BENCH-{i}', vendor=vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+                    status='completed', quality_rating=4,
+                )
+                for i in range(options['purchase_orders'] + 2 * total)
+            )
+            po_ids = list(PurchaseOrder.objects.filter(vendor=vendor).order_by('id').values_list('id', flat=True))
+            sync_ack_ids, async_ack_ids = po_ids[:total], po_ids[total:2 * total]
+
+            endpoints = [
+                ('vendor detail', 'get', lambda i: f'/api/vendors/{vendor.id}/', lambda i: f'/api/async/vendors/{vendor.id}/'),
+                ('purchase order list', 'get', lambda i: f'/api/purchase_orders/?vendor_id={vendor.id}', lambda i: f'/api/async/purchase_orders/?vendor_id={vendor.id}'),
+                ('acknowledge', 'post', lambda i: f'/api/purchase_orders/{sync_ack_ids[i]}/acknowledge/', lambda i: f'/api/async/purchase_orders/{async_ack_ids[i]}/acknowledge/'),
+            ]
+            for name, method, sync_url, async_url in endpoints:
+                sync_timings, sync_elapsed = self.run_sync(user, method, sync_url, total, options['concurrency'])
+                async_timings, async_elapsed = asyncio.run(self.run_async(user, method, async_url, total, options['concurrency']))
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+                self.report('WSGI', sync_timings, sync_elapsed)
+                self.report('ASGI', async_timings, async_elapsed)
+        finally:
+            vendor.delete()
+            user.delete()
+
+    def run_sync(self, user, method, url, total, concurrency):
+        clients = [Client(raise_request_exception=False) for _ in range(concurrency)]
+        for client in clients:
+            client.force_login(user)
+
+        def call(i):
+            started = time.perf_counter()
+            response = getattr(clients[i % concurrency], method)(url(i))
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(call, range(total)))
+        return timings, time.perf_counter() - started
+
+    async def run_async(self, user, method, url, total, concurrency):
+        client = AsyncClient(raise_request_exception=False)
+        await asyncio.to_thread(client.force_login, user)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await getattr(client, method)(url(i))
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(call(i) for i in range(total)))
+        return timings, time.perf_counter() - started
+
+    def report(self, label, results, elapsed):
+        timings = sorted(timing for timing, status in results)
+        errors = sum(1 for timing, status in results if status >= 400)
+        p50 = statistics.median(timings) * 1000
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+        self.stdout.write(f"  {label}: {len(timings) / elapsed:8.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   errors {errors}")
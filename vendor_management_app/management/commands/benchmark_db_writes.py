@@ -0,0 +1,127 @@
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+from django.utils import timezone
+from vendor_management_app.models import PurchaseOrder, Vendor
+from vendor_management_app.tasks import enqueue_vendor_metric, get_metric_queue
+
+class Command(BaseCommand):
+    help = ("Measure concurrent purchase order write throughput on the configured database profile, the way "
+            "create_purchase_order writes (insert, aggregate update, metric recompute), optionally alongside "
+            "readers listing purchase orders. The recompute runs inline unless --queue-mode picks 'thread' or "
+            "'db', which time the enqueue only. Writes temporary rows and removes them afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=0)
+        parser.add_argument('--writes', type=int, default=200, help="Purchase orders created per writer")
+        parser.add_argument('--vendors', type=int, default=4, help="Vendors the writes are spread over")
+        parser.add_argument('--queue-mode', choices=('sync', 'thread', 'db'), default='sync',
+                            help="METRICS_QUEUE_MODE during the run (default: sync, so the recompute is timed)")
+
+    def handle(self, *args, **options):
+        self.describe_profile()
+        stamp = time.time_ns()
+        vendors = [
+            Vendor.objects.create(name='Benchmark Vendor', contact_details='', address='', vendor_code=f'BENCH-{stamp}-{i}')
+            for i in range(options['vendors'])
+        ]
+        try:
+            with override_settings(METRICS_QUEUE_MODE=options['queue_mode']):
+                self.run(vendors, stamp, options)
+        finally:
+            for vendor in vendors:
+                vendor.delete()
+
+    def describe_profile(self):
+        settings_dict = connection.settings_dict
+        self.stdout.write(f"Backend:      {connection.vendor} ({settings_dict['NAME']})")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = {
+                    pragma: cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+                    for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')
+                }
+            self.stdout.write(f"PRAGMAs:      {pragmas}")
+        else:
+            self.stdout.write(f"CONN_MAX_AGE: {settings_dict['CONN_MAX_AGE']}, health checks: {settings_dict['CONN_HEALTH_CHECKS']}")
+
+    def run(self, vendors, stamp, options):
+        latencies = []
+        failures = []
+        reads = []
+        done = threading.Event()
+        lock = threading.Lock()
+
+        def write(worker):
+            now = timezone.now()
+            try:
+                for i in range(options['writes']):
+                    vendor = vendors[(worker + i) % len(vendors)]
+                    started = time.perf_counter()
+                    try:
+                        PurchaseOrder.objects.create(
+                            po_number=f'BENCH-{stamp}-{worker}-{i}', vendor=vendor, order_date=now, delivery_date=now,
+                            items={}, quantity=1, status='completed', quality_rating=4, issue_date=now,
+                            acknowledgment_date=now,
+                        )
+                        enqueue_vendor_metric(vendor.id)
+                    except OperationalError as exc:
+                        with lock:
+                            failures.append(str(exc))
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        def read():
+            count = 0
+            try:
+                while not done.is_set():
+                    try:
+                        list(PurchaseOrder.objects.filter(vendor__in=vendors).values_list('id', flat=True)[:100])
+                    except OperationalError as exc:
+                        with lock:
+                            failures.append(str(exc))
+                        continue
+                    count += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    reads.append(count)
+
+        writers = [threading.Thread(target=write, args=(worker,)) for worker in range(options['writers'])]
+        readers = [threading.Thread(target=read) for _ in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in readers:
+            thread.join()
+        # Queued recomputes must finish before the vendors are deleted
+        drain_started = time.perf_counter()
+        if options['queue_mode'] == 'thread':
+            get_metric_queue().join()
+        drained = time.perf_counter() - drain_started
+
+        self.stdout.write(f"Writers:      {options['writers']} x {options['writes']} purchase orders over {len(vendors)} vendors")
+        self.stdout.write(f"Queue mode:   {options['queue_mode']}")
+        self.stdout.write(f"Elapsed:      {elapsed:.2f}s")
+        if options['queue_mode'] == 'thread':
+            self.stdout.write(f"Queue drain:  {drained:.2f}s after the last write")
+        self.stdout.write(f"Throughput:   {len(latencies) / elapsed:,.0f} writes/s")
+        if latencies:
+            percentiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(f"Latency:      p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms")
+        if options['readers']:
+            self.stdout.write(f"Reads:        {sum(reads) / elapsed:,.0f} queries/s across {options['readers']} readers")
+        self.stdout.write(f"Failed:       {len(failures)}")
+        if failures:
+            self.stdout.write(self.style.WARNING(f"First failure: {failures[0]}"))
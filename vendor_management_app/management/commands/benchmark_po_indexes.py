@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg
+from django.utils import timezone
+from vendor_management_app.metrics import counter_aggregates
+from vendor_management_app.models import PurchaseOrder, Vendor
+
+class _Rollback(Exception):
+    pass
+
+# Lets bulk_create keep the generated issue_date values instead of stamping them all with now()
+@contextmanager
+def explicit_issue_date():
+    field = PurchaseOrder._meta.get_field('issue_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+class Command(BaseCommand):
+    help = ("Compare query plans and latencies of the purchase order hot queries with and without "
+            "the indexes from migration 0007. Works on synthetic rows inside a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Purchase orders to generate")
+        parser.add_argument('--vendors', type=int, default=1000, help="Vendors to spread them over")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query")
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.generate(options['rows'], options['vendors'], options['batch_size'])
+                queries = self.queries()
+                with_indexes = self.measure(queries, options['repeat'])
+                self.drop_indexes()
+                without_indexes = self.measure(queries, options['repeat'])
+                self.report(queries, with_indexes, without_indexes)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def generate(self, rows, vendors, batch_size):
+        self.stdout.write(f"Generating {vendors} vendors and {rows} purchase orders...")
+        vendor_objects = Vendor.objects.bulk_create(
+            Vendor(name=f"Bench Vendor {i}", contact_details="", address="", vendor_code=f"BENCH-{i}")
+            for i in range(vendors)
+        )
+        self.vendor_ids = [vendor.id for vendor in vendor_objects]
+        now = timezone.now()
+        statuses = ['completed'] * 6 + ['pending'] * 3 + ['canceled']
+        with explicit_issue_date():
+            for start in range(0, rows, batch_size):
+                batch = []
+                for i in range(start, min(start + batch_size, rows)):
+                    issue_date = now - timedelta(minutes=random.randint(0, 525_600))
+                    acknowledged = random.random() < 0.8
+                    batch.append(PurchaseOrder(
+                        po_number=f"BENCH-{i}",
+                        vendor_id=random.choice(self.vendor_ids),
+                        order_date=issue_date,
+                        issue_date=issue_date,
+                        delivery_date=issue_date + timedelta(days=random.randint(1, 14)),
+                        acknowledgment_date=issue_date + timedelta(hours=random.randint(1, 400)) if acknowledged else None,
+                        items={},
+                        quantity=random.randint(1, 100),
+                        status=random.choice(statuses),
+                        quality_rating=round(random.uniform(1, 5), 1) if random.random() < 0.7 else None,
+                    ))
+                PurchaseOrder.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def queries(self):
+        vendor_id = self.vendor_ids[len(self.vendor_ids) // 2]
+        vendor_orders = PurchaseOrder.objects.filter(vendor_id=vendor_id)
+        completed = vendor_orders.filter(status='completed')
+        return {
+            'metric aggregate': vendor_orders.order_by().values('vendor_id').annotate(**counter_aggregates()),
+            'quality average': completed.filter(quality_rating__isnull=False).order_by().values('vendor_id').annotate(average=Avg('quality_rating')),
+            'acknowledged completed': completed.filter(acknowledgment_date__isnull=False).values_list('id', flat=True),
+            'po_number lookup': PurchaseOrder.objects.filter(po_number=f"BENCH-{len(self.vendor_ids) * 7}"),
+            'vendor keyset page': vendor_orders.order_by('issue_date', 'id')[:50],
+            'keyset page': PurchaseOrder.objects.filter(issue_date__gt=timezone.now() - timedelta(days=30)).order_by('issue_date', 'id')[:50],
+        }
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (plan, statistics.median(timings))
+        return results
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in PurchaseOrder._meta.indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+            cursor.execute('ANALYZE')
+
+    def report(self, queries, with_indexes, without_indexes):
+        for name in queries:
+            plan_with, median_with = with_indexes[name]
+            plan_without, median_without = without_indexes[name]
+            speedup = median_without / median_with if median_with else float('inf')
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}: {median_without:.2f} ms -> {median_with:.2f} ms ({speedup:.1f}x)"))
+            self.stdout.write(f"  without indexes: {plan_without}")
+            self.stdout.write(f"  with indexes:    {plan_with}")
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from vendor_management_app.models import PurchaseOrder, Vendor
+from vendor_management_app.serializers import FAST_SERIALIZERS, PurchaseOrderSerializer, VendorSerializer
+
+class Command(BaseCommand):
+    help = ("Time the list serializers and the fast-path serializers over the same rows, rendered to JSON, "
+            "and check that both produce the same bytes. Read-only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def _time(self, serializer_class, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, content
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        failed = False
+        for serializer_class, model in ((VendorSerializer, Vendor), (PurchaseOrderSerializer, PurchaseOrder)):
+            queryset = model.objects.order_by('id')[:rows]
+            count = queryset.count()
+            slow, expected = self._time(serializer_class, queryset, repeat)
+            fast, content = self._time(FAST_SERIALIZERS[serializer_class], queryset, repeat)
+            identical = content == expected
+            failed = failed or not identical
+            self.stdout.write(
+                f"{model.__name__:<14} {count} rows  DRF {slow:.3f}s ({count / slow:,.0f} rows/s)  "
+                f"fast {fast:.3f}s ({count / fast:,.0f} rows/s, {slow / fast:.1f}x)  identical: {identical}"
+            )
+        if failed:
+            raise SystemExit(1)
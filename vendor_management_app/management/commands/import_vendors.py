@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendor_management_app.imports import IMPORT_FORMATS, import_format, import_rows, import_vendors
+
+class Command(BaseCommand):
+    help = "Upsert vendors on vendor_code from a CSV or XLSX file with a header row"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file to import")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="File format (default: from the file extension)")
+        parser.add_argument('--chunk-size', type=int, help="Rows validated and upserted per bulk query")
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or import_format(options['path'])
+        if file_format is None:
+            raise CommandError(f"Cannot tell the format of {options['path']}, pass --format")
+        with open(options['path'], 'rb') as file:
+            result = import_vendors(import_rows(file, file_format), options['chunk_size'])
+        for error in result['errors']:
+            self.stdout.write(f"Row {error['row']}: {error['errors']}")
+        if result['failed'] > len(result['errors']):
+            self.stdout.write(f"... {result['failed'] - len(result['errors'])} more invalid row(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} vendor(s) created, {result['updated']} updated, {result['failed']} row(s) invalid"
+        ))
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from vendor_management_app.tasks import process_metric_tasks
+
+class Command(BaseCommand):
+    help = "Recompute vendor metrics for the MetricRecomputeTask rows queued with METRICS_QUEUE_MODE = 'db'"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Vendors per batch, defaults to METRICS_QUEUE_BATCH_SIZE")
+        parser.add_argument('--every', type=float, metavar='SECONDS', help="Keep running and poll the queue every SECONDS")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            processed = process_metric_tasks(batch_size=options['batch_size'])
+            elapsed = time.monotonic() - started
+            if processed or not options['every']:
+                self.stdout.write(f"Recomputed metrics of {processed} vendor(s) in {elapsed:.2f}s")
+            if not options['every']:
+                break
+            close_old_connections()
+            time.sleep(max(options['every'] - elapsed, 0))
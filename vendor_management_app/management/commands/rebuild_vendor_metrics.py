@@ -0,0 +1,56 @@
+import math
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from vendor_management_app.metrics import METRIC_COUNTERS, aggregate_purchase_orders_by_vendor, empty_contribution, recompute_vendor_metrics
+from vendor_management_app.models import PurchaseOrder, Vendor, VendorMetricAggregate, VendorScorecard
+from vendor_management_app.scorecards import recount_scorecard_total, scorecard_total
+from vendor_management_app.windows import rebuild_vendor_daily_metrics
+
+class Command(BaseCommand):
+    help = "Rebuild the per-vendor metric aggregates, day buckets and scorecard total from purchase orders and report any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids', help="Only process this vendor id (repeatable)")
+        parser.add_argument('--check', action='store_true', help="Report drift without writing anything")
+        parser.add_argument('--batch-size', type=int, default=500, help="Vendors recomputed per GROUP BY query")
+
+    def handle(self, *args, **options):
+        vendor_ids = Vendor.objects.order_by('id').values_list('id', flat=True)
+        if options['vendor_ids']:
+            vendor_ids = vendor_ids.filter(id__in=options['vendor_ids'])
+        vendor_ids = list(vendor_ids)
+
+        drifted = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(vendor_ids), batch_size):
+            batch = vendor_ids[start:start + batch_size]
+            expected_by_vendor = aggregate_purchase_orders_by_vendor(PurchaseOrder.objects.filter(vendor_id__in=batch))
+            stored_by_vendor = VendorMetricAggregate.objects.in_bulk(batch)
+            for vendor_id in batch:
+                expected = expected_by_vendor.get(vendor_id, empty_contribution())
+                stored = stored_by_vendor.get(vendor_id)
+                drift = [
+                    counter for counter in METRIC_COUNTERS
+                    if stored is None or not math.isclose(getattr(stored, counter), expected[counter], abs_tol=1e-6)
+                ]
+                if drift:
+                    drifted += 1
+                    self.stdout.write(f"Vendor {vendor_id}: drift in {', '.join(drift)}")
+            if not options['check']:
+                with transaction.atomic():
+                    recompute_vendor_metrics(batch, expected_by_vendor)
+                    rebuild_vendor_daily_metrics(batch)
+
+        total, expected_total = scorecard_total(), VendorScorecard.objects.count()
+        total_drifted = total != expected_total
+        if total_drifted:
+            self.stdout.write(f"Scorecard total drift: {total}, expected {expected_total}")
+        if not options['check']:
+            recount_scorecard_total()
+
+        if options['check']:
+            self.stdout.write(f"{drifted} vendor(s) with drifted aggregates")
+            if drifted or total_drifted:
+                raise SystemExit(1)
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt metric aggregates, {drifted} vendor(s) had drifted"))
@@ -0,0 +1,34 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from vendor_management_app.models import PurchaseOrderEvent
+from vendor_management_app.projections import project_performance_history, project_vendor_metrics, replay_events
+
+class Command(BaseCommand):
+    help = ("Rebuild the vendor metrics (aggregates, vendor metric fields and scorecards) and HistoricalPerformance "
+            "by replaying the purchase order event log, partitioned by purchase order across worker processes")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--partitions', type=int, help="Defaults to the number of workers")
+        parser.add_argument('--chunk-size', type=int, help="Events loaded per chunk, defaults to ANALYTICS_CHUNK_SIZE")
+        parser.add_argument('--skip-metrics', action='store_true')
+        parser.add_argument('--skip-history', action='store_true')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        partitions = options['partitions'] or workers
+        started = time.perf_counter()
+        final, daily = replay_events(partitions=partitions, workers=workers, chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"Replayed {PurchaseOrderEvent.objects.count()} events in {partitions} partition(s) "
+            f"on {workers} worker(s) in {time.perf_counter() - started:.1f}s"
+        )
+        if not options['skip_metrics']:
+            started = time.perf_counter()
+            written = project_vendor_metrics(final)
+            self.stdout.write(f"Vendor metrics: {written} vendor(s) differed and were rewritten in {time.perf_counter() - started:.1f}s")
+        if not options['skip_history']:
+            started = time.perf_counter()
+            written = project_performance_history(daily)
+            self.stdout.write(f"Performance history: {written} row(s) written in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from vendor_management_app.events import append_created_events
+from vendor_management_app.metrics import recompute_vendor_metrics
+from vendor_management_app.models import PurchaseOrder, Vendor
+from vendor_management_app.windows import rebuild_vendor_daily_metrics
+
+STATUSES = np.array(['completed', 'pending', 'canceled'])
+STATUS_WEIGHTS = (0.75, 0.15, 0.10)
+
+MICROSECONDS_PER_DAY = 86_400_000_000
+
+class Command(BaseCommand):
+    help = ("Generate synthetic vendors and purchase orders for load testing. Purchase orders are spread over "
+            "vendors with a Zipf-like skew, so a few vendors own most of them, and over the last --days days. "
+            "Vendor codes and PO numbers start with --prefix; --clear removes an earlier run. Metrics are recomputed afterwards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=1000)
+        parser.add_argument('--purchase-orders', type=int, default=100_000)
+        parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent of purchase orders per vendor; 0 spreads them evenly")
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='LOAD')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true', help="Only delete the vendors (and their purchase orders) of an earlier run")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = Vendor.objects.filter(vendor_code__startswith=f'{prefix}-')
+        if options['clear']:
+            deleted, _ = existing.delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} rows"))
+            return
+        if existing.exists():
+            raise CommandError(f"Vendors with the prefix {prefix} exist already; run with --clear first or pick another --prefix")
+
+        rng = np.random.default_rng(options['seed'])
+        started = time.perf_counter()
+        vendor_ids = self.create_vendors(prefix, options['vendors'])
+        counts = self.create_purchase_orders(rng, prefix, vendor_ids, options)
+        self.stdout.write(f"Inserted {len(vendor_ids)} vendors and {options['purchase_orders']} purchase orders in {time.perf_counter() - started:.1f}s")
+        top = np.sort(counts)[::-1]
+        share = top[:max(1, len(top) // 100)].sum() / max(1, top.sum())
+        self.stdout.write(f"Largest vendor: {top[0]} purchase orders; top 1% of vendors own {share:.0%}")
+
+        started = time.perf_counter()
+        for start in range(0, len(vendor_ids), 500):
+            with transaction.atomic():
+                recompute_vendor_metrics(vendor_ids[start:start + 500])
+                rebuild_vendor_daily_metrics(vendor_ids[start:start + 500])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed vendor metrics in {time.perf_counter() - started:.1f}s"))
+
+    def create_vendors(self, prefix, count):
+        Vendor.objects.bulk_create(
+            [
+                Vendor(
+                    name=f'Load Vendor {i}', contact_details=f'+1-555-{i % 10000:04d}', address=f'{i} Load Street',
+                    vendor_code=f'{prefix}-{i:07d}',
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        # Ordered by vendor code, so vendor 0 is the most active one
+        return list(Vendor.objects.filter(vendor_code__startswith=f'{prefix}-').order_by('vendor_code').values_list('id', flat=True))
+
+    def create_purchase_orders(self, rng, prefix, vendor_ids, options):
+        total, batch_size = options['purchase_orders'], options['batch_size']
+        weights = 1.0 / np.arange(1, len(vendor_ids) + 1) ** options['skew']
+        vendor_choice = rng.choice(len(vendor_ids), size=total, p=weights / weights.sum())
+        # Each vendor has its own typical quality
+        vendor_quality = rng.uniform(2.5, 4.8, size=len(vendor_ids))
+        ids = np.asarray(vendor_ids)
+        now = timezone.now()
+
+        for start in range(0, total, batch_size):
+            size = min(batch_size, total - start)
+            vendors = vendor_choice[start:start + size]
+            issue = rng.uniform(-options['days'], 0, size=size)
+            acknowledged = rng.random(size) < 0.85
+            acknowledgment = issue + rng.exponential(1.5, size=size)
+            delivery = issue + rng.uniform(0.5, 6, size=size)
+            status = STATUSES[rng.choice(len(STATUSES), size=size, p=STATUS_WEIGHTS)]
+            rated = (status == 'completed') & (rng.random(size) < 0.9)
+            quality = np.clip(np.round(rng.normal(vendor_quality[vendors], 0.8) * 2) / 2, 1, 5)
+            lines = rng.integers(1, 6, size=size)
+
+            purchase_orders = []
+            for i in range(size):
+                items = [{'sku': f'SKU-{int(sku)}', 'quantity': int(quantity)}
+                         for sku, quantity in zip(rng.integers(1, 5000, lines[i]), rng.integers(1, 50, lines[i]))]
+                purchase_orders.append(PurchaseOrder(
+                    po_number=f'{prefix}-{start + i:09d}', vendor_id=int(ids[vendors[i]]),
+                    order_date=now + timedelta(days=float(issue[i])),
+                    delivery_date=now + timedelta(days=float(delivery[i])),
+                    items=items, quantity=sum(item['quantity'] for item in items), status=status[i],
+                    quality_rating=float(quality[i]) if rated[i] else None,
+                    acknowledgment_date=now + timedelta(days=float(acknowledgment[i])) if acknowledged[i] else None,
+                ))
+            with transaction.atomic():
+                created = PurchaseOrder.objects.bulk_create(purchase_orders)
+                # issue_date is auto_now_add, so it is backdated to the order date after the insert
+                created = PurchaseOrder.objects.filter(id__in=[purchase_order.id for purchase_order in created])
+                created.update(issue_date=F('order_date'))
+                append_created_events(created)
+            self.stdout.write(f"  {start + size}/{total} purchase orders", ending='\r')
+        self.stdout.write('')
+        return np.bincount(vendor_choice, minlength=len(vendor_ids))
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from vendor_management_app.snapshots import snapshot_vendor_performance
+
+class Command(BaseCommand):
+    help = "Record HistoricalPerformance snapshots for vendors whose metrics changed since the last snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Snapshot every vendor, not only the changed ones")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--every', type=int, metavar='SECONDS', help="Keep running and take a snapshot every SECONDS")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            created = snapshot_vendor_performance(full=options['full'], batch_size=options['batch_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"Snapshotted {created} vendor(s) in {elapsed:.2f}s")
+            if not options['every']:
+                break
+            close_old_connections()
+            time.sleep(max(options['every'] - elapsed, 0))
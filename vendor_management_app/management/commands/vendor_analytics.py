@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from vendor_management_app.analytics import fleet_vendor_metrics, vendor_metric_trends
+from vendor_management_app.routers import read_from_replica
+
+class Command(BaseCommand):
+    help = ("Compute the metrics of every vendor with the vectorized analytics module, or their rolling-window "
+            "trends with --trends, and write them as CSV. Reads from a read replica when one is configured.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids', help="Only this vendor id (repeatable)")
+        parser.add_argument('--trends', action='store_true', help="Rolling-window trends instead of current metrics")
+        parser.add_argument('--window', default='30D', help="Trailing window in days, e.g. 30D or 90D")
+        parser.add_argument('--freq', default='W', help="Trend sampling period as a pandas offset alias, e.g. W or M")
+        parser.add_argument('--chunk-size', type=int, help="Purchase orders loaded per chunk, defaults to ANALYTICS_CHUNK_SIZE")
+        parser.add_argument('--output', help="CSV file to write, defaults to stdout")
+
+    def handle(self, *args, **options):
+        with read_from_replica():
+            if options['trends']:
+                frame = vendor_metric_trends(
+                    options['vendor_ids'], window=options['window'], freq=options['freq'], chunk_size=options['chunk_size']
+                )
+            else:
+                frame = fleet_vendor_metrics(options['vendor_ids'], chunk_size=options['chunk_size']).reset_index()
+        if options['output']:
+            frame.to_csv(options['output'], index=False)
+        else:
+            self.stdout.write(frame.to_csv(index=False), ending='')
@@ -0,0 +1,254 @@
+from datetime import timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DurationField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from vendor_management_app.caching import ainvalidate_vendor, invalidate_vendor, invalidate_vendors
+from vendor_management_app.models import PurchaseOrder, Vendor, VendorMetricAggregate
+from vendor_management_app.scorecards import refresh_vendor_scorecards
+from vendor_management_app.streams import publish_vendor_metrics
+
+# Counters kept per vendor in VendorMetricAggregate
+METRIC_COUNTERS = (
+    'completed_count',
+    'on_time_count',
+    'quality_sum',
+    'quality_count',
+    'response_time_sum',
+    'response_count',
+    'fulfilled_count',
+)
+
+# Vendor fields derived from the counters
+VENDOR_METRIC_FIELDS = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfilment_rate')
+
+# Purchase order columns a PO's metric contribution depends on
+CONTRIBUTION_FIELDS = ('vendor_id', 'status', 'delivery_date', 'acknowledgment_date', 'issue_date', 'quality_rating')
+
+def empty_contribution():
+    return dict.fromkeys(METRIC_COUNTERS, 0)
+
+# What a single purchase order adds to its vendor's counters
+def purchase_order_contribution(row):
+    contribution = empty_contribution()
+    if row is None or row['status'] != 'completed':
+        return contribution
+    acknowledgment_date = row['acknowledgment_date']
+    quality_rating = row['quality_rating']
+    contribution['completed_count'] = 1
+    if acknowledgment_date is not None:
+        contribution['on_time_count'] = int(row['delivery_date'] <= acknowledgment_date)
+        contribution['response_time_sum'] = (acknowledgment_date - row['issue_date']).total_seconds()
+        contribution['response_count'] = 1
+    if quality_rating is not None:
+        contribution['quality_sum'] = quality_rating
+        contribution['quality_count'] = 1
+    # Same condition as the original exclude(quality_rating__lt=3)
+    contribution['fulfilled_count'] = int(quality_rating is None or quality_rating >= 3)
+    return contribution
+
+def purchase_order_state(pk):
+    return PurchaseOrder.objects.filter(pk=pk).values(*CONTRIBUTION_FIELDS).first()
+
+# Apply the difference between two contributions to a vendor's aggregate row.
+# A vendor without an aggregate row is left alone; it gets rebuilt from scratch on next read.
+def apply_contribution_delta(vendor_id, before, after):
+    changes = {}
+    for counter in METRIC_COUNTERS:
+        delta = after[counter] - before[counter]
+        if delta:
+            changes[counter] = F(counter) + delta
+    if changes:
+        VendorMetricAggregate.objects.filter(vendor_id=vendor_id).update(updated_at=timezone.now(), **changes)
+
+# Conditional aggregates computing every counter in a single pass over the purchase orders
+def counter_aggregates():
+    completed = Q(status='completed')
+    acknowledged = completed & Q(acknowledgment_date__isnull=False)
+    return {
+        'completed_count': Count('id', filter=completed),
+        'on_time_count': Count('id', filter=acknowledged & Q(delivery_date__lte=F('acknowledgment_date'))),
+        'quality_sum': Sum('quality_rating', filter=completed),
+        'quality_count': Count('quality_rating', filter=completed),
+        'response_time_sum': Sum(F('acknowledgment_date') - F('issue_date'), filter=acknowledged, output_field=DurationField()),
+        'response_count': Count('id', filter=acknowledged),
+        'fulfilled_count': Count('id', filter=completed & (Q(quality_rating__isnull=True) | Q(quality_rating__gte=3))),
+    }
+
+def _clean_counters(row):
+    counters = {counter: row[counter] or 0 for counter in METRIC_COUNTERS}
+    if row['response_time_sum'] is not None:
+        counters['response_time_sum'] = row['response_time_sum'].total_seconds()
+    return counters
+
+# One aggregate() query over the given purchase orders
+def aggregate_purchase_orders(purchase_orders):
+    return _clean_counters(purchase_orders.aggregate(**counter_aggregates()))
+
+# Batch mode: one GROUP BY query returning the counters of every vendor in the queryset
+def aggregate_purchase_orders_by_vendor(purchase_orders):
+    rows = purchase_orders.order_by().values('vendor_id').annotate(**counter_aggregates())
+    return {row['vendor_id']: _clean_counters(row) for row in rows}
+
+# Counters of the completed purchase orders in the queryset per vendor and delivery day (UTC)
+def aggregate_purchase_orders_by_vendor_day(purchase_orders):
+    rows = (
+        purchase_orders.filter(status='completed').order_by()
+        .values('vendor_id', day=TruncDate('delivery_date', tzinfo=dt_timezone.utc))
+        .annotate(**counter_aggregates())
+    )
+    return {(row['vendor_id'], row['day']): _clean_counters(row) for row in rows}
+
+def compute_vendor_aggregate(vendor_id):
+    return aggregate_purchase_orders(PurchaseOrder.objects.filter(vendor_id=vendor_id))
+
+# Recompute the aggregates of many vendors with one GROUP BY query and write them back in bulk
+def rebuild_vendor_aggregates(vendor_ids, counters_by_vendor=None):
+    vendor_ids = list(vendor_ids)
+    if counters_by_vendor is None:
+        counters_by_vendor = aggregate_purchase_orders_by_vendor(PurchaseOrder.objects.filter(vendor_id__in=vendor_ids))
+    now = timezone.now()
+    aggregates = [
+        VendorMetricAggregate(vendor_id=vendor_id, updated_at=now, **counters_by_vendor.get(vendor_id, empty_contribution()))
+        for vendor_id in vendor_ids
+    ]
+    VendorMetricAggregate.objects.bulk_create(
+        aggregates, update_conflicts=True, unique_fields=['vendor'], update_fields=[*METRIC_COUNTERS, 'updated_at']
+    )
+    return aggregates
+
+def rebuild_vendor_aggregate(vendor_id):
+    aggregate, created = VendorMetricAggregate.objects.update_or_create(
+        vendor_id=vendor_id, defaults={**compute_vendor_aggregate(vendor_id), 'updated_at': timezone.now()}
+    )
+    return aggregate
+
+def get_vendor_aggregate(vendor_id):
+    try:
+        return VendorMetricAggregate.objects.get(vendor_id=vendor_id)
+    except VendorMetricAggregate.DoesNotExist:
+        return rebuild_vendor_aggregate(vendor_id)
+
+# Async ORM variants for the ASGI views
+async def aaggregate_purchase_orders(purchase_orders):
+    return _clean_counters(await purchase_orders.aaggregate(**counter_aggregates()))
+
+async def arebuild_vendor_aggregate(vendor_id):
+    counters = await aaggregate_purchase_orders(PurchaseOrder.objects.filter(vendor_id=vendor_id))
+    aggregate, created = await VendorMetricAggregate.objects.aupdate_or_create(
+        vendor_id=vendor_id, defaults={**counters, 'updated_at': timezone.now()}
+    )
+    return aggregate
+
+async def aget_vendor_aggregate(vendor_id):
+    try:
+        return await VendorMetricAggregate.objects.aget(vendor_id=vendor_id)
+    except VendorMetricAggregate.DoesNotExist:
+        return await arebuild_vendor_aggregate(vendor_id)
+
+# Vendor metric fields derived from the counters in constant time
+def derive_vendor_metrics(aggregate):
+    completed = aggregate.completed_count
+    return {
+        'on_time_delivery_rate': aggregate.on_time_count / completed if completed > 0 else 0,
+        'quality_rating_avg': aggregate.quality_sum / aggregate.quality_count if aggregate.quality_count > 0 else 0.0,
+        'average_response_time': aggregate.response_time_sum / aggregate.response_count if aggregate.response_count > 0 else 0.0,
+        'fulfilment_rate': aggregate.fulfilled_count / completed if completed > 0 else 0,
+    }
+
+# Recompute and store the metrics of many vendors: one GROUP BY query plus two bulk writes
+def recompute_vendor_metrics(vendor_ids, counters_by_vendor=None):
+    vendors = []
+    metrics_by_vendor = {}
+    now = timezone.now()
+    for aggregate in rebuild_vendor_aggregates(vendor_ids, counters_by_vendor):
+        metrics_by_vendor[aggregate.vendor_id] = derive_vendor_metrics(aggregate)
+        vendor = Vendor(id=aggregate.vendor_id, updated_at=now, metrics_version=F('metrics_version') + 1, **metrics_by_vendor[aggregate.vendor_id])
+        vendors.append(vendor)
+    Vendor.objects.bulk_update(vendors, [*VENDOR_METRIC_FIELDS, 'updated_at', 'metrics_version'])
+    refresh_vendor_scorecards(metrics_by_vendor)
+    publish_vendor_metrics(metrics_by_vendor)
+    invalidate_vendors(vendor.id for vendor in vendors)
+    return vendors
+
+# Write derived metrics with a single UPDATE of the metric columns, only if metrics_version
+# still holds the value read before the aggregate. Returns None when another writer got there first.
+# The scorecard is refreshed in the same transaction, so it follows the vendor row's write order.
+def _write_vendor_metrics(vendor_id, version, aggregate, scorecard=True):
+    metrics = derive_vendor_metrics(aggregate)
+    with transaction.atomic():
+        updated = Vendor.objects.filter(id=vendor_id, metrics_version=version).update(
+            updated_at=timezone.now(), metrics_version=version + 1, **metrics
+        )
+        if updated and scorecard:
+            refresh_vendor_scorecards({vendor_id: metrics})
+        if updated:
+            publish_vendor_metrics({vendor_id: metrics})
+    return metrics if updated else None
+
+# Last resort after repeated conflicts: lock the vendor row, then read and write
+def _store_vendor_metrics_locked(vendor_id, rebuild):
+    with transaction.atomic():
+        version = Vendor.objects.select_for_update().filter(id=vendor_id).values_list('metrics_version', flat=True).first()
+        if version is None:
+            return None
+        aggregate = rebuild_vendor_aggregate(vendor_id) if rebuild else get_vendor_aggregate(vendor_id)
+        return _write_vendor_metrics(vendor_id, version, aggregate)
+
+# Store the metrics of one vendor with optimistic concurrency: a writer whose UPDATE lost the
+# race derives the metrics again from the current counters instead of overwriting newer ones.
+def store_vendor_metrics(vendor_id, rebuild=False):
+    metrics = None
+    for _ in range(settings.METRICS_WRITE_ATTEMPTS):
+        version = Vendor.objects.filter(id=vendor_id).values_list('metrics_version', flat=True).first()
+        if version is None:
+            return None
+        aggregate = rebuild_vendor_aggregate(vendor_id) if rebuild else get_vendor_aggregate(vendor_id)
+        metrics = _write_vendor_metrics(vendor_id, version, aggregate)
+        if metrics is not None:
+            break
+    else:
+        metrics = _store_vendor_metrics_locked(vendor_id, rebuild)
+    invalidate_vendor(vendor_id)
+    return metrics
+
+async def astore_vendor_metrics(vendor_id, rebuild=False):
+    metrics = None
+    for _ in range(settings.METRICS_WRITE_ATTEMPTS):
+        version = await Vendor.objects.filter(id=vendor_id).values_list('metrics_version', flat=True).afirst()
+        if version is None:
+            return None
+        aggregate = await (arebuild_vendor_aggregate(vendor_id) if rebuild else aget_vendor_aggregate(vendor_id))
+        metrics = await sync_to_async(_write_vendor_metrics)(vendor_id, version, aggregate)
+        if metrics is not None:
+            break
+    else:
+        metrics = await sync_to_async(_store_vendor_metrics_locked)(vendor_id, rebuild)
+    await ainvalidate_vendor(vendor_id)
+    return metrics
+
+# Store the metrics of many vendors from their running aggregates, rebuilding only the missing ones.
+# The conditional UPDATEs run in one transaction; vendors that lost a race are retried one by one.
+# Vendors deleted in the meantime are skipped.
+def refresh_vendor_metrics(vendor_ids):
+    versions = dict(Vendor.objects.filter(id__in=list(vendor_ids)).values_list('id', 'metrics_version'))
+    aggregates = list(VendorMetricAggregate.objects.filter(vendor_id__in=versions))
+    missing = versions.keys() - {aggregate.vendor_id for aggregate in aggregates}
+    if missing:
+        aggregates.extend(rebuild_vendor_aggregates(missing))
+    conflicts = []
+    metrics_by_vendor = {}
+    with transaction.atomic():
+        for aggregate in aggregates:
+            metrics = _write_vendor_metrics(aggregate.vendor_id, versions[aggregate.vendor_id], aggregate, scorecard=False)
+            if metrics is None:
+                conflicts.append(aggregate.vendor_id)
+            else:
+                metrics_by_vendor[aggregate.vendor_id] = metrics
+        refresh_vendor_scorecards(metrics_by_vendor)
+    invalidate_vendors(versions.keys() - set(conflicts))
+    for vendor_id in conflicts:
+        store_vendor_metrics(vendor_id)
+    return len(versions)
@@ -0,0 +1,121 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from vendor_management_app.instrumentation import begin_request, end_request, record_request
+from vendor_management_app.routers import pin_to_primary, pinned_to_primary, reset_replica_reads, route_reads_to_replica
+
+# Records latency, query count, database time and render time of every request into the
+# per-endpoint histograms of instrumentation.registry, keyed by the URL name. Works for both
+# sync and async views; should come first in MIDDLEWARE so the latency covers the whole stack.
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stats, token = begin_request()
+        request._request_stats = stats
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, stats, started)
+            end_request(token)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        stats, token = begin_request()
+        request._request_stats = stats
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(request, stats, started)
+            end_request(token)
+
+    # Known once the URL is resolved, so slow queries can be logged against the endpoint
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, '_request_stats', None)
+        if stats is not None:
+            stats.endpoint = request.resolver_match.url_name
+        return None
+
+    # DRF and template responses are rendered after the view returns; time the render
+    def process_template_response(self, request, response):
+        stats = getattr(request, '_request_stats', None)
+        if stats is not None:
+            render_started = time.perf_counter()
+
+            def rendered(response):
+                stats.serialization_time += time.perf_counter() - render_started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, stats, started):
+        match = getattr(request, 'resolver_match', None)
+        stats.endpoint = match.url_name if match is not None and match.url_name else None
+        record_request(stats, time.perf_counter() - started)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Sends the reads of the endpoints in REPLICA_ENDPOINTS to the read replicas, unless the
+# session wrote recently. A successful write pins the session to the primary.
+# Works for both sync and async views; the session is loaded from a thread in async mode.
+# Must come after SessionMiddleware.
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django adapts process_view to the middleware mode; give it the async variant so
+            # the replica ContextVar is set in the request's own context rather than a thread's
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._reset(request)
+        if self._pins(request, response):
+            pin_to_primary(request.session)
+        return response
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._reset(request)
+        if self._pins(request, response):
+            await sync_to_async(pin_to_primary)(request.session)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self._replica_endpoint(request) and not pinned_to_primary(request.session):
+            request._replica_token = route_reads_to_replica()
+        return None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if self._replica_endpoint(request) and not await sync_to_async(pinned_to_primary)(request.session):
+            request._replica_token = route_reads_to_replica()
+        return None
+
+    def _replica_endpoint(self, request):
+        return request.method in SAFE_METHODS and request.resolver_match.url_name in settings.REPLICA_ENDPOINTS
+
+    def _pins(self, request, response):
+        return request.method not in SAFE_METHODS and 200 <= response.status_code < 300
+
+    def _reset(self, request):
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            reset_replica_reads(token)
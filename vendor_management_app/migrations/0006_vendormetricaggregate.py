@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0005_alter_purchaseorder_acknowledgment_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricAggregate',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_aggregate', serialize=False, to='vendor_management_app.vendor')),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('quality_sum', models.FloatField(default=0.0)),
+                ('quality_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_count', models.IntegerField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0006_vendormetricaggregate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['po_number'], name='po_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('quality_rating__isnull', False)), fields=['vendor', 'status'], name='po_vendor_status_rated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False)), fields=['vendor', 'status', 'acknowledgment_date', 'delivery_date'], name='po_vendor_status_acked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['issue_date', 'id'], name='po_issue_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'issue_date', 'id'], name='po_vendor_issue_date_id_idx'),
+        ),
+    ]
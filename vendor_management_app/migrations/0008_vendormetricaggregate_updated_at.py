@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:38
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0007_purchaseorder_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendormetricaggregate',
+            name='updated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0008_vendormetricaggregate_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['vendor', 'date'], name='historical_vendor_date_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0010_vendor_updated_at_purchaseorder_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRecomputeTask',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_recompute_task', serialize=False, to='vendor_management_app.vendor')),
+                ('requested_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0011_metricrecomputetask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metricrecomputetask',
+            name='first_requested_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='metrics_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='metricrecomputetask',
+            name='requested_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
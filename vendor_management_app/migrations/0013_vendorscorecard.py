@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Score formula and weights as of this migration, so later changes to scorecards.compute_score
+# or settings.SCORECARD_WEIGHTS do not change what it writes
+SCORE_WEIGHTS = {
+    'on_time_delivery_rate': 0.4,
+    'quality_rating_avg': 0.35,
+    'fulfilment_rate': 0.25,
+}
+
+
+def compute_score(metrics):
+    return (
+        SCORE_WEIGHTS['on_time_delivery_rate'] * metrics['on_time_delivery_rate']
+        + SCORE_WEIGHTS['quality_rating_avg'] * metrics['quality_rating_avg'] / 5
+        + SCORE_WEIGHTS['fulfilment_rate'] * metrics['fulfilment_rate']
+    )
+
+
+def create_scorecards(apps, schema_editor):
+    Vendor = apps.get_model('vendor_management_app', 'Vendor')
+    VendorScorecard = apps.get_model('vendor_management_app', 'VendorScorecard')
+    fields = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfilment_rate')
+    scorecards = []
+    for values in Vendor.objects.values('id', *fields).iterator(chunk_size=2000):
+        vendor_id = values.pop('id')
+        scorecards.append(VendorScorecard(vendor_id=vendor_id, score=compute_score(values), **values))
+    VendorScorecard.objects.bulk_create(scorecards, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0012_vendor_metrics_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorScorecard',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scorecard', serialize=False, to='vendor_management_app.vendor')),
+                ('on_time_delivery_rate', models.FloatField(default=0.0)),
+                ('quality_rating_avg', models.FloatField(default=0.0)),
+                ('average_response_time', models.FloatField(default=0.0)),
+                ('fulfilment_rate', models.FloatField(default=0.0)),
+                ('score', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', 'vendor'], name='scorecard_score_idx'), models.Index(fields=['-on_time_delivery_rate', 'vendor'], name='scorecard_on_time_idx'), models.Index(fields=['-quality_rating_avg', 'vendor'], name='scorecard_quality_idx'), models.Index(fields=['average_response_time', 'vendor'], name='scorecard_response_idx'), models.Index(fields=['-fulfilment_rate', 'vendor'], name='scorecard_fulfilment_idx')],
+            },
+        ),
+        migrations.RunPython(create_scorecards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:34
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# Existing purchase orders start the log with a created event holding their current state
+def create_initial_events(apps, schema_editor):
+    PurchaseOrder = apps.get_model('vendor_management_app', 'PurchaseOrder')
+    PurchaseOrderEvent = apps.get_model('vendor_management_app', 'PurchaseOrderEvent')
+    fields = ('status', 'issue_date', 'delivery_date', 'acknowledgment_date', 'quality_rating')
+    events = []
+    for row in PurchaseOrder.objects.order_by('id').values('id', 'vendor_id', *fields).iterator(chunk_size=2000):
+        events.append(PurchaseOrderEvent(
+            purchase_order_id=row.pop('id'), event_type='created', occurred_at=row['issue_date'],
+            changed_fields=(1 << len(fields)) - 1, **row,
+        ))
+        if len(events) >= 2000:
+            PurchaseOrderEvent.objects.bulk_create(events)
+            events = []
+    PurchaseOrderEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0013_vendorscorecard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_order_id', models.BigIntegerField()),
+                ('vendor_id', models.BigIntegerField()),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('acknowledged', 'Acknowledged'), ('delivered', 'Delivered'), ('rated', 'Rated'), ('cancelled', 'Cancelled'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=20)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_fields', models.PositiveSmallIntegerField(default=0)),
+                ('status', models.CharField(max_length=50, null=True)),
+                ('issue_date', models.DateTimeField(null=True)),
+                ('delivery_date', models.DateTimeField(null=True)),
+                ('acknowledgment_date', models.DateTimeField(null=True)),
+                ('quality_rating', models.FloatField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['purchase_order_id', 'id'], name='po_event_po_id_idx')],
+            },
+        ),
+        migrations.RunPython(create_initial_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import timezone
+from django.db.models import Count, DurationField, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+# Counter aggregates as of this migration (see metrics.counter_aggregates), frozen so later
+# changes to the metrics module do not change what it writes
+def counter_aggregates():
+    completed = Q(status='completed')
+    acknowledged = completed & Q(acknowledgment_date__isnull=False)
+    return {
+        'completed_count': Count('id', filter=completed),
+        'on_time_count': Count('id', filter=acknowledged & Q(delivery_date__lte=F('acknowledgment_date'))),
+        'quality_sum': Sum('quality_rating', filter=completed),
+        'quality_count': Count('quality_rating', filter=completed),
+        'response_time_sum': Sum(F('acknowledgment_date') - F('issue_date'), filter=acknowledged, output_field=DurationField()),
+        'response_count': Count('id', filter=acknowledged),
+        'fulfilled_count': Count('id', filter=completed & (Q(quality_rating__isnull=True) | Q(quality_rating__gte=3))),
+    }
+
+
+# Day buckets of the existing completed purchase orders; the windows are built from them on first read
+def create_daily_metrics(apps, schema_editor):
+    PurchaseOrder = apps.get_model('vendor_management_app', 'PurchaseOrder')
+    VendorDailyMetric = apps.get_model('vendor_management_app', 'VendorDailyMetric')
+    rows = (
+        PurchaseOrder.objects.filter(status='completed').order_by()
+        .values('vendor_id', day=TruncDate('delivery_date', tzinfo=timezone.utc))
+        .annotate(**counter_aggregates())
+    )
+    buckets = []
+    for row in rows.iterator(chunk_size=2000):
+        counters = {counter: row[counter] or 0 for counter in counter_aggregates()}
+        if row['response_time_sum'] is not None:
+            counters['response_time_sum'] = row['response_time_sum'].total_seconds()
+        buckets.append(VendorDailyMetric(vendor_id=row['vendor_id'], day=row['day'], **counters))
+        if len(buckets) >= 2000:
+            VendorDailyMetric.objects.bulk_create(buckets)
+            buckets = []
+    VendorDailyMetric.objects.bulk_create(buckets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0014_purchaseorderevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.PositiveSmallIntegerField()),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('quality_sum', models.FloatField(default=0.0)),
+                ('quality_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_count', models.IntegerField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_windows', to='vendor_management_app.vendor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VendorDailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('quality_sum', models.FloatField(default=0.0)),
+                ('quality_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0.0)),
+                ('response_count', models.IntegerField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='vendor_management_app.vendor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='vendormetricwindow',
+            constraint=models.UniqueConstraint(fields=('vendor', 'days'), name='vendor_metric_window_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='vendordailymetric',
+            constraint=models.UniqueConstraint(fields=('vendor', 'day'), name='vendor_daily_metric_unique'),
+        ),
+        migrations.RunPython(create_daily_metrics, migrations.RunPython.noop),
+    ]
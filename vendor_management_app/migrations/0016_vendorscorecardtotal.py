@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+def create_scorecard_total(apps, schema_editor):
+    VendorScorecard = apps.get_model('vendor_management_app', 'VendorScorecard')
+    VendorScorecardTotal = apps.get_model('vendor_management_app', 'VendorScorecardTotal')
+    VendorScorecardTotal.objects.create(id=1, vendors=VendorScorecard.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_management_app', '0015_vendordailymetric_vendormetricwindow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorScorecardTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vendors', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_scorecard_total, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Vendor(models.Model):
     name = models.CharField(max_length=255)
@@ -9,6 +10,8 @@ class Vendor(models.Model):
     quality_rating_avg = models.FloatField(default=0.0)
     average_response_time = models.FloatField(default=0.0)
     fulfilment_rate = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+    metrics_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -24,6 +27,24 @@ class PurchaseOrder(models.Model):
     quality_rating = models.FloatField(null=True)
     issue_date = models.DateTimeField(auto_now_add=True)
     acknowledgment_date = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Integrations look POs up by number
+            models.Index(fields=['po_number'], name='po_number_idx'),
+            # Metric recomputation: completed POs of a vendor
+            models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+            models.Index(fields=['vendor', 'status'], condition=models.Q(quality_rating__isnull=False), name='po_vendor_status_rated_idx'),
+            models.Index(
+                fields=['vendor', 'status', 'acknowledgment_date', 'delivery_date'],
+                condition=models.Q(acknowledgment_date__isnull=False),
+                name='po_vendor_status_acked_idx',
+            ),
+            # Keyset pagination on (issue_date, id), with and without the vendor filter
+            models.Index(fields=['issue_date', 'id'], name='po_issue_date_id_idx'),
+            models.Index(fields=['vendor', 'issue_date', 'id'], name='po_vendor_issue_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"PO #{self.po_number} - {self.vendor.name}"
@@ -35,3 +56,144 @@ class HistoricalPerformance(models.Model):
     quality_rating_avg = models.FloatField()
     average_response_time = models.FloatField()
     fulfilment_rate = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'date'], name='historical_vendor_date_idx'),
+        ]
+
+class VendorMetricAggregate(models.Model):
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='metric_aggregate')
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    quality_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0.0)
+    response_count = models.IntegerField(default=0)
+    fulfilled_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Metric aggregate - {self.vendor_id}"
+
+class MetricRecomputeTask(models.Model):
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='metric_recompute_task')
+    first_requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+    requested_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Metric recompute - {self.vendor_id}"
+
+# Denormalized copy of the vendor metrics with a composite score, indexed for ranked queries
+class VendorScorecard(models.Model):
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='scorecard')
+    on_time_delivery_rate = models.FloatField(default=0.0)
+    quality_rating_avg = models.FloatField(default=0.0)
+    average_response_time = models.FloatField(default=0.0)
+    fulfilment_rate = models.FloatField(default=0.0)
+    score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'vendor'], name='scorecard_score_idx'),
+            models.Index(fields=['-on_time_delivery_rate', 'vendor'], name='scorecard_on_time_idx'),
+            models.Index(fields=['-quality_rating_avg', 'vendor'], name='scorecard_quality_idx'),
+            models.Index(fields=['average_response_time', 'vendor'], name='scorecard_response_idx'),
+            models.Index(fields=['-fulfilment_rate', 'vendor'], name='scorecard_fulfilment_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scorecard - {self.vendor_id}"
+
+# Single row holding the number of vendor scorecards, kept up to date as scorecards are
+# inserted and deleted so percentile lookups do not count the scorecard table
+class VendorScorecardTotal(models.Model):
+    vendors = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Scorecard total - {self.vendors}"
+
+# Append-only log of purchase order changes; rows are never updated and outlive the purchase order.
+# Each event carries the metric fields that changed, flagged in changed_fields (see events.EVENT_FIELDS),
+# so folding a purchase order's events in id order rebuilds its state.
+class PurchaseOrderEvent(models.Model):
+    CREATED = 'created'
+    ACKNOWLEDGED = 'acknowledged'
+    DELIVERED = 'delivered'
+    RATED = 'rated'
+    CANCELLED = 'cancelled'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    EVENT_TYPES = [
+        (CREATED, 'Created'),
+        (ACKNOWLEDGED, 'Acknowledged'),
+        (DELIVERED, 'Delivered'),
+        (RATED, 'Rated'),
+        (CANCELLED, 'Cancelled'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    purchase_order_id = models.BigIntegerField()
+    vendor_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    changed_fields = models.PositiveSmallIntegerField(default=0)
+    status = models.CharField(max_length=50, null=True)
+    issue_date = models.DateTimeField(null=True)
+    delivery_date = models.DateTimeField(null=True)
+    acknowledgment_date = models.DateTimeField(null=True)
+    quality_rating = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['purchase_order_id', 'id'], name='po_event_po_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"PO {self.purchase_order_id} {self.event_type}"
+
+# Counters of the completed purchase orders of a vendor delivered on one day (UTC).
+# The rolling windows are kept as running sums of these buckets, see windows.py.
+class VendorDailyMetric(models.Model):
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='daily_metrics')
+    day = models.DateField()
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    quality_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0.0)
+    response_count = models.IntegerField(default=0)
+    fulfilled_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'day'], name='vendor_daily_metric_unique'),
+        ]
+
+    def __str__(self):
+        return f"Daily metrics - {self.vendor_id} {self.day}"
+
+# Counters of a vendor over the days start..end (inclusive) of a rolling window of `days` days
+class VendorMetricWindow(models.Model):
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='metric_windows')
+    days = models.PositiveSmallIntegerField()
+    start = models.DateField()
+    end = models.DateField()
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    quality_sum = models.FloatField(default=0.0)
+    quality_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0.0)
+    response_count = models.IntegerField(default=0)
+    fulfilled_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'days'], name='vendor_metric_window_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.days} day metrics - {self.vendor_id}"
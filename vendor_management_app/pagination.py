@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.response import Response
+
+# Keyset orderings of the list endpoints; the last field must be unique
+VENDOR_ORDERING = ('id',)
+PURCHASE_ORDER_ORDERING = ('issue_date', 'id')
+
+# Type of each ordering field's value in a decoded cursor position
+POSITION_TYPES = {'id': int, 'issue_date': datetime}
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _decode_value(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def encode_cursor(position, reverse=False):
+    payload = {'p': [_encode_value(value) for value in position], 'r': reverse}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, ordering):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = [_decode_value(value) for value in payload['p']]
+        reverse = bool(payload['r'])
+    except (TypeError, ValueError, KeyError):
+        raise ValueError('Invalid cursor.')
+    # A tampered cursor could hold any JSON value, which the keyset filter would reject with a TypeError
+    if len(position) != len(ordering) or any(type(value) is not POSITION_TYPES[field] for field, value in zip(ordering, position)):
+        raise ValueError('Invalid cursor.')
+    return position, reverse
+
+# Rows strictly after (or before) position in the ordering: (a, b) > (x, y) is a > x OR (a = x AND b > y)
+def _keyset_filter(ordering, position, reverse):
+    lookup = 'lt' if reverse else 'gt'
+    condition = Q()
+    for index, field in enumerate(ordering):
+        equal = {ordering[i]: position[i] for i in range(index)}
+        condition |= Q(**equal, **{f'{field}__{lookup}': position[index]})
+    return condition
+
+def _position(obj, ordering):
+    return [getattr(obj, field) for field in ordering]
+
+# One page of the queryset after the cursor position, without OFFSET
+def cursor_page(queryset, ordering, cursor, page_size):
+    reverse = False
+    if cursor:
+        position, reverse = decode_cursor(cursor, ordering)
+        queryset = queryset.filter(_keyset_filter(ordering, position, reverse))
+    order_by = [f'-{field}' if reverse else field for field in ordering]
+    items = list(queryset.order_by(*order_by)[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if reverse:
+        items.reverse()
+
+    next_cursor = previous_cursor = None
+    if items:
+        if has_more or reverse:
+            next_cursor = encode_cursor(_position(items[-1], ordering))
+        if (has_more and reverse) or (cursor and not reverse):
+            previous_cursor = encode_cursor(_position(items[0], ordering), reverse=True)
+    return items, next_cursor, previous_cursor
+
+def _page_size(request):
+    page_size = request.query_params.get('page_size') or settings.API_DEFAULT_PAGE_SIZE
+    if not page_size:
+        return None
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid page size.')
+    if page_size < 1:
+        raise ValueError('Invalid page size.')
+    return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+# Paginated response when ?cursor= / ?page_size= is given (or a default page size is configured),
+# None when the full list should be returned. fields is passed on to serializers that take a sparse fieldset.
+def paginated_response(request, queryset, ordering, serializer_class, fields=None):
+    cursor = request.query_params.get('cursor')
+    try:
+        page_size = _page_size(request) or (settings.API_MAX_PAGE_SIZE if cursor else None)
+        if page_size is None:
+            return None
+        items, next_cursor, previous_cursor = cursor_page(queryset, ordering, cursor, page_size)
+    except ValueError as exc:
+        return Response({'message': str(exc)}, status=400)
+    serializer = serializer_class(items, many=True, **({'fields': fields} if fields is not None else {}))
+    return Response({'next': next_cursor, 'previous': previous_cursor, 'results': serializer.data})
@@ -0,0 +1,189 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast, Mod
+from vendor_management_app.analytics import DAY_KEY_RANGE, MICROSECONDS_PER_DAY, contribution_arrays, derive_metrics, microseconds, reduce_by
+from vendor_management_app.events import EVENT_FIELDS, FIELD_FLAGS
+from vendor_management_app.metrics import METRIC_COUNTERS, empty_contribution, recompute_vendor_metrics
+from vendor_management_app.models import HistoricalPerformance, PurchaseOrderEvent, Vendor, VendorMetricAggregate
+
+#  Vendor metrics and HistoricalPerformance as projections of the purchase order event log.
+#  Events are replayed in partitions of purchase order ids (purchase_order_id % partitions), so all the
+#  events of a purchase order are folded by the same worker even when it moved between vendors; the
+#  per-vendor results of the partitions are then summed. Each partition yields:
+#    - the counters of every vendor from the final state of its purchase orders
+#    - per (vendor, day) changes of the counters, whose running totals give the end-of-day history
+
+EVENT_COLUMNS = ('id', 'purchase_order_id', 'vendor_id', 'event_type', 'occurred_at', 'changed_fields', *EVENT_FIELDS)
+
+DATETIME_COLUMNS = ('occurred_at', 'issue_date', 'delivery_date', 'acknowledgment_date')
+
+# Datetimes are fetched as text and parsed per column by pandas, as in analytics._chunks.
+# Each chunk is reduced to numeric arrays right away so the text does not pile up.
+def _event_arrays(partition, partitions, chunk_size):
+    events = PurchaseOrderEvent.objects.order_by()
+    if partitions > 1:
+        events = events.annotate(partition=Mod('purchase_order_id', partitions)).filter(partition=partition)
+    columns = [Cast(column, CharField()) if column in DATETIME_COLUMNS else column for column in EVENT_COLUMNS]
+    rows = events.values_list(*columns).iterator(chunk_size=chunk_size)
+    parts = []
+    while chunk := list(islice(rows, chunk_size)):
+        frame = pd.DataFrame.from_records(chunk, columns=EVENT_COLUMNS)
+        occurred_at, _ = microseconds(frame['occurred_at'])
+        issue, _ = microseconds(frame['issue_date'])
+        delivery, _ = microseconds(frame['delivery_date'])
+        acknowledgment, acknowledged = microseconds(frame['acknowledgment_date'])
+        parts.append({
+            'id': frame['id'].to_numpy(dtype=np.int64),
+            'purchase_order': frame['purchase_order_id'].to_numpy(dtype=np.int64),
+            'vendor': frame['vendor_id'].to_numpy(dtype=np.int64),
+            'deleted': (frame['event_type'] == PurchaseOrderEvent.DELETED).to_numpy(),
+            'day': occurred_at // MICROSECONDS_PER_DAY,
+            'flags': frame['changed_fields'].to_numpy(dtype=np.int64),
+            'completed': (frame['status'] == 'completed').to_numpy(),
+            'issue_date': issue,
+            'delivery_date': delivery,
+            'acknowledgment_date': acknowledgment,
+            'acknowledged': acknowledged,
+            'quality_rating': frame['quality_rating'].to_numpy(dtype=np.float64, na_value=np.nan),
+        })
+    if not parts:
+        return None
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+# State of the purchase order after every event: for each field, the value of the latest event
+# of the same purchase order that set it. Events must be sorted by purchase order and id.
+def _fold(events):
+    size = len(events['id'])
+    positions = np.arange(size)
+    starts = np.r_[True, events['purchase_order'][1:] != events['purchase_order'][:-1]]
+    group_start = np.maximum.accumulate(np.where(starts, positions, 0))
+
+    def latest(field):
+        last = np.maximum.accumulate(np.where(events['flags'] & FIELD_FLAGS[field], positions, -1))
+        return np.where(last >= group_start, last, -1)
+
+    status, issue = latest('status'), latest('issue_date')
+    delivery, acknowledgment, quality = latest('delivery_date'), latest('acknowledgment_date'), latest('quality_rating')
+    alive = ~events['deleted']
+    contributions = contribution_arrays(
+        alive & (status >= 0) & events['completed'][status],
+        events['delivery_date'][delivery],
+        events['acknowledgment_date'][acknowledgment],
+        (acknowledgment >= 0) & events['acknowledged'][acknowledgment],
+        events['issue_date'][issue],
+        np.where(quality >= 0, events['quality_rating'][quality], np.nan),
+    )
+    return starts, contributions
+
+# Replay the events of one partition. Returns the vendor counters of the final purchase order states
+# and the counter changes per (vendor, day) key, both as (keys, counters) pairs from reduce_by.
+def replay_partition(partition, partitions, chunk_size):
+    events = _event_arrays(partition, partitions, chunk_size)
+    if events is None:
+        return None
+    order = np.lexsort((events['id'], events['purchase_order']))
+    events = {column: values[order] for column, values in events.items()}
+    starts, contributions = _fold(events)
+
+    ends = np.r_[starts[1:], True]
+    final = reduce_by(events['vendor'][ends], {counter: values[ends] for counter, values in contributions.items()})
+
+    # Each event adds the new contribution to its vendor and removes the previous one of the
+    # purchase order from the vendor it had, on the day of the event
+    previous = ~starts
+    day_keys = np.concatenate([
+        events['vendor'] * DAY_KEY_RANGE + events['day'],
+        events['vendor'][np.r_[previous[1:], False]] * DAY_KEY_RANGE + events['day'][previous],
+    ])
+    changes = {
+        counter: np.concatenate([values, -values[np.r_[previous[1:], False]]])
+        for counter, values in contributions.items()
+    }
+    daily = reduce_by(day_keys, changes)
+    return final, daily
+
+def _combine(results):
+    results = [result for result in results if result is not None]
+    if not results:
+        return None
+    return reduce_by(
+        np.concatenate([keys for keys, counters in results]),
+        {counter: np.concatenate([counters[counter] for keys, counters in results]) for counter in METRIC_COUNTERS},
+    )
+
+def _counter_values(counters, index):
+    values = {counter: counters[counter][index].item() for counter in METRIC_COUNTERS}
+    # Response times are summed in integer microseconds; stored in seconds like timedelta.total_seconds()
+    values['response_time_sum'] = values['response_time_sum'] / 1_000_000
+    return values
+
+# Run replay_partition over every partition, in worker processes when workers > 1
+def replay_events(partitions=1, workers=1, chunk_size=None):
+    chunk_size = chunk_size or settings.ANALYTICS_CHUNK_SIZE
+    if workers > 1:
+        # Forked workers open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            results = list(executor.map(replay_partition, range(partitions), [partitions] * partitions, [chunk_size] * partitions))
+    else:
+        results = [replay_partition(partition, partitions, chunk_size) for partition in range(partitions)]
+    results = [result for result in results if result is not None]
+    return _combine([final for final, daily in results]), _combine([daily for final, daily in results])
+
+# Write the replayed counters of every existing vendor whose stored aggregate differs, and their metrics.
+# Returns the number of vendors written.
+def project_vendor_metrics(final, batch_size=500):
+    counters_by_vendor = {}
+    if final is not None:
+        keys, counters = final
+        counters_by_vendor = {int(vendor_id): _counter_values(counters, index) for index, vendor_id in enumerate(keys)}
+    stored = {row[0]: row[1:] for row in VendorMetricAggregate.objects.values_list('vendor_id', *METRIC_COUNTERS).iterator()}
+    changed = []
+    for vendor_id in Vendor.objects.order_by('id').values_list('id', flat=True).iterator():
+        expected = counters_by_vendor.setdefault(vendor_id, empty_contribution())
+        current = stored.get(vendor_id)
+        if current is None or not all(
+            math.isclose(value, expected[counter], rel_tol=1e-9, abs_tol=1e-6) for counter, value in zip(METRIC_COUNTERS, current)
+        ):
+            changed.append(vendor_id)
+    for start in range(0, len(changed), batch_size):
+        with transaction.atomic():
+            recompute_vendor_metrics(changed[start:start + batch_size], counters_by_vendor)
+    return len(changed)
+
+# Replace HistoricalPerformance with one row per vendor and day with events, holding the metrics
+# as of the end of that day (the following midnight, UTC). Returns the number of rows written.
+def project_performance_history(daily, batch_size=5000):
+    with transaction.atomic():
+        HistoricalPerformance.objects.all().delete()
+        if daily is None:
+            return 0
+        keys, changes = daily
+        vendors, days = keys // DAY_KEY_RANGE, keys % DAY_KEY_RANGE
+        vendor_starts = np.flatnonzero(np.r_[True, vendors[1:] != vendors[:-1]])
+        group_start = np.repeat(vendor_starts, np.diff(np.r_[vendor_starts, len(keys)]))
+        totals = {}
+        for counter, values in changes.items():
+            running = np.cumsum(values)
+            totals[counter] = running - np.where(group_start > 0, running[group_start - 1], 0)
+        totals['response_time_sum'] = totals['response_time_sum'] / 1_000_000
+
+        keep = np.isin(vendors, np.fromiter(Vendor.objects.values_list('id', flat=True).iterator(), dtype=np.int64))
+        metrics = {field: values[keep].tolist() for field, values in derive_metrics(totals).items()}
+        dates = pd.to_datetime(days[keep] + 1, unit='D', utc=True).to_pydatetime()
+        rows = zip(vendors[keep].tolist(), dates, *metrics.values())
+        written = 0
+        while batch := list(islice(rows, batch_size)):
+            HistoricalPerformance.objects.bulk_create([
+                HistoricalPerformance(vendor_id=vendor_id, date=date, **dict(zip(metrics, values)))
+                for vendor_id, date, *values in batch
+            ])
+            written += len(batch)
+        return written
@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer
+
+# Renderers registered so that ?format=ndjson / ?format=csv pass DRF content negotiation.
+# The list endpoints answer those formats with a streaming export instead.
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(encode_ndjson_row(row) for row in rows).encode(self.charset)
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        if not rows or not isinstance(rows[0], dict):
+            return b''
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(rows[0].keys())
+        for row in rows:
+            writer.writerow(csv_values(row.values()))
+        return output.getvalue().encode(self.charset)
+
+def encode_ndjson_row(row):
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+# Nested JSON (e.g. PO items) is written as a JSON string, None as an empty cell
+def csv_values(values):
+    return ['' if value is None else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value for value in values]
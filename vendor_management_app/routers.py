@@ -0,0 +1,51 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+#  Read-replica routing. Reads of this app's models go to one of READ_REPLICAS while
+#  replica reads are switched on for the current context: by ReplicaRoutingMiddleware for
+#  the read-only REPLICA_ENDPOINTS, or by read_from_replica() for analytics jobs.
+#  Everything else, and every write, uses the primary.
+
+_replica_reads = ContextVar('vendor_management_replica_reads', default=False)
+
+PINNED_UNTIL_KEY = 'replica_pinned_until'
+
+def route_reads_to_replica():
+    return _replica_reads.set(True)
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+@contextmanager
+def read_from_replica():
+    token = route_reads_to_replica()
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.READ_REPLICAS and model._meta.app_label == 'vendor_management_app':
+            return random.choice(settings.READ_REPLICAS)
+        return None
+
+    # Explicit, otherwise saving an instance read from a replica would write to the replica
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    # Replicas hold the same rows as the primary
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+# Read-your-writes: after a session writes, its reads stay on the primary for
+# REPLICA_STICKY_SECONDS so they cannot miss the write on a lagging replica
+def pin_to_primary(session):
+    session[PINNED_UNTIL_KEY] = time.time() + settings.REPLICA_STICKY_SECONDS
+
+def pinned_to_primary(session):
+    return session.get(PINNED_UNTIL_KEY, 0) > time.time()
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from vendor_management_app.models import VendorScorecard, VendorScorecardTotal
+
+# Ranked scorecard metrics and whether a higher value ranks first
+SCORECARD_METRICS = {
+    'score': True,
+    'on_time_delivery_rate': True,
+    'quality_rating_avg': True,
+    'fulfilment_rate': True,
+    'average_response_time': False,
+}
+
+SCORECARD_TOTAL_ID = 1
+
+SCORECARD_FIELDS = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfilment_rate', 'score')
+
+# Weighted sum of the vendor rates, with the 0-5 quality rating scaled to 0-1
+def compute_score(metrics):
+    weights = settings.SCORECARD_WEIGHTS
+    return (
+        weights['on_time_delivery_rate'] * metrics['on_time_delivery_rate']
+        + weights['quality_rating_avg'] * metrics['quality_rating_avg'] / 5
+        + weights['fulfilment_rate'] * metrics['fulfilment_rate']
+    )
+
+# Add count to the scorecard total. A missing row is left alone; scorecard_total rebuilds it.
+def add_to_scorecard_total(count):
+    if count:
+        VendorScorecardTotal.objects.filter(pk=SCORECARD_TOTAL_ID).update(vendors=F('vendors') + count)
+
+# Reset the total row to a full count of the scorecards; returns the count
+def recount_scorecard_total():
+    total = VendorScorecard.objects.count()
+    VendorScorecardTotal.objects.update_or_create(pk=SCORECARD_TOTAL_ID, defaults={'vendors': total})
+    return total
+
+# Number of scorecards, read from the total row; counted once if the row is missing
+def scorecard_total():
+    total = VendorScorecardTotal.objects.filter(pk=SCORECARD_TOTAL_ID).values_list('vendors', flat=True).first()
+    return recount_scorecard_total() if total is None else total
+
+# Upsert the scorecards of the vendors whose metrics were just written, with one bulk query.
+# metrics_by_vendor maps vendor id to the vendor metric fields. Scorecards that did not exist
+# yet (a primary key lookup per vendor) are added to the total. When some are missing, they are
+# counted again under the total row lock: two first writes of one vendor then take turns, and
+# the second sees the scorecard the first inserted instead of adding it to the total again.
+# Updates of existing scorecards take no lock.
+def refresh_vendor_scorecards(metrics_by_vendor):
+    now = timezone.now()
+    scorecards = []
+    for vendor_id, metrics in metrics_by_vendor.items():
+        values = {field: float(metrics[field]) for field in SCORECARD_FIELDS if field != 'score'}
+        scorecards.append(VendorScorecard(vendor_id=vendor_id, score=compute_score(values), updated_at=now, **values))
+    existing_scorecards = VendorScorecard.objects.filter(vendor_id__in=list(metrics_by_vendor))
+    with transaction.atomic():
+        existing = existing_scorecards.count()
+        if existing < len(scorecards):
+            list(VendorScorecardTotal.objects.select_for_update().filter(pk=SCORECARD_TOTAL_ID))
+            existing = existing_scorecards.count()
+        VendorScorecard.objects.bulk_create(
+            scorecards, update_conflicts=True, unique_fields=['vendor'], update_fields=[*SCORECARD_FIELDS, 'updated_at']
+        )
+        add_to_scorecard_total(len(scorecards) - existing)
+
+def _ordering(metric):
+    return (f'-{metric}', 'vendor_id') if SCORECARD_METRICS[metric] else (metric, 'vendor_id')
+
+# Top vendors by one metric, read from the (metric, vendor) index.
+# Ties share the rank of the first vendor with that value.
+def top_vendors(metric, limit):
+    scorecards = list(VendorScorecard.objects.select_related('vendor').order_by(*_ordering(metric))[:limit])
+    rank = 0
+    previous = None
+    for position, scorecard in enumerate(scorecards, start=1):
+        value = getattr(scorecard, metric)
+        if value != previous:
+            rank, previous = position, value
+        scorecard.rank = rank
+    return scorecards
+
+# Rank and percentile of one vendor for every metric. Each rank counts the vendors placed
+# strictly ahead by walking the metric's index from the top: O(log n + k) for k vendors ahead,
+# so close to O(n) index entries for vendors near the bottom, though no table rows are read.
+# The total comes from the maintained total row; the percentile is the share of vendors the
+# vendor ranks level with or ahead of.
+def vendor_ranks(scorecard):
+    total = scorecard_total()
+    ranks = {}
+    for metric, descending in SCORECARD_METRICS.items():
+        value = getattr(scorecard, metric)
+        ahead = VendorScorecard.objects.filter(**{f'{metric}__gt' if descending else f'{metric}__lt': value}).count()
+        ranks[metric] = {
+            'value': value,
+            'rank': ahead + 1,
+            'percentile': round(100 * max(total - ahead, 0) / max(total, 1), 2),
+        }
+    return {'vendor': scorecard.vendor_id, 'vendors': total, 'ranks': ranks}
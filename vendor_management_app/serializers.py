@@ -1,17 +1,172 @@
+from functools import lru_cache
+from django.conf import settings
+from django.db.models import QuerySet
 from rest_framework import serializers
-from .models import Vendor, PurchaseOrder, HistoricalPerformance
+from .encoders import RowEncoder
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricWindow, VendorScorecard
 
-class VendorSerializer(serializers.ModelSerializer):
+# Sparse fieldsets: fields=(...) keeps only the named fields
+class SparseFieldsMixin:
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class VendorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Vendor
-        fields = '__all__'
+        exclude = ['metrics_version']
         
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = '__all__'
         
+# Read-only fast path for list responses of a plain ModelSerializer. Querysets are read with
+# .values() and model instances through their column attributes; either way the rows are
+# encoded by a RowEncoder built once per class and fieldset, producing the same data as serializer_class.
+class FastListSerializer:
+    serializer_class = None
+    _encoders = {}
+
+    def __init__(self, instance, many=True, fields=None):
+        self.instance = instance
+        self.fields = fields
+
+    @classmethod
+    def encoder(cls, fields=None):
+        key = (cls, fields)
+        if key not in cls._encoders:
+            encoder = RowEncoder(cls.serializer_class, fields)
+            opts = cls.serializer_class.Meta.model._meta
+            attnames = tuple(opts.get_field(column).attname for column in encoder.columns)
+            cls._encoders[key] = (encoder, attnames)
+        return cls._encoders[key]
+
+    @property
+    def data(self):
+        encoder, attnames = self.encoder(self.fields)
+        if isinstance(self.instance, QuerySet):
+            return [encoder.encode(row) for row in self.instance.values(*encoder.columns)]
+        columns = tuple(zip(encoder.columns, attnames))
+        return [
+            encoder.encode({column: getattr(item, attname) for column, attname in columns})
+            for item in self.instance
+        ]
+
+class FastVendorSerializer(FastListSerializer):
+    serializer_class = VendorSerializer
+
+class FastPurchaseOrderSerializer(FastListSerializer):
+    serializer_class = PurchaseOrderSerializer
+
+FAST_SERIALIZERS = {
+    VendorSerializer: FastVendorSerializer,
+    PurchaseOrderSerializer: FastPurchaseOrderSerializer,
+}
+
+# Serializer class for a list response: the fast one if the endpoint (URL name) serving the
+# request is listed in FAST_SERIALIZER_ENDPOINTS
+def list_serializer_class(request, serializer_class):
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.url_name in settings.FAST_SERIALIZER_ENDPOINTS:
+        return FAST_SERIALIZERS.get(serializer_class, serializer_class)
+    return serializer_class
+
+@lru_cache(maxsize=None)
+def _field_sources(serializer_class):
+    return {name: field.source for name, field in serializer_class().fields.items()}
+
+# Serializer fields named by ?fields=a,b (in declaration order), or None for all of them.
+# Raises ValueError for a name the serializer does not have.
+def requested_fields(request, serializer_class):
+    value = getattr(request, 'query_params', {}).get('fields')
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    sources = _field_sources(serializer_class)
+    unknown = sorted(names - set(sources))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    return tuple(name for name in sources if name in names)
+
+# Model fields to load with .only() for the serializer fields, plus any the caller needs (e.g. the ordering)
+def projected_columns(serializer_class, fields, extra=()):
+    sources = _field_sources(serializer_class)
+    return tuple(dict.fromkeys([*(sources[name] for name in fields), *extra]))
+
+# Validates bulk PO rows against a preloaded set of vendor ids instead of querying per row
+class PurchaseOrderBulkSerializer(serializers.ModelSerializer):
+    vendor = serializers.IntegerField()
+
+    class Meta:
+        model = PurchaseOrder
+        fields = '__all__'
+
+    def validate_vendor(self, value):
+        if value not in self.context['vendor_ids']:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return value
+
+# Validates imported vendor rows. Rows are upserted on vendor_code, so an existing code is
+# not a validation error; the metric fields are derived from purchase orders and not imported.
+class VendorImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Vendor
+        fields = ('vendor_code', 'name', 'contact_details', 'address')
+        extra_kwargs = {'vendor_code': {'validators': []}}
+
 class HistoricalPerformanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistoricalPerformance
         fields = '__all__'
+
+# One time bucket of averaged HistoricalPerformance snapshots
+class HistoricalPerformanceBucketSerializer(serializers.Serializer):
+    date = serializers.DateTimeField(source='bucket')
+    on_time_delivery_rate = serializers.FloatField()
+    quality_rating_avg = serializers.FloatField()
+    average_response_time = serializers.FloatField()
+    fulfilment_rate = serializers.FloatField()
+    samples = serializers.IntegerField()
+
+# Rolling window of a vendor; the metric fields are set from the counters by the service
+class VendorMetricWindowSerializer(serializers.ModelSerializer):
+    on_time_delivery_rate = serializers.FloatField()
+    quality_rating_avg = serializers.FloatField()
+    average_response_time = serializers.FloatField()
+    fulfilment_rate = serializers.FloatField()
+
+    class Meta:
+        model = VendorMetricWindow
+        fields = ('days', 'start', 'end', 'completed_count', 'on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfilment_rate')
+
+# Leaderboard row; rank is set by scorecards.top_vendors
+class VendorScorecardSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='vendor.name')
+    vendor_code = serializers.CharField(source='vendor.vendor_code')
+    rank = serializers.IntegerField()
+
+    class Meta:
+        model = VendorScorecard
+        fields = ['rank', 'vendor', 'name', 'vendor_code', 'score', 'on_time_delivery_rate', 'quality_rating_avg',
+                  'fulfilment_rate', 'average_response_time']
+
+# Row of analytics.fleet_vendor_metrics
+class VendorAnalyticsSerializer(serializers.Serializer):
+    vendor_id = serializers.IntegerField()
+    completed_count = serializers.IntegerField()
+    on_time_delivery_rate = serializers.FloatField()
+    quality_rating_avg = serializers.FloatField()
+    average_response_time = serializers.FloatField()
+    fulfilment_rate = serializers.FloatField()
+
+# Row of analytics.vendor_metric_trends
+class VendorTrendSerializer(serializers.Serializer):
+    date = serializers.DateTimeField()
+    completed_count = serializers.IntegerField()
+    on_time_delivery_rate = serializers.FloatField()
+    quality_rating_avg = serializers.FloatField()
+    average_response_time = serializers.FloatField()
+    fulfilment_rate = serializers.FloatField()
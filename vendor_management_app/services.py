@@ -1,38 +1,59 @@
+import csv
+import zipfile
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from rest_framework.response import Response
-from django.db.models import Count, Avg, F
-from django.db.models.functions import Coalesce
+from datetime import datetime, time
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
 from django.http import JsonResponse
-from vendor_management_app.models import HistoricalPerformance, PurchaseOrder, Vendor
-from vendor_management_app.serializers import HistoricalPerformanceSerializer, PurchaseOrderSerializer, VendorSerializer
-
-def update_vendor_metrics(vendor):
-    # On-Time Delivery Rate
-    completed_purchases = PurchaseOrder.objects.filter(vendor=vendor, status='completed')
-    on_time_deliveries = completed_purchases.filter(delivery_date__lte=F('acknowledgment_date'))
-    on_time_delivery_rate = on_time_deliveries.count() / completed_purchases.count() if completed_purchases.count() > 0 else 0
-    vendor.on_time_delivery_rate = on_time_delivery_rate
-
-    # Quality Rating Average
-    quality_rating_avg = completed_purchases.filter(quality_rating__isnull=False).aggregate(average=Avg('quality_rating'))['average']
-    vendor.quality_rating_avg = quality_rating_avg if quality_rating_avg is not None else 0.0
-
-    # Average Response Time
-    response_times = completed_purchases.filter(acknowledgment_date__isnull=False).annotate(
-        response_time=Coalesce('acknowledgment_date', F('issue_date')) - F('issue_date')
-    )
-    avg_response_time = response_times.aggregate(average=Avg('response_time'))['average']
-    vendor.average_response_time = avg_response_time.total_seconds() if avg_response_time is not None else 0.0
+from vendor_management_app.analytics import fleet_vendor_metrics, vendor_metric_trends
+from vendor_management_app.caching import get_request_vendor_data, invalidate_vendor, vendor_cache_stats
+from vendor_management_app.events import append_created_events
+from vendor_management_app.exports import EXPORT_FORMATS, stream_export
+from vendor_management_app.imports import IMPORT_FORMATS, import_format, import_rows, import_vendors
+from vendor_management_app.metrics import VENDOR_METRIC_FIELDS, astore_vendor_metrics, derive_vendor_metrics, rebuild_vendor_aggregates, store_vendor_metrics
+from vendor_management_app.models import HistoricalPerformance, PurchaseOrder, Vendor, VendorScorecard
+from vendor_management_app.pagination import PURCHASE_ORDER_ORDERING, VENDOR_ORDERING, paginated_response
+from vendor_management_app.scorecards import SCORECARD_METRICS, top_vendors, vendor_ranks
+from vendor_management_app.serializers import HistoricalPerformanceBucketSerializer, HistoricalPerformanceSerializer, PurchaseOrderBulkSerializer, PurchaseOrderSerializer, VendorAnalyticsSerializer, VendorMetricWindowSerializer, VendorScorecardSerializer, VendorSerializer, VendorTrendSerializer, list_serializer_class, projected_columns, requested_fields
+from vendor_management_app.tasks import enqueue_vendor_metric, enqueue_vendor_metrics, mark_metrics_staleness
+from vendor_management_app.windows import rebuild_vendor_daily_metrics, vendor_metric_windows
+
+PERFORMANCE_BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
 
-    # Fulfilment Rate
-    fulfilled_purchases = completed_purchases.exclude(quality_rating__lt=3)  # Example condition for successful fulfilment
-    fulfilment_rate = fulfilled_purchases.count() / completed_purchases.count() if completed_purchases.count() > 0 else 0
-    vendor.fulfilment_rate = fulfilment_rate
+# A date-only value is combined with default_time, so ?to=YYYY-MM-DD covers the whole day
+# (parse_datetime would read it as midnight)
+def _parse_datetime_param(value, default_time):
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.combine(day, default_time)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
-    vendor.save()
+# Vendor metrics are derived from the running aggregate kept up to date by the PurchaseOrder signals.
+# recompute=True rebuilds the aggregate first with a single aggregate() query.
+# Only the metric columns are written, see store_vendor_metrics.
+def update_vendor_metrics(vendor, recompute=False):
+    metrics = store_vendor_metrics(vendor.id, rebuild=recompute)
+    for field, value in (metrics or {}).items():
+        setattr(vendor, field, value)
     
 # Create a new vendor
+# A new vendor has no purchase orders, so its metrics are the model defaults; there is nothing to recompute
 def create_vendor(request):
     data = request.data
     vendor = Vendor.objects.create(
@@ -40,41 +61,129 @@ def create_vendor(request):
         contact_details = data['contact_details'],
         address = data['address'],
         vendor_code = data['vendor_code'],
-        on_time_delivery_rate = data['on_time_delivery_rate'],
-        quality_rating_avg = data['quality_rating_avg'],
-        average_response_time = data['average_response_time'],
-        fulfilment_rate = data['fulfilment_rate']
     )
-    update_vendor_metrics(vendor)
     serializer = VendorSerializer(vendor)
     return Response(serializer.data)
 
+# Upsert vendors from an uploaded CSV or XLSX file (multipart field "file"), matched on vendor_code.
+# Invalid rows are reported back with their row number; valid rows are written in chunks.
+def import_vendor_file(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'message': 'Upload a CSV or XLSX file in the "file" field.'}, status=400)
+    file_format = import_format(upload.name)
+    if file_format is None:
+        return Response({'message': f"File must be one of {', '.join(IMPORT_FORMATS)}."}, status=400)
+    try:
+        chunk_size = int(request.query_params.get('chunk_size', settings.VENDOR_IMPORT_CHUNK_SIZE))
+    except ValueError:
+        return Response({'message': 'chunk_size must be an integer.'}, status=400)
+    try:
+        result = import_vendors(import_rows(upload, file_format), max(1, chunk_size))
+    except (ValueError, KeyError, csv.Error, zipfile.BadZipFile) as exc:
+        return Response({'message': f'Could not read {file_format} file - {exc}'}, status=400)
+    succeeded = result['created'] + result['updated']
+    return Response(result, status=400 if result['failed'] and not succeeded else 200)
+
+# ?fields=a,b of a request, or a 400 response for unknown field names
+def _requested_fields(request, serializer_class):
+    try:
+        return requested_fields(request, serializer_class), None
+    except ValueError as exc:
+        return None, Response({'message': str(exc)}, status=400)
+
 #  List all vendors
+#  ?fields= restricts the columns loaded and the fields returned
 def get_vendor_list(request):
+    fields, error = _requested_fields(request, VendorSerializer)
+    if error is not None:
+        return error
     vendors = Vendor.objects.all()
-    serializer = VendorSerializer(vendors, many=True)
+    export_format = request.query_params.get('format')
+    if export_format in EXPORT_FORMATS:
+        return stream_export(vendors.order_by('id'), VendorSerializer, export_format, 'vendors', fields)
+    if fields is not None:
+        vendors = vendors.only(*projected_columns(VendorSerializer, fields, VENDOR_ORDERING))
+    serializer_class = list_serializer_class(request, VendorSerializer)
+    page = paginated_response(request, vendors, VENDOR_ORDERING, serializer_class, fields)
+    if page is not None:
+        return page
+    serializer = serializer_class(vendors, many=True, fields=fields)
     return Response(serializer.data)    
 
-# Retrieve a specific vendor's details
+# Retrieve a specific vendor's details, projected from the cached representation when ?fields= is given
 def get_vendor_detail(request, pk):    
-    vendor = Vendor.objects.get(id=pk)
-    serializer = VendorSerializer(vendor)
-    return Response(serializer.data)
+    fields, error = _requested_fields(request, VendorSerializer)
+    if error is not None:
+        return error
+    data = get_request_vendor_data(request, pk)
+    if fields is not None:
+        data = {name: data[name] for name in fields}
+    return mark_metrics_staleness(Response(data), pk)
+
+# Save the validated detail fields of a vendor. The metric columns and metrics_version belong to
+# the metrics module, and writing back the values read here would undo a recompute that ran in between.
+def save_vendor_details(vendor, validated_data):
+    detail_fields = [field for field in validated_data if field not in VENDOR_METRIC_FIELDS]
+    for field in detail_fields:
+        setattr(vendor, field, validated_data[field])
+    vendor.save(update_fields=[*detail_fields, 'updated_at'])
 
 # Update a vendor's details
+# The recompute also invalidates the cached vendor.
 def update_vendor(request, pk):
     data = request.data
     vendor = Vendor.objects.get(id=pk)
     serializer = VendorSerializer(instance=vendor, data=data)
     if serializer.is_valid():
-        serializer.save()
+        save_vendor_details(vendor, serializer.validated_data)
         update_vendor_metrics(vendor)
     return Response(serializer.data)
 
+# Top vendors from the scorecard table
+# ?sort= picks the ranking metric (composite score by default), ?limit= the number of vendors
+def get_vendor_leaderboard(request):
+    sort = request.query_params.get('sort', 'score')
+    if sort not in SCORECARD_METRICS:
+        return Response({'message': f"sort must be one of {', '.join(SCORECARD_METRICS)}."}, status=400)
+    try:
+        limit = int(request.query_params.get('limit', settings.LEADERBOARD_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'message': 'limit must be an integer.'}, status=400)
+    limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+    serializer = VendorScorecardSerializer(top_vendors(sort, limit), many=True)
+    return Response(serializer.data)
+
+# Rank and percentile of a vendor for the score and each metric
+def get_vendor_rank(request, pk):
+    try:
+        scorecard = VendorScorecard.objects.get(vendor_id=pk)
+    except (VendorScorecard.DoesNotExist, ValueError):
+        return Response({'message': 'Vendor not found.'}, status=404)
+    return Response(vendor_ranks(scorecard))
+
+# Metrics of a vendor over the rolling windows of VENDOR_METRIC_WINDOWS days ending today (UTC),
+# read from the window counters instead of the vendor's whole purchase order history
+def get_vendor_metric_windows(request, pk):
+    try:
+        vendor_id = Vendor.objects.values_list('id', flat=True).get(id=pk)
+    except (Vendor.DoesNotExist, ValueError):
+        return Response({'message': 'Vendor not found.'}, status=404)
+    windows = vendor_metric_windows(vendor_id)
+    for window in windows:
+        for field, value in derive_vendor_metrics(window).items():
+            setattr(window, field, value)
+    return Response({'vendor': vendor_id, 'windows': VendorMetricWindowSerializer(windows, many=True).data})
+
+# Hit and miss counters of the vendor cache
+def get_vendor_cache_stats(request):
+    return Response(vendor_cache_stats())
+
 # Delete a vendor
 def delete_vendor(request, pk):
     vendor = Vendor.objects.get(id=pk)
     vendor.delete()
+    invalidate_vendor(pk)
     return Response('Vendor is deleted !')
 
 # Create a purchase order
@@ -94,24 +203,99 @@ def create_purchase_order(request):
         issue_date = data['issue_date'],
         acknowledgment_date = data['acknowledgment_date']
     )
-    update_vendor_metrics(vendor_instance)
+    enqueue_vendor_metric(vendor_instance.id)
     serializer = PurchaseOrderSerializer(purchase_order)
-    return Response(serializer.data)
+    return mark_metrics_staleness(Response(serializer.data), vendor_instance.id)
+
+# Create purchase orders in bulk from a JSON array or NDJSON body.
+# Invalid rows are reported back, valid rows are inserted in chunks in one transaction.
+# bulk_create bypasses the signals, so the created events are appended and the aggregates and day
+# buckets of the affected vendors rebuilt here, and their metrics are queued for a recompute once per vendor.
+def bulk_create_purchase_orders(request):
+    rows = request.data
+    if not isinstance(rows, list):
+        return Response({'message': 'Expected a list of purchase orders.'}, status=400)
+    try:
+        chunk_size = max(1, int(request.query_params.get('chunk_size', settings.PURCHASE_ORDER_BULK_CHUNK_SIZE)))
+    except ValueError:
+        return Response({'message': 'chunk_size must be an integer.'}, status=400)
+
+    requested_vendor_ids = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if isinstance(row.get('vendor'), dict):
+            row['vendor'] = row['vendor'].get('id')
+        try:
+            requested_vendor_ids.add(int(row.get('vendor')))
+        except (TypeError, ValueError):
+            pass
+    vendor_ids = set(Vendor.objects.filter(id__in=requested_vendor_ids).values_list('id', flat=True))
+
+    created_ids = []
+    errors = []
+    affected_vendor_ids = set()
+    with transaction.atomic():
+        for start in range(0, len(rows), chunk_size):
+            purchase_orders = []
+            for index, row in enumerate(rows[start:start + chunk_size], start=start):
+                if not isinstance(row, dict):
+                    errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+                    continue
+                serializer = PurchaseOrderBulkSerializer(data=row, context={'vendor_ids': vendor_ids})
+                if not serializer.is_valid():
+                    errors.append({'index': index, 'errors': serializer.errors})
+                    continue
+                data = serializer.validated_data
+                data['vendor_id'] = data.pop('vendor')
+                purchase_orders.append(PurchaseOrder(**data))
+                affected_vendor_ids.add(data['vendor_id'])
+            created = PurchaseOrder.objects.bulk_create(purchase_orders)
+            append_created_events(PurchaseOrder.objects.filter(id__in=[purchase_order.id for purchase_order in created]))
+            created_ids.extend(purchase_order.id for purchase_order in created)
+
+        affected_vendor_ids = sorted(affected_vendor_ids)
+        for start in range(0, len(affected_vendor_ids), chunk_size):
+            rebuild_vendor_aggregates(affected_vendor_ids[start:start + chunk_size])
+            rebuild_vendor_daily_metrics(affected_vendor_ids[start:start + chunk_size])
+        enqueue_vendor_metrics(affected_vendor_ids)
+
+    response_data = {'created': len(created_ids), 'failed': len(errors), 'ids': created_ids, 'errors': errors}
+    return Response(response_data, status=400 if errors and not created_ids else 200)
 
 # List all purchase orders with an option to filter by vendor.
 def get_purchase_orders_list(request):
+    fields, error = _requested_fields(request, PurchaseOrderSerializer)
+    if error is not None:
+        return error
     vendor_id = request.query_params.get('vendor_id', None)    
     if vendor_id is not None:
         purchase_orders = PurchaseOrder.objects.filter(vendor_id=vendor_id)
     else:        
         purchase_orders = PurchaseOrder.objects.all()
-    serializer = PurchaseOrderSerializer(purchase_orders, many=True)
+    export_format = request.query_params.get('format')
+    if export_format in EXPORT_FORMATS:
+        return stream_export(purchase_orders.order_by('id'), PurchaseOrderSerializer, export_format, 'purchase_orders', fields)
+    if fields is not None:
+        # The ordering columns are loaded too so cursors need no extra query per row
+        purchase_orders = purchase_orders.only(*projected_columns(PurchaseOrderSerializer, fields, PURCHASE_ORDER_ORDERING))
+    serializer_class = list_serializer_class(request, PurchaseOrderSerializer)
+    page = paginated_response(request, purchase_orders, PURCHASE_ORDER_ORDERING, serializer_class, fields)
+    if page is not None:
+        return page
+    serializer = serializer_class(purchase_orders, many=True, fields=fields)
     return Response(serializer.data)    
 
 # Retrieve details of a specific purchase order
 def get_purchase_order_detail(request, pk):        
-    purchase_order = PurchaseOrder.objects.get(id=pk)
-    serializer = PurchaseOrderSerializer(purchase_order)
+    fields, error = _requested_fields(request, PurchaseOrderSerializer)
+    if error is not None:
+        return error
+    purchase_orders = PurchaseOrder.objects.all()
+    if fields is not None:
+        purchase_orders = purchase_orders.only(*projected_columns(PurchaseOrderSerializer, fields))
+    purchase_order = purchase_orders.get(id=pk)
+    serializer = PurchaseOrderSerializer(purchase_order, fields=fields)
     return Response(serializer.data)
 
 # Update a purchase order
@@ -121,8 +305,8 @@ def update_purchase_order(request, pk):
     serializer = PurchaseOrderSerializer(instance=purchase_orders, data=data)
     if serializer.is_valid():
         serializer.save()
-        update_vendor_metrics(purchase_orders.vendor)
-    return Response(serializer.data)
+        enqueue_vendor_metric(purchase_orders.vendor_id)
+    return mark_metrics_staleness(Response(serializer.data), purchase_orders.vendor_id)
 
 # Delete a purchase order
 def delete_purchase_order(request, pk):
@@ -131,9 +315,72 @@ def delete_purchase_order(request, pk):
     return Response('Purchase Order is deleted !')
 
 # Retrieve a vendor's performance metrics
+# ?from= / ?to= filter the snapshots, ?bucket=day|week|month averages them per bucket in the database
 def get_historical_performance_detail(request, pk):    
     historical_performance = HistoricalPerformance.objects.filter(vendor__id=pk)
-    serializer = HistoricalPerformanceSerializer(historical_performance, many=True)
+    try:
+        date_from = _parse_datetime_param(request.query_params.get('from'), time.min)
+        date_to = _parse_datetime_param(request.query_params.get('to'), time.max)
+    except ValueError:
+        return Response({'message': 'from and to must be ISO 8601 dates or datetimes.'}, status=400)
+    if date_from is not None:
+        historical_performance = historical_performance.filter(date__gte=date_from)
+    if date_to is not None:
+        historical_performance = historical_performance.filter(date__lte=date_to)
+
+    bucket = request.query_params.get('bucket')
+    if bucket is not None:
+        if bucket not in PERFORMANCE_BUCKETS:
+            return Response({'message': f"bucket must be one of {', '.join(PERFORMANCE_BUCKETS)}."}, status=400)
+        buckets = (
+            historical_performance
+            .annotate(bucket=PERFORMANCE_BUCKETS[bucket]('date'))
+            .values('bucket')
+            .annotate(
+                on_time_delivery_rate=Avg('on_time_delivery_rate'),
+                quality_rating_avg=Avg('quality_rating_avg'),
+                average_response_time=Avg('average_response_time'),
+                fulfilment_rate=Avg('fulfilment_rate'),
+                samples=Count('id'),
+            )
+            .order_by('bucket')
+        )
+        serializer = HistoricalPerformanceBucketSerializer(buckets, many=True)
+        return Response(serializer.data)
+
+    serializer = HistoricalPerformanceSerializer(historical_performance.order_by('date'), many=True)
+    return Response(serializer.data)
+
+# Metrics of every vendor computed in one vectorized pass over the purchase orders
+# ?vendor_id= (repeatable) limits it to some vendors
+def get_fleet_analytics(request):
+    vendor_ids = request.query_params.getlist('vendor_id') or None
+    try:
+        frame = fleet_vendor_metrics([int(vendor_id) for vendor_id in vendor_ids] if vendor_ids else None)
+    except ValueError:
+        return Response({'message': 'vendor_id must be an integer.'}, status=400)
+    serializer = VendorAnalyticsSerializer(frame.reset_index().to_dict('records'), many=True)
+    return Response(serializer.data)
+
+# Rolling-window metric trend of a vendor
+# ?window= trailing window in days (e.g. 30D), ?freq= sampling period (pandas alias, e.g. W or M), ?from= / ?to=
+def get_vendor_trends(request, pk):
+    try:
+        vendor_id = int(pk)
+    except ValueError:
+        return Response({'message': 'Vendor not found.'}, status=404)
+    window = request.query_params.get('window', '30D')
+    freq = request.query_params.get('freq', 'W')
+    try:
+        date_from = _parse_datetime_param(request.query_params.get('from'), time.min)
+        date_to = _parse_datetime_param(request.query_params.get('to'), time.max)
+        if pd.Timedelta(window) % pd.Timedelta(days=1) or pd.Timedelta(window) <= pd.Timedelta(0):
+            raise ValueError(window)
+        to_offset(freq)
+    except ValueError:
+        return Response({'message': 'window must be a whole number of days, freq a pandas offset alias and from/to ISO 8601 dates.'}, status=400)
+    frame = vendor_metric_trends([vendor_id], window=window, freq=freq, date_from=date_from, date_to=date_to)
+    serializer = VendorTrendSerializer(frame.to_dict('records'), many=True)
     return Response(serializer.data)
 
 # Vendor's acknowledgement
@@ -145,7 +392,30 @@ def acknowledge_purchase_order_services(pk, request=None):
             return JsonResponse({'message': 'Purchase order already acknowledged.'}, status=400)        
         purchase_order.acknowledgment_date = timezone.now()
         purchase_order.save()        
-        update_vendor_metrics(purchase_order.vendor)
-        return JsonResponse({'message': 'Purchase order acknowledged successfully.'}, status=200)
+        enqueue_vendor_metric(purchase_order.vendor_id)
+        response = JsonResponse({'message': 'Purchase order acknowledged successfully.'}, status=200)
+        return mark_metrics_staleness(response, purchase_order.vendor_id)
+    except PurchaseOrder.DoesNotExist:
+        return JsonResponse({'message': 'Purchase order not found.'}, status=404)
+
+
+# Async variants used by the ASGI views
+
+async def aupdate_vendor_metrics(vendor_id, recompute=False):
+    await astore_vendor_metrics(vendor_id, rebuild=recompute)
+
+async def aacknowledge_purchase_order(pk):
+    try:
+        purchase_order = await PurchaseOrder.objects.aget(id=pk)
     except PurchaseOrder.DoesNotExist:
         return JsonResponse({'message': 'Purchase order not found.'}, status=404)
+    if purchase_order.acknowledgment_date:
+        return JsonResponse({'message': 'Purchase order already acknowledged.'}, status=400)
+    purchase_order.acknowledgment_date = timezone.now()
+    await purchase_order.asave()
+    if settings.METRICS_QUEUE_MODE == 'sync':
+        await aupdate_vendor_metrics(purchase_order.vendor_id)
+    else:
+        await sync_to_async(enqueue_vendor_metric)(purchase_order.vendor_id)
+    response = JsonResponse({'message': 'Purchase order acknowledged successfully.'}, status=200)
+    return await sync_to_async(mark_metrics_staleness)(response, purchase_order.vendor_id)
@@ -0,0 +1,68 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from vendor_management_app.events import record_purchase_order_event
+from vendor_management_app.metrics import VENDOR_METRIC_FIELDS, apply_contribution_delta, empty_contribution, purchase_order_contribution, purchase_order_state
+from vendor_management_app.models import PurchaseOrder, Vendor, VendorScorecard
+from vendor_management_app.scorecards import add_to_scorecard_total, refresh_vendor_scorecards
+from vendor_management_app.streams import publish_purchase_order_status
+from vendor_management_app.windows import apply_window_delta
+
+def _is_vendor_cascade(origin):
+    # The vendor's aggregate row is deleted along with it, nothing to maintain
+    return isinstance(origin, Vendor) or getattr(origin, 'model', None) is Vendor
+
+def _apply_state_change(before, after):
+    apply_window_delta(before, after)
+    before_contribution = purchase_order_contribution(before)
+    after_contribution = purchase_order_contribution(after)
+    if before is not None and after is not None and before['vendor_id'] != after['vendor_id']:
+        apply_contribution_delta(before['vendor_id'], before_contribution, empty_contribution())
+        apply_contribution_delta(after['vendor_id'], empty_contribution(), after_contribution)
+    elif before is not None or after is not None:
+        vendor_id = (after or before)['vendor_id']
+        apply_contribution_delta(vendor_id, before_contribution, after_contribution)
+
+# Remember the stored state of a purchase order before it is overwritten
+@receiver(pre_save, sender=PurchaseOrder)
+def capture_purchase_order_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._metric_state_before = purchase_order_state(instance.pk) if instance.pk else None
+
+@receiver(post_save, sender=PurchaseOrder)
+def update_aggregate_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, '_metric_state_before', None)
+    after = purchase_order_state(instance.pk)
+    _apply_state_change(before, after)
+    record_purchase_order_event(instance.pk, before, after)
+    if after is not None and (before is None or before['status'] != after['status']):
+        publish_purchase_order_status(instance.pk, after['vendor_id'], after['status'])
+
+@receiver(pre_delete, sender=PurchaseOrder)
+def capture_purchase_order_state_on_delete(sender, instance, origin=None, **kwargs):
+    if _is_vendor_cascade(origin):
+        return
+    instance._metric_state_before = purchase_order_state(instance.pk)
+
+@receiver(post_delete, sender=PurchaseOrder)
+def update_aggregate_on_delete(sender, instance, origin=None, **kwargs):
+    if _is_vendor_cascade(origin):
+        return
+    before = getattr(instance, '_metric_state_before', None)
+    _apply_state_change(before, None)
+    record_purchase_order_event(instance.pk, before or {'vendor_id': instance.vendor_id}, None)
+
+# Metric writes through the metrics module refresh the scorecard themselves; this covers
+# vendors created or saved directly, including their initial metric values
+@receiver(post_save, sender=Vendor)
+def refresh_scorecard_on_vendor_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not update_fields & set(VENDOR_METRIC_FIELDS)):
+        return
+    refresh_vendor_scorecards({instance.id: {field: getattr(instance, field) for field in VENDOR_METRIC_FIELDS}})
+
+# Scorecards are deleted along with their vendor
+@receiver(post_delete, sender=VendorScorecard)
+def update_scorecard_total_on_delete(sender, instance, **kwargs):
+    add_to_scorecard_total(-1)
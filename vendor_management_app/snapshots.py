@@ -0,0 +1,38 @@
+from django.db.models import Max
+from django.utils import timezone
+from vendor_management_app.metrics import METRIC_COUNTERS, derive_vendor_metrics, rebuild_vendor_aggregates
+from vendor_management_app.models import HistoricalPerformance, Vendor, VendorMetricAggregate
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Write a HistoricalPerformance row for every vendor whose metric aggregate changed since the last snapshot.
+# Metrics come from the per-vendor aggregates, so no purchase order is scanned except for vendors
+# that do not have an aggregate yet, which are rebuilt with one GROUP BY query per batch.
+def snapshot_vendor_performance(full=False, batch_size=1000):
+    missing_vendor_ids = Vendor.objects.filter(metric_aggregate__isnull=True).values_list('id', flat=True)
+    for vendor_ids in _batches(missing_vendor_ids.iterator(chunk_size=batch_size), batch_size):
+        rebuild_vendor_aggregates(vendor_ids)
+
+    now = timezone.now()
+    aggregates = VendorMetricAggregate.objects.order_by('vendor_id')
+    last_snapshot = HistoricalPerformance.objects.aggregate(last=Max('date'))['last']
+    if not full and last_snapshot is not None:
+        aggregates = aggregates.filter(updated_at__gt=last_snapshot)
+
+    created = 0
+    rows = aggregates.values_list('vendor_id', *METRIC_COUNTERS, named=True)
+    for batch in _batches(rows.iterator(chunk_size=batch_size), batch_size):
+        HistoricalPerformance.objects.bulk_create([
+            HistoricalPerformance(vendor_id=aggregate.vendor_id, date=now, **derive_vendor_metrics(aggregate))
+            for aggregate in batch
+        ])
+        created += len(batch)
+    return created
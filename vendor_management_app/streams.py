@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+
+#  In-process publish/subscribe of vendor metric and purchase order status changes for the
+#  /api/vendors/stream/ Server-Sent Events endpoint. Writers publish from any thread once their
+#  transaction commits; every subscriber owns a bounded buffer on its event loop, and a subscriber
+#  that falls behind loses its oldest events instead of holding up the writers or other clients.
+
+METRICS_EVENT = 'metrics'
+STATUS_EVENT = 'status'
+
+# The stream never ends, so it needs an ASGI server. Under WSGI Django would collect the
+# async iterator into a list first, holding a worker thread and a growing list per client.
+def streaming_available(request):
+    return isinstance(request, ASGIRequest)
+
+# One connected client. Only touched from its event loop, except through publish().
+class Subscriber:
+    def __init__(self, loop, vendor_ids=None, buffer_size=None):
+        self.loop = loop
+        self.vendor_ids = vendor_ids
+        self.events = deque(maxlen=buffer_size or settings.VENDOR_STREAM_BUFFER_SIZE)
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def wants(self, vendor_id):
+        return self.vendor_ids is None or vendor_id in self.vendor_ids
+
+    def push(self, events):
+        self.dropped += max(len(self.events) + len(events) - self.events.maxlen, 0)
+        self.events.extend(events)
+        self.ready.set()
+
+    # Buffered events and the number dropped since the last call; waits up to timeout for the first one
+    async def drain(self, timeout):
+        if not self.events:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        events, dropped = list(self.events), self.dropped
+        self.events.clear()
+        self.dropped = 0
+        return events, dropped
+
+class Broker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    # Hand the events to the loops of the interested subscribers. events are (type, vendor_id, data).
+    def publish(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            wanted = [event for event in events if subscriber.wants(event[1])]
+            if not wanted:
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, wanted)
+            except RuntimeError:
+                # The subscriber's loop was closed without unsubscribing
+                self.unsubscribe(subscriber)
+
+broker = Broker()
+
+# Publish once the surrounding transaction commits (right away in autocommit mode), so clients
+# never see a change that was rolled back
+def _publish_on_commit(events):
+    if events:
+        transaction.on_commit(lambda: broker.publish(events))
+
+def publish_vendor_metrics(metrics_by_vendor):
+    if not broker.has_subscribers():
+        return
+    _publish_on_commit([
+        (METRICS_EVENT, vendor_id, {field: float(value) for field, value in metrics.items()})
+        for vendor_id, metrics in metrics_by_vendor.items()
+    ])
+
+def publish_purchase_order_status(purchase_order_id, vendor_id, status):
+    if not broker.has_subscribers():
+        return
+    _publish_on_commit([(STATUS_EVENT, vendor_id, {'id': purchase_order_id, 'status': status})])
+
+def _message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+# Server-Sent Events for one subscriber. Metric events only carry the fields that changed since
+# the values last sent to this client; a drop notice tells a slow client to refetch.
+async def event_stream(subscriber):
+    sent_metrics = {}
+    broker.subscribe(subscriber)
+    try:
+        yield f'retry: {settings.VENDOR_STREAM_RETRY_MS}\n\n'
+        while True:
+            events, dropped = await subscriber.drain(settings.VENDOR_STREAM_HEARTBEAT_SECONDS)
+            messages = []
+            if dropped:
+                messages.append(_message('dropped', {'events': dropped}))
+            for event, vendor_id, data in events:
+                if event == METRICS_EVENT:
+                    previous = sent_metrics.setdefault(vendor_id, {})
+                    data = {field: value for field, value in data.items() if previous.get(field) != value}
+                    if not data:
+                        continue
+                    previous.update(data)
+                messages.append(_message(event, {'vendor': vendor_id, **data}))
+            # A comment line keeps idle connections open through proxies
+            yield ''.join(messages) or ': keep-alive\n\n'
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,176 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from vendor_management_app.metrics import refresh_vendor_metrics
+from vendor_management_app.models import MetricRecomputeTask
+
+logger = logging.getLogger(__name__)
+
+#  Vendor metric recomputation off the request path.
+#  METRICS_QUEUE_MODE selects how enqueue_vendor_metrics() runs the work:
+#    sync   - recompute inline, before the response is sent
+#    thread - hand the vendor to an in-process worker pool
+#    db     - record a MetricRecomputeTask row, processed by the process_metric_tasks command
+
+# Called when the app is loaded, so a misspelt mode stops the process instead of quietly
+# recomputing inline
+def check_metrics_queue_mode():
+    mode = settings.METRICS_QUEUE_MODE
+    if mode not in ('sync', 'thread', 'db'):
+        raise ImproperlyConfigured(f"METRICS_QUEUE_MODE must be 'sync', 'thread' or 'db', not {mode!r}.")
+
+# In-process queue. A vendor that is already waiting is not queued again, so a burst of
+# writes for one vendor costs a single recompute. Each vendor waits debounce seconds from its
+# first request so the writes of a burst are merged; workers then take up to batch_size due
+# vendors at a time and refresh them together.
+class VendorMetricQueue:
+    def __init__(self, workers, batch_size, debounce=0):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.debounce = debounce
+        self._heap = []
+        self._waiting = set()
+        self._running = set()
+        self._unfinished = 0
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def put(self, vendor_ids):
+        with self._condition:
+            self._start()
+            due = time.monotonic() + self.debounce
+            for vendor_id in vendor_ids:
+                if vendor_id not in self._waiting:
+                    self._waiting.add(vendor_id)
+                    self._unfinished += 1
+                    heapq.heappush(self._heap, (due, vendor_id))
+            self._condition.notify_all()
+
+    def is_pending(self, vendor_id):
+        with self._condition:
+            return vendor_id in self._waiting or vendor_id in self._running
+
+    def __len__(self):
+        with self._condition:
+            return len(self._waiting)
+
+    # Block until every queued vendor has been processed
+    def join(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._unfinished == 0)
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'vendor-metrics-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._heap or self._heap[0][0] > time.monotonic():
+                self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+            vendor_ids = []
+            while self._heap and self._heap[0][0] <= time.monotonic() and len(vendor_ids) < self.batch_size:
+                vendor_ids.append(heapq.heappop(self._heap)[1])
+            # A write arriving from now on queues the vendor again
+            self._waiting.difference_update(vendor_ids)
+            self._running.update(vendor_ids)
+        return vendor_ids
+
+    def _work(self):
+        while True:
+            vendor_ids = self._take_batch()
+            try:
+                refresh_vendor_metrics(vendor_ids)
+            except Exception:
+                logger.exception("Recomputing metrics of vendors %s failed", vendor_ids)
+            finally:
+                close_old_connections()
+                with self._condition:
+                    self._running.difference_update(vendor_ids)
+                    self._unfinished -= len(vendor_ids)
+                    self._condition.notify_all()
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_metric_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = VendorMetricQueue(settings.METRICS_QUEUE_WORKERS, settings.METRICS_QUEUE_BATCH_SIZE, settings.METRICS_DEBOUNCE_SECONDS)
+        return _queue
+
+def _enqueue_durable(vendor_ids):
+    now = timezone.now()
+    MetricRecomputeTask.objects.bulk_create(
+        [MetricRecomputeTask(vendor_id=vendor_id, first_requested_at=now, requested_at=now) for vendor_id in vendor_ids],
+        update_conflicts=True, unique_fields=['vendor'], update_fields=['requested_at'],
+    )
+
+# Schedule a metrics recompute for the given vendors.
+# The thread queue only sees the vendors once the surrounding transaction commits, the
+# durable task rows are written in the same transaction as the change that caused them.
+def enqueue_vendor_metrics(vendor_ids):
+    vendor_ids = sorted(set(vendor_ids))
+    if not vendor_ids:
+        return
+    mode = settings.METRICS_QUEUE_MODE
+    if mode == 'thread':
+        transaction.on_commit(lambda: get_metric_queue().put(vendor_ids))
+    elif mode == 'db':
+        _enqueue_durable(vendor_ids)
+    else:
+        refresh_vendor_metrics(vendor_ids)
+
+def enqueue_vendor_metric(vendor_id):
+    enqueue_vendor_metrics([vendor_id])
+
+# Whether a recompute for the vendor is still outstanding
+def vendor_metrics_stale(vendor_id):
+    mode = settings.METRICS_QUEUE_MODE
+    if mode == 'thread':
+        return get_metric_queue().is_pending(int(vendor_id))
+    if mode == 'db':
+        return MetricRecomputeTask.objects.filter(vendor_id=vendor_id).exists()
+    return False
+
+def mark_metrics_staleness(response, vendor_id):
+    response['X-Metrics-Stale'] = 'true' if vendor_metrics_stale(vendor_id) else 'false'
+    return response
+
+# Drain the durable queue. Each batch is claimed, recomputed and deleted in one transaction;
+# on databases that support it, locked rows are skipped so several workers can run at once.
+# A task is due debounce seconds after its first request, and only tasks not re-requested
+# while the batch ran are deleted.
+def process_metric_tasks(batch_size=None, debounce=None):
+    batch_size = batch_size or settings.METRICS_QUEUE_BATCH_SIZE
+    debounce = settings.METRICS_DEBOUNCE_SECONDS if debounce is None else debounce
+    processed = 0
+    while True:
+        with transaction.atomic():
+            due = timezone.now() - timedelta(seconds=debounce)
+            tasks = MetricRecomputeTask.objects.filter(first_requested_at__lte=due).order_by('first_requested_at')
+            if connection.features.has_select_for_update_skip_locked:
+                tasks = tasks.select_for_update(skip_locked=True)
+            claimed = list(tasks.values_list('vendor_id', 'requested_at')[:batch_size])
+            if not claimed:
+                return processed
+            refresh_vendor_metrics(vendor_id for vendor_id, requested_at in claimed)
+            vendors_by_request = {}
+            for vendor_id, requested_at in claimed:
+                vendors_by_request.setdefault(requested_at, []).append(vendor_id)
+            for requested_at, vendor_ids in vendors_by_request.items():
+                MetricRecomputeTask.objects.filter(vendor_id__in=vendor_ids, requested_at=requested_at).delete()
+            # Tasks re-requested meanwhile start a new debounce window
+            MetricRecomputeTask.objects.filter(vendor_id__in=[vendor_id for vendor_id, requested_at in claimed]).update(
+                first_requested_at=F('requested_at')
+            )
+        processed += len(claimed)
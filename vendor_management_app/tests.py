@@ -1,6 +1,51 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import QueryDict
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from .models import Vendor, PurchaseOrder, HistoricalPerformance
+from django.utils.connection import ConnectionDoesNotExist
+from .analytics import fleet_vendor_metrics, vendor_metric_trends
+from .caching import vendor_cache_stats
+from .instrumentation import Histogram, registry
+from .metrics import (
+    CONTRIBUTION_FIELDS,
+    METRIC_COUNTERS,
+    aggregate_purchase_orders,
+    aggregate_purchase_orders_by_vendor,
+    compute_vendor_aggregate,
+    derive_vendor_metrics,
+    empty_contribution,
+    get_vendor_aggregate,
+    purchase_order_contribution,
+    recompute_vendor_metrics,
+    store_vendor_metrics,
+    _write_vendor_metrics,
+)
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorMetricAggregate, MetricRecomputeTask, VendorScorecard, VendorScorecardTotal, PurchaseOrderEvent, VendorDailyMetric, VendorMetricWindow
+from rest_framework.renderers import JSONRenderer
+from .serializers import FastPurchaseOrderSerializer, FastVendorSerializer, PurchaseOrderSerializer, VendorSerializer
+from .middleware import ReplicaRoutingMiddleware
+from .pagination import encode_cursor
+from .routers import ReplicaRouter, read_from_replica
+from .snapshots import snapshot_vendor_performance
+from .streams import Subscriber, broker, event_stream
+from .tasks import VendorMetricQueue, check_metrics_queue_mode, get_metric_queue, process_metric_tasks
+from .windows import rebuild_vendor_daily_metrics, today, vendor_metric_windows
 from .services import (
     update_vendor_metrics,
     create_vendor,
@@ -15,8 +60,14 @@ from .services import (
     update_purchase_order,
     delete_purchase_order,
     get_historical_performance_detail,
+    bulk_create_purchase_orders,
+    get_vendor_leaderboard,
+    get_vendor_rank,
+    get_fleet_analytics,
+    get_vendor_trends,
 )
 
+@override_settings(METRICS_QUEUE_MODE='sync')
 class ServicesTestCase(TestCase):
     def test_create_vendor(self):        
         data = {
@@ -106,7 +157,7 @@ class ServicesTestCase(TestCase):
             fulfilment_rate=4.8,
             )
 
-        request = type('Request', (object,), {})
+        request = type('Request', (object,), {'query_params': {}})
         response = get_vendor_list(request)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 2)  
@@ -152,6 +203,24 @@ class ServicesTestCase(TestCase):
         self.assertEqual(vendor.name, 'Peter Parker')  
         self.assertEqual(vendor.vendor_code, 'PPL')  
 
+    def test_update_vendor_leaves_metric_columns_to_the_metrics_module(self):
+        vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        PurchaseOrder.objects.create(
+            po_number="PO1", vendor=vendor, order_date=timezone.now(), delivery_date=timezone.now(), items={}, quantity=1,
+            status='completed', quality_rating=4, acknowledgment_date=timezone.now(),
+        )
+        update_vendor_metrics(vendor)
+        data = {"name": "Renamed Vendor", "contact_details": "Contact", "address": "Address", "vendor_code": "V1", "quality_rating_avg": 1.0}
+        request = type('Request', (object,), {'data': data})
+        with CaptureQueriesContext(connection) as context:
+            response = update_vendor(request, vendor.id)
+        detail_update = next(query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE "vendor_management_app_vendor"'))
+        self.assertIn('"name"', detail_update)
+        self.assertNotIn('"metrics_version"', detail_update)
+        self.assertNotIn('"quality_rating_avg"', detail_update)
+        self.assertEqual(response.data['name'], 'Renamed Vendor')
+        self.assertEqual(response.data['quality_rating_avg'], 4.0)
+
 
     def test_delete_vendor(self):
             
@@ -330,7 +399,7 @@ class ServicesTestCase(TestCase):
             fulfilment_rate=0.95,
         )
         
-        request = type('Request', (object,), {})  
+        request = type('Request', (object,), {'query_params': {}})  
         response = get_historical_performance_detail(request, vendor.id)        
         
         historical_performance_data = response.data
@@ -370,3 +439,1190 @@ class ServicesTestCase(TestCase):
         self.assertEqual(round(vendor.average_response_time, 2), 0.0)  
         self.assertEqual(vendor.fulfilment_rate, 1.0)
 
+
+class VendorMetricAggregateTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        update_vendor_metrics(self.vendor)
+
+    def create_purchase_order(self, **kwargs):
+        fields = {
+            'po_number': 'PO123',
+            'vendor': self.vendor,
+            'order_date': timezone.now(),
+            'delivery_date': timezone.now(),
+            'items': {},
+            'quantity': 1,
+            'status': 'pending',
+            'quality_rating': None,
+            'acknowledgment_date': None,
+        }
+        fields.update(kwargs)
+        return PurchaseOrder.objects.create(**fields)
+
+    def test_aggregate_follows_purchase_order_state(self):
+        purchase_order = self.create_purchase_order()
+        self.vendor.metric_aggregate.refresh_from_db()
+        self.assertEqual(self.vendor.metric_aggregate.completed_count, 0)
+
+        purchase_order.status = 'completed'
+        purchase_order.quality_rating = 2
+        purchase_order.acknowledgment_date = timezone.now()
+        purchase_order.save()
+        self.create_purchase_order(po_number='PO124', status='completed', quality_rating=5)
+        update_vendor_metrics(self.vendor)
+
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 0.5)
+        self.assertEqual(self.vendor.quality_rating_avg, 3.5)
+        self.assertEqual(self.vendor.fulfilment_rate, 0.5)
+
+        purchase_order.delete()
+        update_vendor_metrics(self.vendor)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 0.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 5.0)
+        self.assertEqual(self.vendor.fulfilment_rate, 1.0)
+
+    def test_rebuild_command_repairs_drift(self):
+        now = timezone.now()
+        self.create_purchase_order(status='completed', quality_rating=4, delivery_date=now, acknowledgment_date=now)
+        VendorMetricAggregate.objects.filter(vendor=self.vendor).update(completed_count=10)
+
+        with self.assertRaises(SystemExit):
+            call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+        call_command('rebuild_vendor_metrics', stdout=StringIO())
+        call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.metric_aggregate.completed_count, 1)
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+
+class MetricsEngineTestCase(TestCase):
+    def setUp(self):
+        self.vendors = [
+            Vendor.objects.create(name=f"Vendor{i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            for i in range(3)
+        ]
+        now = timezone.now()
+        for i, (status, quality_rating) in enumerate([('completed', 4), ('completed', 2), ('completed', None), ('pending', 5)]):
+            for vendor in self.vendors:
+                PurchaseOrder.objects.create(
+                    po_number=f"PO{i}",
+                    vendor=vendor,
+                    order_date=now,
+                    delivery_date=now - timedelta(days=i - 1),
+                    items={},
+                    quantity=1,
+                    status=status,
+                    quality_rating=quality_rating,
+                    acknowledgment_date=now if i else None,
+                )
+
+    def test_single_query_matches_per_purchase_order_contributions(self):
+        vendor = self.vendors[0]
+        expected = empty_contribution()
+        for row in PurchaseOrder.objects.filter(vendor=vendor).values(*CONTRIBUTION_FIELDS):
+            for counter, value in purchase_order_contribution(row).items():
+                expected[counter] += value
+
+        with self.assertNumQueries(1):
+            counters = compute_vendor_aggregate(vendor.id)
+        self.assertEqual(counters['completed_count'], 3)
+        for counter in METRIC_COUNTERS:
+            self.assertAlmostEqual(counters[counter], expected[counter])
+
+    def test_batch_recompute(self):
+        VendorMetricAggregate.objects.all().delete()
+        vendor_ids = [vendor.id for vendor in self.vendors]
+
+        with self.assertNumQueries(1):
+            counters_by_vendor = aggregate_purchase_orders_by_vendor(PurchaseOrder.objects.filter(vendor_id__in=vendor_ids))
+        self.assertEqual(set(counters_by_vendor), set(vendor_ids))
+
+        recompute_vendor_metrics(vendor_ids)
+        for vendor in Vendor.objects.all():
+            self.assertAlmostEqual(vendor.on_time_delivery_rate, 2 / 3)
+            self.assertEqual(vendor.quality_rating_avg, 3.0)
+            self.assertAlmostEqual(vendor.fulfilment_rate, 2 / 3)
+
+@override_settings(METRICS_QUEUE_MODE='sync')
+class BulkPurchaseOrderTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        self.user = User.objects.create_user(username='admin', password='password')
+        self.client.force_login(self.user)
+
+    def purchase_order_row(self, po_number, **kwargs):
+        row = {
+            'po_number': po_number,
+            'vendor': self.vendor.id,
+            'order_date': '2023-11-29T09:00:00Z',
+            'delivery_date': '2023-11-29T10:00:00Z',
+            'items': {'item': 'description'},
+            'quantity': 1,
+            'status': 'completed',
+            'quality_rating': 4,
+            'acknowledgment_date': '2023-11-29T12:00:00Z',
+        }
+        row.update(kwargs)
+        return row
+
+    def test_bulk_create_reports_row_errors(self):
+        rows = [
+            self.purchase_order_row('PO1'),
+            self.purchase_order_row('PO2', vendor=999),
+            self.purchase_order_row('PO3', quantity='many'),
+            self.purchase_order_row('PO4', status='pending'),
+        ]
+        request = type('Request', (object,), {'data': rows, 'query_params': {'chunk_size': 2}})
+        response = bulk_create_purchase_orders(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(PurchaseOrder.objects.count(), 2)
+
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+
+    def test_bulk_create_validates_chunk_size(self):
+        rows = [self.purchase_order_row('PO1'), self.purchase_order_row('PO2')]
+        request = type('Request', (object,), {'data': rows, 'query_params': {'chunk_size': 'abc'}})
+        self.assertEqual(bulk_create_purchase_orders(request).status_code, 400)
+        for chunk_size in ('0', '-5'):
+            request = type('Request', (object,), {'data': list(rows), 'query_params': {'chunk_size': chunk_size}})
+            self.assertEqual(bulk_create_purchase_orders(request).data['created'], 2)
+        self.assertEqual(PurchaseOrder.objects.count(), 4)
+
+    def test_bulk_create_accepts_ndjson(self):
+        body = '\n'.join(json.dumps(self.purchase_order_row(f'PO{i}')) for i in range(3))
+        response = self.client.post('/api/purchase_orders/bulk/', data=body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(PurchaseOrder.objects.filter(vendor=self.vendor).count(), 3)
+
+class StreamingExportTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        for i in range(3):
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i}',
+                vendor=self.vendor,
+                order_date=timezone.now(),
+                delivery_date=timezone.now(),
+                items={'item': f'description {i}'},
+                quantity=i,
+                status='completed',
+                quality_rating=4 if i else None,
+                acknowledgment_date=timezone.now(),
+            )
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def test_ndjson_export_matches_serializer(self):
+        response = self.client.get('/api/purchase_orders/', {'format': 'ndjson', 'vendor_id': self.vendor.id})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        expected = PurchaseOrderSerializer(PurchaseOrder.objects.order_by('id'), many=True).data
+        self.assertEqual(rows, json.loads(json.dumps(expected)))
+
+    def test_csv_export(self):
+        response = self.client.get('/api/vendors/', {'format': 'csv'})
+        self.assertTrue(response.streaming)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(','), list(VendorSerializer().fields))
+        self.assertEqual(len(lines), 2)
+
+class CursorPaginationTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Vendor1", contact_details="Contact", address="Address", vendor_code="V1")
+        other_vendor = Vendor.objects.create(name="Vendor2", contact_details="Contact", address="Address", vendor_code="V2")
+        for i in range(7):
+            for vendor in (self.vendor, other_vendor):
+                PurchaseOrder.objects.create(
+                    po_number=f'PO{i}',
+                    vendor=vendor,
+                    order_date=timezone.now(),
+                    delivery_date=timezone.now(),
+                    items={},
+                    quantity=1,
+                    status='pending',
+                )
+        # Ties on issue_date are broken by id
+        PurchaseOrder.objects.filter(po_number__in=['PO2', 'PO3']).update(issue_date=timezone.now())
+
+    def get_page(self, **query_params):
+        request = type('Request', (object,), {'query_params': query_params})
+        response = get_purchase_orders_list(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_walk_forward_and_back(self):
+        expected = list(PurchaseOrder.objects.filter(vendor=self.vendor).order_by('issue_date', 'id').values_list('id', flat=True))
+
+        seen = []
+        page = self.get_page(vendor_id=self.vendor.id, page_size=3)
+        self.assertIsNone(page['previous'])
+        while True:
+            seen.extend(row['id'] for row in page['results'])
+            if page['next'] is None:
+                break
+            page = self.get_page(vendor_id=self.vendor.id, page_size=3, cursor=page['next'])
+        self.assertEqual(seen, expected)
+
+        page = self.get_page(vendor_id=self.vendor.id, page_size=3, cursor=page['previous'])
+        self.assertEqual([row['id'] for row in page['results']], expected[3:6])
+        page = self.get_page(vendor_id=self.vendor.id, page_size=3, cursor=page['previous'])
+        self.assertEqual([row['id'] for row in page['results']], expected[:3])
+        self.assertIsNone(page['previous'])
+
+    def test_invalid_cursor(self):
+        request = type('Request', (object,), {'query_params': {'cursor': 'not-a-cursor'}})
+        response = get_vendor_list(request)
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_cursor_positions(self):
+        now = timezone.now().isoformat()
+        for position in ([now, [1]], [now, {'id': 1}], [now, True], [now, '1'], [1, 1], [None, 1]):
+            cursor = encode_cursor(position)
+            request = type('Request', (object,), {'query_params': {'cursor': cursor}})
+            self.assertEqual(get_purchase_orders_list(request).status_code, 400, position)
+        request = type('Request', (object,), {'query_params': {'cursor': encode_cursor([[1]])}})
+        self.assertEqual(get_vendor_list(request).status_code, 400)
+
+class PerformanceSnapshotTestCase(TestCase):
+    def test_snapshots_only_changed_vendors(self):
+        vendors = [
+            Vendor.objects.create(name=f"Vendor{i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            for i in range(2)
+        ]
+        now = timezone.now()
+        purchase_order = PurchaseOrder.objects.create(
+            po_number='PO1',
+            vendor=vendors[0],
+            order_date=now,
+            delivery_date=now,
+            items={},
+            quantity=1,
+            status='pending',
+            quality_rating=4,
+            acknowledgment_date=now,
+        )
+
+        self.assertEqual(snapshot_vendor_performance(), 2)
+        self.assertEqual(snapshot_vendor_performance(), 0)
+
+        purchase_order.status = 'completed'
+        purchase_order.save()
+        call_command('snapshot_performance', stdout=StringIO())
+
+        snapshots = HistoricalPerformance.objects.filter(vendor=vendors[0]).order_by('date')
+        self.assertEqual([snapshot.on_time_delivery_rate for snapshot in snapshots], [0.0, 1.0])
+        self.assertEqual(snapshots.last().quality_rating_avg, 4.0)
+        self.assertEqual(HistoricalPerformance.objects.filter(vendor=vendors[1]).count(), 1)
+
+class HistoricalPerformanceBucketTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        start = datetime(2023, 11, 1, 12, tzinfo=dt_timezone.utc)
+        HistoricalPerformance.objects.bulk_create(
+            HistoricalPerformance(
+                vendor=self.vendor,
+                date=start + timedelta(hours=12 * i),
+                on_time_delivery_rate=i % 2,
+                quality_rating_avg=4.0,
+                average_response_time=10.0 * i,
+                fulfilment_rate=1.0,
+            )
+            for i in range(10)
+        )
+
+    def get_history(self, **query_params):
+        request = type('Request', (object,), {'query_params': query_params})
+        return get_historical_performance_detail(request, self.vendor.id)
+
+    def test_day_buckets(self):
+        response = self.get_history(bucket='day', **{'from': '2023-11-02', 'to': '2023-11-04'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['date'] for row in response.data], ['2023-11-02T00:00:00Z', '2023-11-03T00:00:00Z', '2023-11-04T00:00:00Z'])
+        self.assertEqual(response.data[0]['samples'], 2)
+        self.assertEqual(response.data[0]['on_time_delivery_rate'], 0.5)
+        self.assertEqual(response.data[0]['average_response_time'], 15.0)
+        # A date-only ?to= includes the snapshots taken later on that day
+        self.assertEqual(response.data[-1]['samples'], 2)
+
+    def test_month_bucket_and_invalid_parameters(self):
+        response = self.get_history(bucket='month')
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['samples'], 10)
+
+        self.assertEqual(self.get_history(bucket='year').status_code, 400)
+        self.assertEqual(self.get_history(**{'from': 'yesterday'}).status_code, 400)
+
+class VendorCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        self.request = type('Request', (object,), {})
+
+    def test_cached_reads_and_invalidation(self):
+        self.assertEqual(get_vendor_detail(self.request, self.vendor.id).data['name'], 'Test Vendor')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_vendor_detail(self.request, str(self.vendor.id)).data['name'], 'Test Vendor')
+        self.assertEqual(vendor_cache_stats()['hits'], 1)
+        self.assertEqual(vendor_cache_stats()['misses'], 1)
+
+        data = {
+            'name': 'Renamed Vendor',
+            'contact_details': 'Contact',
+            'address': 'Address',
+            'vendor_code': 'V1',
+        }
+        update_vendor(type('Request', (object,), {'data': data}), self.vendor.id)
+        self.assertEqual(get_vendor_detail(self.request, self.vendor.id).data['name'], 'Renamed Vendor')
+
+        now = timezone.now()
+        PurchaseOrder.objects.create(
+            po_number='PO1', vendor=self.vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+            status='completed', quality_rating=5, acknowledgment_date=now,
+        )
+        update_vendor_metrics(self.vendor)
+        self.assertEqual(get_vendor_detail(self.request, self.vendor.id).data['quality_rating_avg'], 5.0)
+
+        delete_vendor(self.request, self.vendor.id)
+        with self.assertRaises(Vendor.DoesNotExist):
+            get_vendor_detail(self.request, self.vendor.id)
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def test_vendor_detail_not_modified(self):
+        url = f'/api/vendors/{self.vendor.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.vendor.name = 'Renamed Vendor'
+        self.vendor.save()
+        update_vendor_metrics(self.vendor)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_vendor_detail_reads_cache_once(self):
+        url = f'/api/vendors/{self.vendor.id}/'
+        self.client.get(url)
+        self.assertEqual(vendor_cache_stats(), {'hits': 0, 'misses': 1, 'hit_ratio': 0.0})
+        self.client.get(url)
+        self.assertEqual(vendor_cache_stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_purchase_order_list_not_modified(self):
+        now = timezone.now()
+        purchase_order = PurchaseOrder.objects.create(
+            po_number='PO1', vendor=self.vendor, order_date=now, delivery_date=now, items={}, quantity=1, status='pending',
+        )
+        url = f'/api/purchase_orders/?vendor_id={self.vendor.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        purchase_order.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_paginated_and_exported_lists_have_no_etag(self):
+        self.assertIn('ETag', self.client.get('/api/vendors/'))
+        self.assertNotIn('ETag', self.client.get('/api/vendors/?page_size=10'))
+        self.assertNotIn('ETag', self.client.get('/api/vendors/?format=ndjson'))
+        with override_settings(API_DEFAULT_PAGE_SIZE=10):
+            self.assertNotIn('ETag', self.client.get('/api/purchase_orders/'))
+
+@override_settings(METRICS_QUEUE_MODE='sync')
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        self.purchase_order = PurchaseOrder.objects.create(
+            po_number='PO1', vendor=self.vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+            status='completed', quality_rating=4,
+        )
+        self.async_client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    async def test_acknowledge_updates_metrics(self):
+        response = await self.async_client.post(f'/api/async/purchase_orders/{self.purchase_order.id}/acknowledge/')
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post(f'/api/async/purchase_orders/{self.purchase_order.id}/acknowledge/')
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.get(f'/api/async/vendors/{self.vendor.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['on_time_delivery_rate'], 1.0)
+        self.assertEqual(response.json()['quality_rating_avg'], 4.0)
+
+    # Through the sync client, so the async view's database work can be captured on this thread
+    def test_vendor_writes_leave_metric_columns_to_the_metrics_module(self):
+        self.client.force_login(User.objects.get(username='admin'))
+        data = {"name": "New Vendor", "contact_details": "Contact", "address": "Address", "vendor_code": "V2", "quality_rating_avg": 5.0}
+        response = self.client.post('/api/async/vendors/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['quality_rating_avg'], 0.0)
+        self.assertEqual(VendorScorecard.objects.get(vendor_id=response.json()['id']).quality_rating_avg, 0.0)
+
+        data = {**data, "name": "Renamed Vendor", "vendor_code": "V1", "quality_rating_avg": 1.0}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(f'/api/async/vendors/{self.vendor.id}/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Renamed Vendor')
+        self.assertEqual(response.json()['quality_rating_avg'], 4.0)
+        detail_update = next(query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE "vendor_management_app_vendor"'))
+        self.assertIn('"name"', detail_update)
+        self.assertNotIn('"metrics_version"', detail_update)
+        self.assertNotIn('"quality_rating_avg"', detail_update)
+
+    async def test_purchase_order_list(self):
+        response = await self.async_client.get('/api/async/purchase_orders/', {'vendor_id': self.vendor.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Total-Count'], '1')
+        expected = PurchaseOrderSerializer(self.purchase_order).data
+        self.assertEqual(response.json(), [json.loads(json.dumps(expected))])
+
+    async def test_requires_login(self):
+        response = await AsyncClient().get('/api/async/vendors/')
+        self.assertEqual(response.status_code, 302)
+
+
+class MetricQueueTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        self.purchase_orders = [
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i}', vendor=self.vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+                status='completed', quality_rating=4,
+            )
+            for i in range(3)
+        ]
+
+    def test_queue_coalesces_vendors(self):
+        metric_queue = VendorMetricQueue(workers=0, batch_size=10)
+        metric_queue.put([1, 1, 2])
+        metric_queue.put([1])
+        self.assertEqual(len(metric_queue), 2)
+        self.assertTrue(metric_queue.is_pending(1))
+        self.assertFalse(metric_queue.is_pending(3))
+
+    def test_unknown_queue_mode_is_rejected(self):
+        check_metrics_queue_mode()
+        with override_settings(METRICS_QUEUE_MODE='threads'):
+            with self.assertRaises(ImproperlyConfigured):
+                check_metrics_queue_mode()
+
+    @override_settings(METRICS_QUEUE_MODE='db', METRICS_DEBOUNCE_SECONDS=0)
+    def test_durable_queue(self):
+        for purchase_order in self.purchase_orders:
+            response = acknowledge_purchase_order_services(purchase_order.id)
+            self.assertEqual(response['X-Metrics-Stale'], 'true')
+        self.assertEqual(MetricRecomputeTask.objects.filter(vendor=self.vendor).count(), 1)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 0)
+
+        self.assertEqual(process_metric_tasks(), 1)
+        self.assertFalse(MetricRecomputeTask.objects.exists())
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+        response = get_vendor_detail(type('Request', (object,), {'query_params': {}}), self.vendor.id)
+        self.assertEqual(response['X-Metrics-Stale'], 'false')
+
+class VendorMetricWriteTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        PurchaseOrder.objects.create(
+            po_number='PO1', vendor=self.vendor, order_date=now, delivery_date=now, acknowledgment_date=now,
+            items={}, quantity=1, status='completed', quality_rating=3,
+        )
+
+    def test_only_metric_columns_are_written(self):
+        Vendor.objects.filter(id=self.vendor.id).update(name="Renamed")
+        update_vendor_metrics(self.vendor)
+        stored = Vendor.objects.get(id=self.vendor.id)
+        self.assertEqual(stored.name, "Renamed")
+        self.assertEqual(stored.quality_rating_avg, 3.0)
+        self.assertEqual(stored.metrics_version, 1)
+
+    def test_stale_version_is_not_written(self):
+        aggregate = get_vendor_aggregate(self.vendor.id)
+        Vendor.objects.filter(id=self.vendor.id).update(metrics_version=5)
+        self.assertIsNone(_write_vendor_metrics(self.vendor.id, 4, aggregate))
+        self.assertEqual(Vendor.objects.get(id=self.vendor.id).quality_rating_avg, 0.0)
+
+        self.assertEqual(store_vendor_metrics(self.vendor.id)['quality_rating_avg'], 3.0)
+        self.assertEqual(Vendor.objects.get(id=self.vendor.id).metrics_version, 6)
+
+class MetricQueueWorkerTestCase(TransactionTestCase):
+    def test_debounce_merges_requests(self):
+        vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        metric_queue = VendorMetricQueue(workers=1, batch_size=10, debounce=0.2)
+        for _ in range(3):
+            metric_queue.put([vendor.id])
+            time.sleep(0.02)
+        metric_queue.join()
+        self.assertEqual(Vendor.objects.get(id=vendor.id).metrics_version, 1)
+
+    @override_settings(METRICS_QUEUE_MODE='thread')
+    def test_worker_pool_updates_metrics(self):
+        vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        purchase_order = PurchaseOrder.objects.create(
+            po_number='PO1', vendor=vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+            status='completed', quality_rating=5,
+        )
+        response = acknowledge_purchase_order_services(purchase_order.id)
+        self.assertEqual(response.status_code, 200)
+        get_metric_queue().join()
+        vendor.refresh_from_db()
+        self.assertEqual(vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(vendor.quality_rating_avg, 5.0)
+        self.assertFalse(get_metric_queue().is_pending(vendor.id))
+
+@override_settings(METRICS_QUEUE_MODE='sync')
+class VendorScorecardTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.vendors = []
+        for i, (on_time, rating) in enumerate([(True, 5), (True, 3), (False, 4)]):
+            vendor = Vendor.objects.create(name=f"Vendor {i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            purchase_order = PurchaseOrder.objects.create(
+                po_number=f'PO{i}', vendor=vendor, order_date=now, items={}, quantity=1, status='completed', quality_rating=rating,
+                delivery_date=now if on_time else now + timedelta(days=1),
+            )
+            acknowledge_purchase_order_services(purchase_order.id)
+            self.vendors.append(vendor)
+
+    def request(self, **params):
+        return type('Request', (object,), {'query_params': params})
+
+    def test_scorecard_follows_metric_writes(self):
+        scorecard = VendorScorecard.objects.get(vendor=self.vendors[2])
+        self.assertEqual(scorecard.on_time_delivery_rate, 0.0)
+        self.assertEqual(scorecard.quality_rating_avg, 4.0)
+        self.assertAlmostEqual(scorecard.score, 0.35 * 0.8 + 0.25)
+
+        recompute_vendor_metrics([vendor.id for vendor in self.vendors])
+        self.assertEqual(VendorScorecard.objects.count(), 3)
+        self.vendors[0].delete()
+        self.assertEqual(VendorScorecard.objects.count(), 2)
+
+    def test_scorecard_total_follows_inserts_and_deletes(self):
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 3)
+        recompute_vendor_metrics([vendor.id for vendor in self.vendors])
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 3)
+        Vendor.objects.create(name="Vendor 3", contact_details="Contact", address="Address", vendor_code="V3")
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 4)
+        Vendor.objects.filter(id__in=[self.vendors[0].id, self.vendors[1].id]).delete()
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 2)
+
+        VendorScorecardTotal.objects.all().delete()
+        response = get_vendor_rank(self.request(), self.vendors[2].id)
+        self.assertEqual(response.data['vendors'], 2)
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 2)
+
+    def test_rebuild_command_recounts_scorecard_total(self):
+        VendorScorecardTotal.objects.update(vendors=5)
+        with self.assertRaises(SystemExit):
+            call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+        call_command('rebuild_vendor_metrics', stdout=StringIO())
+        self.assertEqual(VendorScorecardTotal.objects.get().vendors, 3)
+        call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+
+    def test_leaderboard(self):
+        response = get_vendor_leaderboard(self.request())
+        self.assertEqual([row['vendor'] for row in response.data], [self.vendors[0].id, self.vendors[1].id, self.vendors[2].id])
+        self.assertEqual([row['rank'] for row in response.data], [1, 2, 3])
+
+        response = get_vendor_leaderboard(self.request(sort='on_time_delivery_rate', limit='2'))
+        self.assertEqual([row['rank'] for row in response.data], [1, 1])
+        self.assertEqual(get_vendor_leaderboard(self.request(sort='name')).status_code, 400)
+
+    def test_vendor_rank(self):
+        response = get_vendor_rank(self.request(), self.vendors[1].id)
+        self.assertEqual(response.data['vendors'], 3)
+        self.assertEqual(response.data['ranks']['score']['rank'], 2)
+        self.assertEqual(response.data['ranks']['quality_rating_avg']['rank'], 3)
+        self.assertEqual(response.data['ranks']['on_time_delivery_rate']['percentile'], 100.0)
+        self.assertEqual(response.data['ranks']['quality_rating_avg']['percentile'], round(100 / 3, 2))
+        self.assertEqual(get_vendor_rank(self.request(), 0).status_code, 404)
+
+class FleetAnalyticsTestCase(TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.vendors = [
+            Vendor.objects.create(name=f"Vendor {i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            for i in range(3)
+        ]
+        rows = [
+            # vendor, status, day delivered, acknowledged after (hours, None = never), rating
+            (0, 'completed', 0, 12, 4.5),
+            (0, 'completed', 3, 200, 2.0),
+            (0, 'completed', 20, None, None),
+            (0, 'pending', 21, 1, 5.0),
+            (1, 'completed', 5, 1.5, 3.3),
+            (1, 'completed', 40, 30, 3.7),
+            (1, 'canceled', 41, 2, 1.0),
+        ]
+        for i, (vendor, status, day, acknowledged_after, rating) in enumerate(rows):
+            issue_date = self.start + timedelta(days=day - 2, microseconds=i * 7)
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i}', vendor=self.vendors[vendor], order_date=issue_date, items={}, quantity=1,
+                status=status, quality_rating=rating, delivery_date=self.start + timedelta(days=day),
+            )
+            PurchaseOrder.objects.filter(po_number=f'PO{i}').update(
+                issue_date=issue_date,
+                acknowledgment_date=None if acknowledged_after is None else issue_date + timedelta(hours=acknowledged_after),
+            )
+
+    def test_matches_per_vendor_metrics(self):
+        for chunk_size in (2, 1000):
+            frame = fleet_vendor_metrics(chunk_size=chunk_size)
+            self.assertEqual(list(frame.index), [vendor.id for vendor in self.vendors])
+            for vendor in self.vendors:
+                expected = derive_vendor_metrics(type('Aggregate', (object,), compute_vendor_aggregate(vendor.id)))
+                for field, value in expected.items():
+                    self.assertAlmostEqual(frame.loc[vendor.id, field], value, places=9)
+        self.assertEqual(frame.loc[self.vendors[2].id, 'completed_count'], 0)
+
+    def test_trends(self):
+        trends = vendor_metric_trends([self.vendors[0].id], window='7D', freq='W')
+        self.assertEqual([str(date.date()) for date in trends['date']], ['2024-01-07', '2024-01-14', '2024-01-21'])
+        self.assertEqual(list(trends['completed_count']), [2, 0, 1])
+        self.assertEqual(trends['quality_rating_avg'].iloc[0], 3.25)
+        self.assertEqual(trends['fulfilment_rate'].iloc[0], 0.5)
+
+    def test_endpoints(self):
+        request = type('Request', (object,), {'query_params': QueryDict(f'vendor_id={self.vendors[1].id}')})
+        response = get_fleet_analytics(request)
+        self.assertEqual([row['vendor_id'] for row in response.data], [self.vendors[1].id])
+        self.assertAlmostEqual(response.data[0]['quality_rating_avg'], 3.5)
+
+        request = type('Request', (object,), {'query_params': QueryDict('window=60D&freq=M')})
+        response = get_vendor_trends(request, self.vendors[1].id)
+        self.assertEqual([row['date'] for row in response.data], ['2024-01-31T00:00:00Z', '2024-02-29T00:00:00Z'])
+        self.assertEqual([row['completed_count'] for row in response.data], [1, 2])
+
+        request = type('Request', (object,), {'query_params': QueryDict('window=12H')})
+        self.assertEqual(get_vendor_trends(request, self.vendors[1].id).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('vendor_analytics', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('vendor_id,completed_count'))
+        self.assertEqual(len(lines), 4)
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        self.user = User.objects.create_user(username='admin', password='password', is_staff=True)
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram(unit=1e-3)
+        for value in range(1, 1001):
+            histogram.record(value / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.5, delta=0.5 * 2 ** -5)
+        self.assertAlmostEqual(histogram.quantile(0.99), 0.99, delta=0.99 * 2 ** -5)
+        self.assertEqual(histogram.quantile(1), 1.0)
+
+    def test_requests_are_recorded_per_endpoint(self):
+        self.client.get(f'/api/vendors/{self.vendor.id}/')
+        self.client.get(f'/api/vendors/{self.vendor.id}/')
+        queries = registry.histogram('request_db_queries', 'vendor', unit=1)
+        self.assertEqual(queries.count, 2)
+        self.assertGreater(queries.max, 0)
+        self.assertGreater(registry.histogram('request_serialization_duration_seconds', 'vendor').sum, 0)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE vendor_management_request_duration_seconds summary', body)
+        self.assertIn('vendor_management_request_duration_seconds_count{endpoint="vendor"} 2', body)
+        self.assertIn('vendor_management_request_db_queries{endpoint="vendor",quantile="0.99"}', body)
+        self.assertIn('# TYPE vendor_management_vendor_cache_hits_total counter', body)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_logged(self):
+        with self.assertLogs('vendor_management_app.slow_queries', level='WARNING') as logs:
+            self.client.get(f'/api/purchase_orders/?vendor_id={self.vendor.id}')
+        self.assertIn('on purchase_orders', logs.output[0])
+
+    def test_metrics_require_staff(self):
+        self.client.force_login(User.objects.create_user(username='user', password='password'))
+        self.assertEqual(self.client.get('/metrics').status_code, 302)
+
+    async def test_async_views_are_recorded(self):
+        await self.async_client.get(f'/api/async/vendors/{self.vendor.id}/')
+        self.assertEqual(registry.histogram('request_duration_seconds', 'async_vendor').count, 1)
+        self.assertGreater(registry.histogram('request_db_queries', 'async_vendor', unit=1).max, 0)
+
+class FastSerializerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        PurchaseOrder.objects.create(
+            po_number="PO1", vendor=self.vendor, order_date=now, delivery_date=now + timedelta(days=2),
+            items={"sku": ["a", "b"]}, quantity=2, status="completed", quality_rating=4.5,
+            issue_date=now, acknowledgment_date=now + timedelta(hours=3),
+        )
+        PurchaseOrder.objects.create(
+            po_number="PO2", vendor=self.vendor, order_date=now, delivery_date=now + timedelta(days=5),
+            items={}, quantity=1, status="pending", issue_date=now,
+        )
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def assertSameJSON(self, serializer_class, fast_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(fast_class(queryset, many=True).data), expected)
+        self.assertEqual(JSONRenderer().render(fast_class(list(queryset), many=True).data), expected)
+
+    def test_matches_model_serializers(self):
+        self.assertSameJSON(VendorSerializer, FastVendorSerializer, Vendor.objects.order_by('id'))
+        self.assertSameJSON(PurchaseOrderSerializer, FastPurchaseOrderSerializer, PurchaseOrder.objects.order_by('id'))
+
+    def test_list_endpoints(self):
+        response = self.client.get(f'/api/purchase_orders/?vendor_id={self.vendor.id}')
+        self.assertEqual(response.json(), PurchaseOrderSerializer(PurchaseOrder.objects.order_by('id'), many=True).data)
+        response = self.client.get('/api/vendors/')
+        self.assertEqual(response.json()[0]['vendor_code'], "V1")
+        with override_settings(FAST_SERIALIZER_ENDPOINTS=()):
+            slow = self.client.get(f'/api/purchase_orders/?vendor_id={self.vendor.id}&page_size=1')
+        fast = self.client.get(f'/api/purchase_orders/?vendor_id={self.vendor.id}&page_size=1')
+        self.assertEqual(fast.content, slow.content)
+
+class SparseFieldsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        now = timezone.now()
+        self.purchase_order = PurchaseOrder.objects.create(
+            po_number="PO1", vendor=self.vendor, order_date=now, delivery_date=now + timedelta(days=2),
+            items={"sku": ["a", "b"]}, quantity=2, status="pending", issue_date=now,
+        )
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def test_purchase_order_list(self):
+        with self.assertNumQueries(1) as context:
+            response = get_purchase_orders_list(type('Request', (object,), {'query_params': {'fields': 'status,po_number,id'}}))
+        self.assertEqual(response.data, [{'id': self.purchase_order.id, 'po_number': "PO1", 'status': "pending"}])
+        self.assertNotIn('"items"', context.captured_queries[0]['sql'])
+
+        response = self.client.get('/api/purchase_orders/?fields=po_number,delivery_date&page_size=1')
+        self.assertEqual(list(response.json()['results'][0]), ['po_number', 'delivery_date'])
+        with override_settings(FAST_SERIALIZER_ENDPOINTS=()):
+            slow = self.client.get('/api/purchase_orders/?fields=po_number,delivery_date,vendor')
+        fast = self.client.get('/api/purchase_orders/?fields=po_number,delivery_date,vendor')
+        self.assertEqual(fast.content, slow.content)
+
+    def test_detail_and_export(self):
+        response = self.client.get(f'/api/purchase_orders/{self.purchase_order.id}/?fields=status')
+        self.assertEqual(response.json(), {'status': "pending"})
+        response = self.client.get(f'/api/vendors/{self.vendor.id}/?fields=name,vendor_code')
+        self.assertEqual(response.json(), {'name': "Test Vendor", 'vendor_code': "V1"})
+        response = self.client.get('/api/vendors/?format=csv&fields=vendor_code')
+        self.assertEqual(b''.join(response.streaming_content).decode().split(), ['vendor_code', 'V1'])
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/purchase_orders/?fields=status,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': "Unknown fields: secret."})
+
+class DatabaseProfileTestCase(TestCase):
+    def test_sqlite_pragmas_applied_on_connect(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite profile only")
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+# No 'replica' alias is configured under test, so a read routed to it fails with ConnectionDoesNotExist
+@override_settings(READ_REPLICAS=['replica'])
+class ReplicaRoutingTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        user = User.objects.create_user(username='admin', password='password')
+        self.client.force_login(user)
+        self.async_client = AsyncClient()
+        self.async_client.force_login(user)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Vendor))
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Vendor), 'replica')
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(Vendor, instance=self.vendor), 'default')
+        self.assertIsNone(router.db_for_read(Vendor))
+
+    def test_read_endpoints_use_replica_until_session_writes(self):
+        with self.assertRaises(ConnectionDoesNotExist):
+            self.client.get('/api/purchase_orders/')
+        self.assertEqual(self.client.get(f'/api/vendors/{self.vendor.id}/').status_code, 200)
+
+        self.assertEqual(self.create_purchase_order("PO1").status_code, 200)
+        response = self.client.get('/api/purchase_orders/')
+        self.assertEqual([row['po_number'] for row in response.json()], ["PO1"])
+
+        with override_settings(REPLICA_STICKY_SECONDS=-1):
+            self.create_purchase_order("PO2")
+            with self.assertRaises(ConnectionDoesNotExist):
+                self.client.get('/api/purchase_orders/')
+
+    async def test_async_requests_use_replica(self):
+        async def get_response(request):
+            return None
+        self.assertTrue(asyncio.iscoroutinefunction(ReplicaRoutingMiddleware(get_response)))
+        with self.assertRaises(ConnectionDoesNotExist):
+            await self.async_client.get('/api/purchase_orders/')
+        response = await self.async_client.get(f'/api/async/vendors/{self.vendor.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def create_purchase_order(self, po_number):
+        now = timezone.now().isoformat()
+        return self.client.post('/api/purchase_orders/', {
+            'po_number': po_number, 'vendor': {'id': self.vendor.id}, 'order_date': now, 'delivery_date': now, 'items': {},
+            'quantity': 1, 'status': "pending", 'quality_rating': None, 'issue_date': now, 'acknowledgment_date': None,
+        }, content_type='application/json')
+
+class LoadSuiteTestCase(TestCase):
+    def test_seed_load(self):
+        call_command('seed_load', vendors=20, purchase_orders=500, batch_size=200, stdout=StringIO())
+        counts = sorted(
+            Vendor.objects.filter(vendor_code__startswith='LOAD-').annotate(n=Count('purchaseorder')).values_list('n', flat=True),
+            reverse=True,
+        )
+        self.assertEqual(sum(counts), 500)
+        self.assertGreater(counts[0], 5 * counts[-1])
+        self.assertFalse(PurchaseOrder.objects.filter(issue_date__gt=timezone.now() - timedelta(minutes=1)).exists())
+        self.assertEqual(VendorScorecard.objects.count(), 20)
+
+        call_command('seed_load', clear=True, stdout=StringIO())
+        self.assertFalse(Vendor.objects.exists())
+
+    def test_benchmark_api_writes_json(self):
+        call_command('seed_load', vendors=5, purchase_orders=50, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark_api', requests=2, analytics_requests=1, output=output, stdout=StringIO())
+            with open(output) as f:
+                report = json.load(f)
+        self.assertEqual(report['data']['purchase_orders'], 50)
+        result = report['results']['purchase_order_list_vendor']
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['peak_memory_kib'], 0)
+
+class PurchaseOrderEventTestCase(TestCase):
+    def setUp(self):
+        self.vendors = [
+            Vendor.objects.create(name=f"Vendor {i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            for i in range(2)
+        ]
+        self.now = timezone.now()
+
+    def create_purchase_order(self, po_number, vendor, **fields):
+        return PurchaseOrder.objects.create(
+            po_number=po_number, vendor=vendor, order_date=self.now, delivery_date=self.now + timedelta(days=2),
+            items={}, quantity=1, status=fields.pop('status', 'pending'), **fields,
+        )
+
+    def test_changes_are_logged(self):
+        purchase_order = self.create_purchase_order("PO1", self.vendors[0])
+        purchase_order.acknowledgment_date = self.now + timedelta(days=3)
+        purchase_order.save()
+        purchase_order.quantity = 5
+        purchase_order.save()
+        purchase_order.status = 'completed'
+        purchase_order.quality_rating = 4.0
+        purchase_order.save()
+        purchase_order_id = purchase_order.id
+        purchase_order.delete()
+
+        events = list(PurchaseOrderEvent.objects.filter(purchase_order_id=purchase_order_id).order_by('id'))
+        self.assertEqual([event.event_type for event in events], ['created', 'acknowledged', 'delivered', 'deleted'])
+        self.assertEqual((events[2].status, events[2].quality_rating, events[2].acknowledgment_date), ('completed', 4.0, None))
+
+    def test_replay_rebuilds_metrics_and_history(self):
+        ack = self.now + timedelta(hours=5)
+        self.create_purchase_order("PO1", self.vendors[0], status='completed', quality_rating=4.5, acknowledgment_date=self.now + timedelta(days=3))
+        self.create_purchase_order("PO2", self.vendors[0], status='completed', quality_rating=2.0, acknowledgment_date=ack)
+        moved = self.create_purchase_order("PO3", self.vendors[0], acknowledgment_date=ack)
+        moved.vendor = self.vendors[1]
+        moved.status = 'completed'
+        moved.save()
+        cleared = self.create_purchase_order("PO4", self.vendors[1], status='completed', acknowledgment_date=ack)
+        cleared.acknowledgment_date = None
+        cleared.save()
+        self.create_purchase_order("PO5", self.vendors[1], status='completed', quality_rating=1.0).delete()
+
+        expected = {vendor.id: compute_vendor_aggregate(vendor.id) for vendor in self.vendors}
+        VendorMetricAggregate.objects.all().delete()
+        Vendor.objects.update(on_time_delivery_rate=0, quality_rating_avg=0, average_response_time=0, fulfilment_rate=0)
+
+        call_command('replay_purchase_order_events', workers=1, partitions=2, stdout=StringIO())
+        for vendor in self.vendors:
+            aggregate = VendorMetricAggregate.objects.get(vendor=vendor)
+            for counter, value in expected[vendor.id].items():
+                self.assertAlmostEqual(getattr(aggregate, counter), value, places=6)
+            vendor.refresh_from_db()
+            history = HistoricalPerformance.objects.filter(vendor=vendor).latest('date')
+            self.assertAlmostEqual(history.on_time_delivery_rate, vendor.on_time_delivery_rate)
+            self.assertAlmostEqual(history.quality_rating_avg, vendor.quality_rating_avg)
+            self.assertAlmostEqual(history.average_response_time, vendor.average_response_time)
+        self.assertEqual(VendorMetricAggregate.objects.get(vendor=self.vendors[1]).completed_count, 2)
+
+class VendorImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Old Name", contact_details="Contact", address="Address", vendor_code="V1")
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def test_csv_upload_upserts_on_vendor_code(self):
+        self.client.get(f'/api/vendors/{self.vendor.id}/')
+        body = (
+            "\ufeffvendor_code,name,contact_details,address\n"
+            "V1,New Name,Contact,Address\n"
+            "V2,Vendor2,Contact,Address\n"
+            ",Nameless,Contact,Address\n"
+            "V3,Vendor3,Contact,Address\n"
+            "V3,Vendor3 again,Contact,Address\n"
+        ).encode()
+        upload = SimpleUploadedFile('vendors.csv', body, content_type='text/csv')
+        response = self.client.post('/api/vendors/import/?chunk_size=3', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(response.json()['failed'], 1)
+        self.assertEqual(response.json()['errors'][0]['row'], 4)
+        self.assertIn('vendor_code', response.json()['errors'][0]['errors'])
+
+        self.assertEqual(Vendor.objects.count(), 3)
+        self.assertEqual(Vendor.objects.get(vendor_code='V3').name, 'Vendor3 again')
+        self.assertEqual(self.client.get(f'/api/vendors/{self.vendor.id}/').json()['name'], 'New Name')
+        self.assertEqual(VendorScorecard.objects.count(), 3)
+
+    def test_unsupported_file_is_rejected(self):
+        upload = SimpleUploadedFile('vendors.txt', b'vendor_code\nV2\n')
+        response = self.client.post('/api/vendors/import/', {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Vendor.objects.count(), 1)
+
+    def test_xlsx_command(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['vendor_code', 'name', 'contact_details', 'address'])
+        sheet.append([1001, 'Numeric Code', 'Contact', 'Address'])
+        sheet.append(['V1', 'New Name', 'Contact', 'Address'])
+        sheet.append(['V4', 'Too Long Contact', 'x' * 20, 'Address'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'vendors.xlsx')
+            workbook.save(path)
+            out = StringIO()
+            call_command('import_vendors', path, stdout=out)
+        self.assertIn('1 vendor(s) created, 1 updated, 1 row(s) invalid', out.getvalue())
+        self.assertIn('Row 4:', out.getvalue())
+        self.assertEqual(Vendor.objects.get(vendor_code='1001').name, 'Numeric Code')
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.name, 'New Name')
+
+class VendorStreamTestCase(TestCase):
+    def setUp(self):
+        self.vendors = [
+            Vendor.objects.create(name=f"Vendor{i}", contact_details="Contact", address="Address", vendor_code=f"V{i}")
+            for i in range(2)
+        ]
+        self.async_client = AsyncClient()
+        self.async_client.force_login(User.objects.create_user(username='admin', password='password'))
+
+    def complete_purchase_orders(self, vendor):
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            PurchaseOrder.objects.create(
+                po_number='PO1', vendor=vendor, order_date=now, delivery_date=now, items={}, quantity=1,
+                status='completed', quality_rating=4, acknowledgment_date=now,
+            )
+            store_vendor_metrics(vendor.id)
+            store_vendor_metrics(vendor.id)
+
+    async def test_stream_pushes_changes_of_subscribed_vendors(self):
+        vendor = self.vendors[0]
+        stream = event_stream(Subscriber(asyncio.get_running_loop(), {vendor.id}))
+        self.assertTrue((await anext(stream)).startswith('retry:'))
+        await sync_to_async(self.complete_purchase_orders)(self.vendors[1])
+        await sync_to_async(self.complete_purchase_orders)(vendor)
+
+        messages = (await anext(stream)).strip().split('\n\n')
+        await stream.aclose()
+        self.assertEqual(len(messages), 2)
+        event, data = messages[0].split('\n')
+        self.assertEqual(event, 'event: status')
+        data = json.loads(data.removeprefix('data: '))
+        self.assertEqual((data['vendor'], data['status']), (vendor.id, 'completed'))
+        # The second store_vendor_metrics changed nothing, so only one metrics event is sent
+        event, data = messages[1].split('\n')
+        self.assertEqual(event, 'event: metrics')
+        self.assertEqual(json.loads(data.removeprefix('data: '))['quality_rating_avg'], 4.0)
+        self.assertFalse(broker.has_subscribers())
+
+    async def test_slow_subscriber_drops_oldest(self):
+        subscriber = Subscriber(asyncio.get_running_loop(), buffer_size=2)
+        subscriber.push([('status', 1, {'id': 1}), ('status', 1, {'id': 2})])
+        subscriber.push([('status', 1, {'id': 3})])
+        events, dropped = await subscriber.drain(timeout=0)
+        self.assertEqual([data['id'] for event, vendor_id, data in events], [2, 3])
+        self.assertEqual(dropped, 1)
+        self.assertEqual(await subscriber.drain(timeout=0), ([], 0))
+
+    async def test_stream_endpoint(self):
+        response = await self.async_client.get('/api/vendors/stream/', {'vendors': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get('/api/vendors/stream/', {'vendors': str(self.vendors[0].id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_stream_requires_asgi(self):
+        self.client.force_login(User.objects.get(username='admin'))
+        self.assertEqual(self.client.get('/api/vendors/stream/').status_code, 501)
+        self.assertNotContains(self.client.get('/dashboard/'), 'EventSource')
+
+    async def test_dashboard_opens_stream_over_asgi(self):
+        response = await self.async_client.get('/dashboard/')
+        self.assertContains(response, 'EventSource')
+
+class VendorMetricWindowTestCase(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        self.client.force_login(User.objects.create_user(username='admin', password='password'))
+        self.today = today()
+        self.now = timezone.now()
+        for days_ago, rating in ((5, 4.0), (60, 2.0), (200, None), (400, 5.0)):
+            self.create_purchase_order(days_ago, 'completed', rating)
+        self.pending = self.create_purchase_order(1, 'pending', None)
+
+    def create_purchase_order(self, days_ago, status, quality_rating):
+        delivery = self.now - timedelta(days=days_ago)
+        return PurchaseOrder.objects.create(
+            po_number=f'PO{days_ago}', vendor=self.vendor, order_date=delivery - timedelta(days=3), delivery_date=delivery,
+            items={}, quantity=1, status=status, quality_rating=quality_rating, acknowledgment_date=delivery - timedelta(days=1),
+        )
+
+    # Counters over the window, straight from the purchase orders
+    def expected(self, days, end):
+        upper = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=dt_timezone.utc)
+        purchase_orders = PurchaseOrder.objects.filter(
+            vendor=self.vendor, delivery_date__gte=upper - timedelta(days=days), delivery_date__lt=upper,
+        )
+        return aggregate_purchase_orders(purchase_orders)
+
+    def assertWindowsMatch(self, end):
+        windows = vendor_metric_windows(self.vendor.id, end)
+        self.assertEqual([window.days for window in windows], [30, 90, 365])
+        for window in windows:
+            for counter, value in self.expected(window.days, end).items():
+                self.assertAlmostEqual(getattr(window, counter), value, places=6, msg=f'{window.days} days, {counter}')
+
+    def test_endpoint(self):
+        response = self.client.get(f'/api/vendors/{self.vendor.id}/windows/')
+        self.assertEqual(response.status_code, 200)
+        windows = {window['days']: window for window in response.json()['windows']}
+        self.assertEqual(windows[30]['completed_count'], 1)
+        self.assertEqual(windows[90]['quality_rating_avg'], 3.0)
+        self.assertEqual(windows[365]['completed_count'], 3)
+        self.assertEqual(windows[365]['fulfilment_rate'], 2 / 3)
+        self.assertEqual(self.client.get('/api/vendors/0/windows/').status_code, 404)
+
+    def test_writes_are_applied_to_buckets_and_windows(self):
+        self.assertWindowsMatch(self.today)
+        self.pending.status = 'completed'
+        self.pending.quality_rating = 1.0
+        self.pending.save()
+        moved = PurchaseOrder.objects.get(po_number='PO60')
+        moved.delivery_date = self.now - timedelta(days=10)
+        moved.save()
+        PurchaseOrder.objects.get(po_number='PO200').delete()
+        self.assertWindowsMatch(self.today)
+        self.assertEqual(VendorMetricWindow.objects.get(vendor=self.vendor, days=30).completed_count, 3)
+
+    def test_windows_slide_forward(self):
+        self.assertWindowsMatch(self.today)
+        for days in (1, 29, 40, 200, 1000):
+            self.assertWindowsMatch(self.today + timedelta(days=days))
+
+    def test_rebuild_matches_incremental_buckets(self):
+        incremental = list(VendorDailyMetric.objects.filter(vendor=self.vendor).order_by('day').values('day', *METRIC_COUNTERS))
+        rebuild_vendor_daily_metrics([self.vendor.id])
+        rebuilt = list(VendorDailyMetric.objects.filter(vendor=self.vendor).order_by('day').values('day', *METRIC_COUNTERS))
+        self.assertEqual(len(incremental), 4)
+        self.assertEqual(incremental, rebuilt)
+
+# A purchase order write that has not committed yet, for a day past the end of the vendor's windows,
+# while another connection moves the windows over that day. Needs row locks, so not on SQLite.
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(METRICS_QUEUE_MODE='sync')
+class VendorMetricWindowConcurrencyTestCase(TransactionTestCase):
+    def test_window_read_waits_for_bucket_write(self):
+        vendor = Vendor.objects.create(name="Test Vendor", contact_details="Contact", address="Address", vendor_code="V1")
+        end = today() - timedelta(days=1)
+        vendor_metric_windows(vendor.id, end)
+        written, release = threading.Event(), threading.Event()
+
+        def write():
+            try:
+                with transaction.atomic():
+                    now = timezone.now()
+                    PurchaseOrder.objects.create(
+                        po_number='PO1', vendor=vendor, order_date=now, delivery_date=now, items={}, quantity=1, status='completed',
+                    )
+                    written.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def read():
+            try:
+                vendor_metric_windows(vendor.id)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        written.wait(5)
+        reader = threading.Thread(target=read)
+        reader.start()
+        # The reader is held on the vendor row until the write commits
+        reader.join(0.5)
+        self.assertTrue(reader.is_alive())
+        release.set()
+        writer.join()
+        reader.join()
+        self.assertEqual([window.completed_count for window in vendor_metric_windows(vendor.id)], [1, 1, 1])
@@ -1,14 +1,29 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('login/', views.admin_login, name='login'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('api/vendors/', views.get_vendors, name='vendors'),    
+    path('api/vendors/import/', views.import_vendors, name='import_vendors'),
+    path('api/vendors/stream/', async_views.stream_vendors, name='vendor_stream'),
+    path('api/vendors/leaderboard/', views.vendor_leaderboard, name='vendor_leaderboard'),
     path('api/vendors/<str:pk>/', views.get_vendor, name='vendor'),
+    path('api/vendors/<str:pk>/rank/', views.vendor_rank, name='vendor_rank'),
     path('api/purchase_orders/', views.get_purchase_orders, name='purchase_orders'),
+    path('api/purchase_orders/bulk/', views.bulk_purchase_orders, name='bulk_purchase_orders'),
     path('api/purchase_orders/<str:pk>/', views.get_purchase_order, name='purchase_order'),
     path('api/vendors/<str:pk>/performance/', views.get_historical_performance, name='historical_performance'),
+    path('api/vendors/<str:pk>/trends/', views.get_vendor_trend, name='vendor_trends'),
+    path('api/vendors/<str:pk>/windows/', views.vendor_metric_windows, name='vendor_metric_windows'),
+    path('api/analytics/vendors/', views.fleet_analytics, name='fleet_analytics'),
     path('api/purchase_orders/<str:pk>/acknowledge/', views.acknowledge_purchase_order, name='acknowledge_purchase_order'),
+    path('api/cache/stats/', views.vendor_cache_stats, name='vendor_cache_stats'),
+    path('api/async/vendors/', async_views.get_vendors, name='async_vendors'),
+    path('api/async/vendors/<str:pk>/', async_views.get_vendor, name='async_vendor'),
+    path('api/async/purchase_orders/', async_views.get_purchase_orders, name='async_purchase_orders'),
+    path('api/async/purchase_orders/<str:pk>/', async_views.get_purchase_order, name='async_purchase_order'),
+    path('api/async/purchase_orders/<str:pk>/acknowledge/', async_views.acknowledge_purchase_order, name='async_acknowledge_purchase_order'),
+    path('metrics', views.prometheus_metrics, name='prometheus_metrics'),
     path('logout/', views.admin_logout, name='logout'),
 ]
\ No newline at end of file
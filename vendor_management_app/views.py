@@ -1,12 +1,26 @@
 from django.shortcuts import render
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
 from django.contrib.auth import logout
+from django.views.decorators.http import condition
 from .services import (create_vendor, get_vendor_list, get_vendor_detail, update_vendor, delete_vendor,
 create_purchase_order, get_purchase_orders_list, update_purchase_order, delete_purchase_order,
-get_purchase_order_detail, get_historical_performance_detail, acknowledge_purchase_order_services)
+get_purchase_order_detail, get_historical_performance_detail, acknowledge_purchase_order_services,
+bulk_create_purchase_orders, get_vendor_cache_stats, get_vendor_leaderboard, get_vendor_rank,
+get_fleet_analytics, get_vendor_trends, import_vendor_file, get_vendor_metric_windows)
+from .conditional import (purchase_order_etag, purchase_order_last_modified, purchase_order_list_etag,
+vendor_etag, vendor_last_modified, vendor_list_etag)
+from .caching import vendor_cache_stats as cache_stats
+from .instrumentation import render_prometheus
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .streams import streaming_available
 
 # User authentication
 def admin_login(request):
@@ -21,18 +35,32 @@ def admin_login(request):
 
     return render(request, 'login.html')
 
+# Live updates are only shown when served over ASGI, see streams.streaming_available
 @login_required
 def dashboard(request):
-    return render(request, 'dashboard.html')
+    return render(request, 'dashboard.html', {'live_updates': streaming_available(request)})
 
 def admin_logout(request):
     logout(request)
     return redirect('login') 
 
+# Per-endpoint request metrics of this process in the Prometheus text format (staff only)
+@staff_member_required
+def prometheus_metrics(request):
+    stats = cache_stats()
+    body = render_prometheus([
+        ('vendor_cache_hits_total', 'counter', 'Vendor cache hits', stats['hits']),
+        ('vendor_cache_misses_total', 'counter', 'Vendor cache misses', stats['misses']),
+        ('vendor_cache_hit_ratio', 'gauge', 'Vendor cache hit ratio', stats['hit_ratio']),
+    ])
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
 #  Django REST Framework APIs
 
 @login_required
+@condition(etag_func=vendor_list_etag)
 @api_view(['GET', 'POST'])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, NDJSONRenderer, CSVRenderer])
 def get_vendors(request):
     if request.method == 'GET':
         return get_vendor_list(request)
@@ -41,6 +69,7 @@ def get_vendors(request):
         return create_vendor(request)    
 
 @login_required
+@condition(etag_func=vendor_etag, last_modified_func=vendor_last_modified)
 @api_view(['GET', 'PUT', 'DELETE'])
 def get_vendor(request, pk):
     if request.method == 'GET': 
@@ -52,8 +81,41 @@ def get_vendor(request, pk):
     if request.method == 'DELETE':
         return delete_vendor(request, pk)     
 
+@login_required
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+def import_vendors(request):
+    if request.method == 'POST':
+        return import_vendor_file(request)
+
+@login_required
+@api_view(['GET'])
+def vendor_leaderboard(request):
+    if request.method == 'GET':
+        return get_vendor_leaderboard(request)
+
+@login_required
+@api_view(['GET'])
+def vendor_rank(request, pk):
+    if request.method == 'GET':
+        return get_vendor_rank(request, pk)
+
+@login_required
+@api_view(['GET'])
+def vendor_metric_windows(request, pk):
+    if request.method == 'GET':
+        return get_vendor_metric_windows(request, pk)
+
+@login_required
+@api_view(['GET'])
+def vendor_cache_stats(request):
+    if request.method == 'GET':
+        return get_vendor_cache_stats(request)
+
 @login_required    
+@condition(etag_func=purchase_order_list_etag)
 @api_view(['GET', 'POST'])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, NDJSONRenderer, CSVRenderer])
 def get_purchase_orders(request):
     if request.method == 'GET':
         return get_purchase_orders_list(request)
@@ -62,6 +124,14 @@ def get_purchase_orders(request):
         return create_purchase_order(request)  
 
 @login_required
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def bulk_purchase_orders(request):
+    if request.method == 'POST':
+        return bulk_create_purchase_orders(request)
+
+@login_required
+@condition(etag_func=purchase_order_etag, last_modified_func=purchase_order_last_modified)
 @api_view(['GET', 'PUT', 'DELETE'])
 def get_purchase_order(request, pk):
     if request.method == 'GET': 
@@ -79,8 +149,20 @@ def get_historical_performance(request, pk):
     if request.method == 'GET': 
         return get_historical_performance_detail(request, pk)
     
+@login_required
+@api_view(['GET'])
+def get_vendor_trend(request, pk):
+    if request.method == 'GET':
+        return get_vendor_trends(request, pk)
+
+@login_required
+@api_view(['GET'])
+def fleet_analytics(request):
+    if request.method == 'GET':
+        return get_fleet_analytics(request)
+
 @login_required
 @api_view(['POST'])
 def acknowledge_purchase_order(request, pk):
     if request.method == 'POST': 
-        return acknowledge_purchase_order_services(request, pk)
\ No newline at end of file
+        return acknowledge_purchase_order_services(pk, request)
\ No newline at end of file
@@ -0,0 +1,135 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from vendor_management_app.metrics import METRIC_COUNTERS, aggregate_purchase_orders_by_vendor_day, empty_contribution, purchase_order_contribution
+from vendor_management_app.models import PurchaseOrder, Vendor, VendorDailyMetric, VendorMetricWindow
+
+#  Rolling-window vendor metrics (settings.VENDOR_METRIC_WINDOWS, in days) kept without rescanning
+#  purchase orders. A completed purchase order counts towards the day bucket of its delivery day (UTC).
+#  Each window row holds the sum of its vendor's buckets over start..end:
+#    - a purchase order write adds its contribution delta to one bucket and to the windows covering that day
+#    - a window is moved forward lazily when read: the buckets of the days entering it are added and
+#      those of the days leaving it subtracted, one bucket per day
+#  Bucket writes and window updates of a vendor take turns on the vendor row lock. Otherwise a reader
+#  could move a window over a day whose bucket a writer has changed but not committed, and the
+#  writer's window UPDATE, run while the window still ended before that day, would miss it: the
+#  delta would never reach the window.
+
+def metric_day(value):
+    return value.astimezone(dt_timezone.utc).date()
+
+def today():
+    return metric_day(timezone.now())
+
+def _bucket_key(row):
+    if row is None or row['status'] != 'completed':
+        return None
+    return row['vendor_id'], metric_day(row['delivery_date'])
+
+# Sorted, so writers touching two vendors lock them in the same order. SQLite has no row locks and
+# lets one writer in at a time; there the SELECT would only open a read snapshot, and the write after
+# it fail with "database is locked" if another writer committed in between.
+def _lock_vendors(vendor_ids):
+    if not connection.features.has_select_for_update:
+        return
+    list(Vendor.objects.select_for_update().filter(id__in=sorted(vendor_ids)).order_by('id').values_list('id', flat=True))
+
+def _add_to_bucket(vendor_id, day, delta):
+    changes = {counter: F(counter) + value for counter, value in delta.items() if value}
+    if not changes:
+        return
+    if not VendorDailyMetric.objects.filter(vendor_id=vendor_id, day=day).update(**changes):
+        try:
+            with transaction.atomic():
+                VendorDailyMetric.objects.create(vendor_id=vendor_id, day=day, **delta)
+        except IntegrityError:
+            # Another writer created the bucket first
+            VendorDailyMetric.objects.filter(vendor_id=vendor_id, day=day).update(**changes)
+    VendorMetricWindow.objects.filter(vendor_id=vendor_id, start__lte=day, end__gte=day).update(updated_at=timezone.now(), **changes)
+
+# Move a purchase order's contribution from the bucket of its stored state (before) to the
+# bucket of its new state (after); either may be None
+def apply_window_delta(before, after):
+    deltas = {}
+    for row, sign in ((before, -1), (after, 1)):
+        key = _bucket_key(row)
+        if key is None:
+            continue
+        delta = deltas.setdefault(key, empty_contribution())
+        for counter, value in purchase_order_contribution(row).items():
+            delta[counter] += sign * value
+    if not deltas:
+        return
+    with transaction.atomic():
+        _lock_vendors({vendor_id for vendor_id, day in deltas})
+        for (vendor_id, day), delta in deltas.items():
+            _add_to_bucket(vendor_id, day, delta)
+
+# Counters summed over a vendor's buckets from first to last day (inclusive)
+def _bucket_sums(vendor_id, first, last):
+    if first > last:
+        return empty_contribution()
+    sums = VendorDailyMetric.objects.filter(vendor_id=vendor_id, day__range=(first, last)).aggregate(
+        **{counter: Sum(counter) for counter in METRIC_COUNTERS}
+    )
+    return {counter: value or 0 for counter, value in sums.items()}
+
+def _build_window(vendor_id, days, end):
+    start = end - timedelta(days=days - 1)
+    window, created = VendorMetricWindow.objects.update_or_create(
+        vendor_id=vendor_id, days=days,
+        defaults={'start': start, 'end': end, 'updated_at': timezone.now(), **_bucket_sums(vendor_id, start, end)},
+    )
+    return window
+
+# Slide a window forward to end. Days that enter and leave the window cost one bucket each;
+# a window that is more than its length behind is rebuilt from the buckets it now covers.
+def _advance_window(window, end):
+    with transaction.atomic():
+        window = VendorMetricWindow.objects.select_for_update().get(pk=window.pk)
+        if window.end == end:
+            return window
+        if window.end > end or (end - window.end).days >= window.days:
+            return _build_window(window.vendor_id, window.days, end)
+        start = end - timedelta(days=window.days - 1)
+        entered = _bucket_sums(window.vendor_id, window.end + timedelta(days=1), end)
+        expired = _bucket_sums(window.vendor_id, window.start, start - timedelta(days=1))
+        for counter in METRIC_COUNTERS:
+            setattr(window, counter, getattr(window, counter) + entered[counter] - expired[counter])
+        window.start, window.end, window.updated_at = start, end, timezone.now()
+        window.save()
+        return window
+
+# The windows of a vendor ending today (or on end), in VENDOR_METRIC_WINDOWS order
+def vendor_metric_windows(vendor_id, end=None):
+    end = end or today()
+    windows = {window.days: window for window in VendorMetricWindow.objects.filter(vendor_id=vendor_id)}
+    if all(window.end == end for window in windows.values()) and len(windows) == len(settings.VENDOR_METRIC_WINDOWS):
+        return [windows[days] for days in settings.VENDOR_METRIC_WINDOWS]
+    # Windows that are missing or behind are brought up to date in one transaction, under the
+    # vendor row lock so that bucket writes in flight commit first
+    result = []
+    with transaction.atomic():
+        _lock_vendors([vendor_id])
+        windows = {window.days: window for window in VendorMetricWindow.objects.filter(vendor_id=vendor_id)}
+        for days in settings.VENDOR_METRIC_WINDOWS:
+            window = windows.get(days)
+            if window is None:
+                window = _build_window(vendor_id, days, end)
+            elif window.end != end:
+                window = _advance_window(window, end)
+            result.append(window)
+    return result
+
+# Rebuild the day buckets of many vendors with one GROUP BY query, after writes that bypass the
+# signals (bulk inserts). Their windows are dropped and rebuilt from the buckets on next read.
+def rebuild_vendor_daily_metrics(vendor_ids):
+    vendor_ids = list(vendor_ids)
+    counters = aggregate_purchase_orders_by_vendor_day(PurchaseOrder.objects.filter(vendor_id__in=vendor_ids))
+    VendorDailyMetric.objects.filter(vendor_id__in=vendor_ids).delete()
+    VendorMetricWindow.objects.filter(vendor_id__in=vendor_ids).delete()
+    VendorDailyMetric.objects.bulk_create(
+        [VendorDailyMetric(vendor_id=vendor_id, day=day, **values) for (vendor_id, day), values in counters.items()]
+    )
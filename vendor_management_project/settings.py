@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,11 +43,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'vendor_management_app.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'vendor_management_app.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,14 +77,107 @@ WSGI_APPLICATION = 'vendor_management_project.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# DATABASE_PROFILE picks the backend: 'sqlite' (default) or 'postgresql' (needs psycopg or psycopg2).
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'vendor_management'),
+            'USER': os.environ.get('POSTGRES_USER', 'vendor_management'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Persistent connections, checked before reuse so a dropped one is replaced transparently
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+    # DATABASE_POOL=pgbouncer: connections go through PgBouncer in transaction pooling mode,
+    # which cannot keep server-side cursors open across transactions
+    if os.environ.get('DATABASE_POOL') == 'pgbouncer':
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the database lock before failing with "database is locked"
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000,
+            },
+        }
+    }
+else:
+    raise ValueError(f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}")
+
+# Read replica, added as the 'replica' alias: POSTGRES_REPLICA_HOST for the postgresql profile,
+# SQLITE_REPLICA_PATH (a copy of the primary file) to try the routing locally with SQLite.
+# Tests mirror it onto the primary.
+
+if DATABASE_PROFILE == 'postgresql' and os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif DATABASE_PROFILE == 'sqlite' and os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['SQLITE_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['vendor_management_app.routers.ReplicaRouter']
+
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Read-only endpoints (URL names) served from the replicas
+REPLICA_ENDPOINTS = (
+    'vendors', 'purchase_orders', 'historical_performance', 'vendor_trends', 'fleet_analytics',
+    'vendor_leaderboard', 'vendor_rank',
+)
+
+# How long a session reads from the primary after a write
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
 
-DATABASES = {
+# PRAGMAs run on every new SQLite connection. WAL lets readers run alongside the single writer,
+# and synchronous=NORMAL is durable in WAL mode except for the last commits on power loss.
+# Set SQLITE_JOURNAL_MODE=delete SQLITE_SYNCHRONOUS=full for SQLite's defaults.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Any Django cache backend can be plugged in through CACHE_BACKEND / CACHE_LOCATION.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'vendor-management'),
     }
 }
 
+# Read-through cache of serialized vendors
+
+VENDOR_CACHE_ALIAS = 'default'
+
+VENDOR_CACHE_TTL = 300
+
+VENDOR_CACHE_LOCK_TIMEOUT = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -123,3 +219,97 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Bulk purchase order ingestion
+
+PURCHASE_ORDER_BULK_CHUNK_SIZE = 500
+
+
+# Server-Sent Events at /api/vendors/stream/ (ASGI). Each client buffers up to VENDOR_STREAM_BUFFER_SIZE
+# events and drops the oldest beyond that; idle streams get a keep-alive comment every
+# VENDOR_STREAM_HEARTBEAT_SECONDS.
+
+VENDOR_STREAM_BUFFER_SIZE = 256
+
+VENDOR_STREAM_HEARTBEAT_SECONDS = 15
+
+VENDOR_STREAM_RETRY_MS = 3000
+
+
+# Rolling-window vendor metrics (GET /api/vendors/<pk>/windows/): window lengths in days.
+# Completed purchase orders count on their delivery day, UTC.
+
+VENDOR_METRIC_WINDOWS = tuple(int(days) for days in os.environ.get('VENDOR_METRIC_WINDOWS', '30,90,365').split(','))
+
+
+# Vendor import from CSV/XLSX files (POST /api/vendors/import/ and the import_vendors command).
+# Rows are upserted on vendor_code in chunks; at most VENDOR_IMPORT_MAX_ERRORS row errors are reported.
+
+VENDOR_IMPORT_CHUNK_SIZE = 1000
+
+VENDOR_IMPORT_MAX_ERRORS = 1000
+
+
+# Streaming NDJSON/CSV exports of the list endpoints (?format=ndjson or ?format=csv)
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+# Keyset pagination of the list endpoints (?cursor= / ?page_size=).
+# With API_DEFAULT_PAGE_SIZE = None lists are only paginated on request.
+
+API_DEFAULT_PAGE_SIZE = None
+
+API_MAX_PAGE_SIZE = 1000
+
+
+# Vendor scorecard leaderboard. The composite score weighs the on-time and fulfilment rates
+# and the quality rating scaled to 0-1; the weights add up to 1.
+
+SCORECARD_WEIGHTS = {
+    'on_time_delivery_rate': 0.4,
+    'quality_rating_avg': 0.35,
+    'fulfilment_rate': 0.25,
+}
+
+LEADERBOARD_DEFAULT_LIMIT = 10
+
+
+# Vendor metric recomputation after purchase order writes.
+# 'sync' recomputes inline, 'thread' hands it to an in-process worker pool and 'db' queues
+# durable MetricRecomputeTask rows for the process_metric_tasks command. 'thread' is the default
+# so writes do not wait for the recompute (responses carry X-Metrics-Stale while it is pending);
+# its queue is lost if the process exits, use 'db' where every recompute must survive a restart.
+
+METRICS_QUEUE_MODE = os.environ.get('METRICS_QUEUE_MODE', 'thread')
+
+METRICS_QUEUE_WORKERS = int(os.environ.get('METRICS_QUEUE_WORKERS', 2))
+
+METRICS_QUEUE_BATCH_SIZE = 500
+
+# Recompute requests for the same vendor within this window are merged ('thread' and 'db' modes)
+
+METRICS_DEBOUNCE_SECONDS = float(os.environ.get('METRICS_DEBOUNCE_SECONDS', 0.25))
+
+# Optimistic metric writes retried before falling back to locking the vendor row
+
+METRICS_WRITE_ATTEMPTS = 3
+
+
+# NumPy/pandas fleet analytics: purchase order rows loaded per chunk
+
+ANALYTICS_CHUNK_SIZE = 50_000
+
+
+# Request instrumentation exported at /metrics. Queries slower than the threshold are logged
+# to the vendor_management_app.slow_queries logger.
+
+METRICS_PREFIX = 'vendor_management_'
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+
+
+# List endpoints (URL names) served by the read-only fast serializers instead of DRF's
+
+FAST_SERIALIZER_ENDPOINTS = ('vendors', 'purchase_orders')